@@ -1,28 +1,213 @@
-from flask import Flask, render_template, jsonify, request
+import time
+IMPORT_START = time.monotonic() # Import time of the app modules, reported at /api/health
+import json
+import math
+from flask import Flask, Response, render_template, jsonify, request, g
 from gps_reader import gps_reader
 from navigator import navigator
+from route import prepare_waypoints, resampled_count
 from car_controller import car
 from state_machine import state_machine, CarMode
 from display_manager import display_manager
+from telemetry import telemetry, KIND_IDS
+from control_scheduler import control_scheduler
+from estimator import estimator
+from metrics import metrics
+from trip_recorder import trip_recorder
+from route_planner import route_planner
+from map_matcher import map_matcher
+from tile_server import tile_server, tile_etag, STYLES, MAX_ZOOM
+from subsystems import subsystems
+from command_mailbox import command_mailbox
+import control_channel
+
+try:
+    from flask_sock import Sock
+    HAS_SOCK = True
+except ImportError:
+    HAS_SOCK = False
 
 app = Flask(__name__)
+sock = Sock(app) if HAS_SOCK else None
+
+# Server-Sent Events
+STREAM_STATE_INTERVAL = 0.2 # Seconds between state checks while no new fix arrives
+STREAM_KEEPALIVE = 15.0 # Seconds of silence before a keep-alive comment is sent
+
+def start_trip_recorder():
+    # Record fixes, commands and mode changes of this run to trips/
+    trip_recorder.record_mode(state_machine.current_mode.value)
+    trip_recorder.start()
+
+def start_gps():
+    # Note: On a PC without the GPS hardware, this reports the connection error and the app keeps running.
+    gps_reader.start()
+    return gps_reader.wait_ready()
+
+def start_estimator():
+    # Fuse fixes with motor / steering commands into position estimates at the control rate
+    estimator.start()
+
+# Hardware and data sets come up concurrently in the background (see subsystems.py)
+# once the entry point calls subsystems.start(), not at import: importing app (tests,
+# benchmarks) touches no hardware. Until then commands are not written to the pins
+# and /api/route answers 503.
+subsystems.register('car', car.init_hardware)
+subsystems.register('display', display_manager.init_hardware)
+subsystems.register('trip_recorder', start_trip_recorder)
+subsystems.register('gps', start_gps, check=lambda: None if gps_reader.get_fix().seq else "no fix yet")
+subsystems.register('estimator', start_estimator)
+subsystems.register('command_mailbox', command_mailbox.start)
+subsystems.register('map_matcher', map_matcher.load)
+subsystems.register('route_planner', route_planner.load)
+subsystems.register('tiles', tile_server.load)
+subsystems.import_seconds = time.monotonic() - IMPORT_START
+
+def lcd_status():
+    """
+    Live LCD content: mode and speed, then route progress or the IP address.
+    """
+    fix = gps_reader.get_fix()
+    mode = 'AUTO' if state_machine.current_mode == CarMode.AUTONOMOUS else 'MAN'
+    lines = [f"{mode:<4}{fix.speed:5.1f}kmh {'GPS' if fix.seq else '---'}"]
+    if navigator.is_navigating:
+        progress = navigator.progress
+        lines.append(f"{progress['remaining_distance']:.0f}m WP{progress['waypoint_index'] + 1}/{progress['waypoint_count']}")
+    else:
+        lines.append(f"IP:{display_manager.ip}" if display_manager.ip else "Status: Running")
+    return lines
 
-# Start GPS reading in background
-# Note: On a PC without the GPS hardware, this will log connection errors but continue running.
-gps_reader.start()
+display_manager.set_status_provider(lcd_status)
+
+@app.before_request
+def stamp_request():
+    # Start of the command -> PWM latency measured in /api/control
+    g.request_start = time.monotonic()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/api/health')
+def get_health():
+    """
+    Startup state of every subsystem; 503 while starting or if one failed.
+    """
+    health = subsystems.status()
+    code = 200 if health['status'] in ('ready', 'degraded') else 503
+    return jsonify(health), code
+
 @app.route('/api/location')
 def get_location():
     location = gps_reader.get_location()
     return jsonify(location)
 
+def json_number(data, key, default, low, high):
+    """
+    data[key] (or default) as a finite float within [low, high]; ValueError otherwise.
+    """
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} must be a number")
+    value = float(value)
+    if not math.isfinite(value) or not low <= value <= high:
+        raise ValueError(f"{key} must be between {low} and {high}")
+    return value
+
+def json_integer(data, key, default, low, high):
+    """
+    data[key] (or default) as an int within [low, high]; ValueError otherwise.
+    """
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{key} must be an integer")
+    if not low <= value <= high:
+        raise ValueError(f"{key} must be between {low} and {high}")
+    return value
+
+def json_point(data, name):
+    """
+    data (a {"lat", "lng"} object) as a (lat, lng) tuple of floats; ValueError otherwise.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{name} must be an object with lat and lng")
+    try:
+        return json_number(data, 'lat', None, -90, 90), json_number(data, 'lng', None, -180, 180)
+    except ValueError as e:
+        raise ValueError(f"{name}.{e}")
+
+def build_state():
+    state = state_machine.get_state()
+    state['navigation'] = navigator.get_progress()
+    return state
+
 @app.route('/api/state')
 def get_state():
-    return jsonify(state_machine.get_state())
+    return jsonify(build_state())
+
+@app.route('/api/stream')
+def stream():
+    """
+    Pushes 'location' and 'state' events to the dashboard as they change.
+    Each client only ever gets the newest snapshot when it is ready to send,
+    so a slow client skips intermediate fixes instead of falling behind.
+    """
+    def events():
+        last_seq = -1
+        last_location = None
+        last_state = None
+        last_sent = time.monotonic()
+        while True:
+            fix = gps_reader.wait_for_fix(last_seq, timeout=STREAM_STATE_INTERVAL)
+            if fix is None:
+                fix = gps_reader.get_fix() # Picks up late map-match updates
+            last_seq = fix.seq
+
+            location = fix._asdict()
+            if location != last_location:
+                last_location = location
+                last_sent = time.monotonic()
+                yield f"event: location\ndata: {json.dumps(location)}\n\n"
+
+            state = build_state()
+            if state != last_state:
+                last_state = state
+                last_sent = time.monotonic()
+                yield f"event: state\ndata: {json.dumps(state)}\n\n"
+
+            if time.monotonic() - last_sent > STREAM_KEEPALIVE:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(events(), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/telemetry')
+def get_telemetry():
+    try:
+        n = int(request.args.get('n', 100))
+    except ValueError:
+        n = -1
+    if n < 0:
+        return jsonify({"status": "error", "message": "n must be a non-negative integer"}), 400
+    n = min(n, telemetry.size) # No more than the ring buffer holds
+    kind = request.args.get('kind')
+    if kind is not None and kind not in KIND_IDS:
+        return jsonify({"status": "error", "message": "Unknown kind"}), 400
+    return jsonify(telemetry.last(n, KIND_IDS.get(kind)))
+
+@app.route('/api/estimate')
+def get_estimate():
+    estimate = estimator.get_estimate()
+    return jsonify(estimate._asdict() if estimate is not None else {})
+
+@app.route('/api/metrics')
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/scheduler')
+def get_scheduler_stats():
+    return jsonify(control_scheduler.stats())
 
 @app.route('/api/mode', methods=['POST'])
 def set_mode():
@@ -33,7 +218,10 @@ def set_mode():
         if state_machine.current_mode != CarMode.AUTONOMOUS:
             navigator.stop_navigation()
         # Create a stop command when switching modes for safety
-        car.stop()
+        # (under the mailbox lock, so a manual command already past its mode check can't land after it)
+        with command_mailbox.actuation_lock:
+            command_mailbox.reset()
+            car.stop()
         state_machine.update_motion_state(0, 0)
         return jsonify({"status": "success", "mode": state_machine.current_mode.value})
     return jsonify({"status": "error", "message": "Invalid mode"}), 400
@@ -57,32 +245,49 @@ def manual_control():
         # Optional: You might allow override, but for now strict.
         return jsonify({"status": "error", "message": "Not in MANUAL mode"}), 403
 
-    data = request.json
-    speed_input = float(data.get('speed', 0)) # -100 to 100
-    angle_input = float(data.get('angle', 0)) # -1.0 to 1.0
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
+    try:
+        speed_input = json_number(data, 'speed', 0, -100, 100)
+        angle_input = json_number(data, 'angle', 0, -1.0, 1.0)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    seq = data.get('seq')
+    if seq is not None and (isinstance(seq, bool) or not isinstance(seq, int) or seq < 0):
+        return jsonify({"status": "error", "message": "seq must be a non-negative integer"}), 400
 
-    # Apply Limits
-    # Max Speed reduces the effective output
-    effective_speed = speed_input * (state_machine.max_speed / 100.0)
-    
-    # Max Turn reduces the effective angle
-    effective_angle = angle_input * (state_machine.max_turn / 100.0)
+    # Limits are applied and the car is driven by the mailbox's actuator thread
+    accepted = command_mailbox.submit(speed_input, angle_input, str(data.get('client', '')),
+                                      seq, g.request_start)
+    metrics.http_commands.inc()
+    if not accepted:
+        return jsonify({"status": "stale", "seq": seq})
+    return jsonify({"status": "success", "seq": seq})
 
-    # Update Motion State
-    state_machine.update_motion_state(effective_speed, effective_angle)
-    
-    # Drive Car
-    car.set_speed(effective_speed)
-    car.set_steering(effective_angle)
+if HAS_SOCK:
+    @sock.route('/ws/control')
+    def control_socket(ws):
+        # Binary manual control frames, see control_channel.py
+        control_channel.serve(ws, request.args.get('client', ''))
+
+@app.route('/api/control/stats')
+def get_control_stats():
+    return jsonify(command_mailbox.stats())
 
-    return jsonify({"status": "success"})
+MAX_ROUTE_TOLERANCE = 100.0 # meters
+MIN_ROUTE_SPACING = 0.5 # meters, when resampling is on
+MAX_ROUTE_POINTS = 10000 # waypoints after resampling
+MAX_ROUTE_SPACING = 1000.0 # meters
 
 @app.route('/api/navigate', methods=['POST'])
 def start_navigation():
     if state_machine.current_mode != CarMode.AUTONOMOUS:
          return jsonify({"status": "error", "message": "Switch to Semi-Autonomous Mode first"}), 403
 
-    data = request.json
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
     waypoints = data.get('waypoints')
     
     # Support legacy single destination
@@ -94,21 +299,152 @@ def start_navigation():
     
     if not waypoints:
         return jsonify({"status": "error", "message": "Missing waypoints"}), 400
-        
+
+    # Simplify / resample so the navigator's work follows the route's shape, not its point count
+    try:
+        if not isinstance(waypoints, list):
+            raise ValueError("waypoints must be a list")
+        points = [json_point(wp, f"waypoints[{i}]") for i, wp in enumerate(waypoints)]
+        tolerance = json_number(data, 'tolerance', navigator.route_tolerance, 0, MAX_ROUTE_TOLERANCE)
+        spacing = json_number(data, 'spacing', navigator.route_spacing, 0, MAX_ROUTE_SPACING)
+        # A tiny spacing would turn every segment into thousands of points
+        if 0 < spacing < MIN_ROUTE_SPACING:
+            raise ValueError(f"spacing must be 0 (off) or at least {MIN_ROUTE_SPACING}")
+        # Checked before resampling: a long route at a small spacing would not fit in memory
+        count = resampled_count([lat for lat, _ in points], [lng for _, lng in points], spacing)
+        if spacing > 0 and count > MAX_ROUTE_POINTS:
+            raise ValueError(f"Route would need {count} waypoints (max {MAX_ROUTE_POINTS}), raise spacing")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    points_in = len(points)
+    waypoints = prepare_waypoints([{'lat': lat, 'lng': lng} for lat, lng in points], tolerance, spacing)
+
     navigator.set_route(waypoints)
     navigator.start_navigation()
     state_machine.update_motion_state(10, 0)
     
-    return jsonify({"status": "success", "message": "Navigation started"})
+    return jsonify({"status": "success", "message": "Navigation started",
+                    "points_in": points_in, "points_out": len(waypoints)})
 
 @app.route('/api/stop', methods=['POST'])
 def stop_navigation():
     navigator.stop_navigation()
-    car.stop()
+    # Same as /api/mode: a manual command already queued must not land after the stop
+    with command_mailbox.actuation_lock:
+        command_mailbox.reset()
+        car.stop()
     state_machine.update_motion_state(0, 0)
     return jsonify({"status": "success", "message": "Navigation stopped"})
 
-if __name__ == '__main__':
+@app.route('/api/route', methods=['POST'])
+def plan_route():
+    """
+    Plans a route on the onboard road graph.
+    Body: {"end": {"lat", "lng"}, "start": {"lat", "lng"}} (start defaults to the current fix)
+    """
+    if route_planner.graph is None:
+        return jsonify({"status": "error", "message": "No offline road graph loaded"}), 503
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
+    start = data.get('start')
+    end = data.get('end')
+    if not start:
+        fix = gps_reader.get_fix()
+        if fix.seq:
+            start = {'lat': fix.lat, 'lng': fix.lng}
+    if not start or not end:
+        return jsonify({"status": "error", "message": "Missing start or end"}), 400
+    try:
+        start_lat, start_lng = json_point(start, 'start')
+        end_lat, end_lng = json_point(end, 'end')
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    t = time.perf_counter()
+    route = route_planner.plan(start_lat, start_lng, end_lat, end_lng)
+    planning_ms = (time.perf_counter() - t) * 1000
+    if route is None:
+        return jsonify({"status": "error", "message": "No route found"}), 404
+
+    return jsonify({
+        "status": "success",
+        "distance": route['distance'],
+        "waypoints": route['waypoints'],
+        # Same shape as an OSRM route geometry ([lng, lat]) so the map can draw either
+        "geometry": {"type": "LineString", "coordinates": [[wp['lng'], wp['lat']] for wp in route['waypoints']]},
+        "planning_ms": round(planning_ms, 2),
+    })
+
+TILE_MAX_AGE = 7 * 24 * 3600 # seconds browsers may reuse a tile without asking
+MAX_PREFETCH_RADIUS = 50000.0 # meters
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>.png')
+@app.route('/tiles/<style>/<int:z>/<int:x>/<int:y>.png')
+def get_tile(z, x, y, style='light'):
+    data = tile_server.get_tile(style, z, x, y)
+    if data is None:
+        return Response(status=404)
+    response = Response(data, mimetype='image/png')
+    response.cache_control.public = True
+    response.cache_control.max_age = TILE_MAX_AGE
+    response.set_etag(tile_etag(data))
+    return response.make_conditional(request)
+
+@app.route('/api/tiles')
+def get_tile_stats():
+    return jsonify(tile_server.stats())
+
+@app.route('/api/tiles/prefetch', methods=['POST'])
+def prefetch_tiles():
+    """
+    Body: {"bounds": {"south", "west", "north", "east"}} or {"lat", "lng", "radius"}
+    (defaults to 1 km around the current fix), plus optional style, min_zoom, max_zoom.
+    """
+    # No body at all means "around the current fix with the defaults"
+    data = request.get_json(silent=True) if request.get_data() else {}
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
+    try:
+        style = data.get('style', 'light')
+        if style not in STYLES:
+            raise ValueError(f"style must be one of {', '.join(sorted(STYLES))}")
+        min_zoom = json_integer(data, 'min_zoom', 12, 0, MAX_ZOOM)
+        max_zoom = json_integer(data, 'max_zoom', 17, 0, MAX_ZOOM)
+        if min_zoom > max_zoom:
+            raise ValueError("min_zoom must not be above max_zoom")
+
+        bounds = data.get('bounds')
+        if bounds is not None:
+            if not isinstance(bounds, dict):
+                raise ValueError("bounds must be an object with south, west, north and east")
+            south = json_number(bounds, 'south', None, -90, 90)
+            west = json_number(bounds, 'west', None, -180, 180)
+            north = json_number(bounds, 'north', None, -90, 90)
+            east = json_number(bounds, 'east', None, -180, 180)
+            if south > north or west > east:
+                raise ValueError("bounds must have south <= north and west <= east")
+            count = tile_server.prefetch(style, south, west, north, east, min_zoom, max_zoom)
+        else:
+            if 'lat' in data or 'lng' in data:
+                lat, lng = json_point(data, 'position')
+            else:
+                fix = gps_reader.get_fix()
+                if not fix.seq:
+                    return jsonify({"status": "error", "message": "No position to prefetch around"}), 400
+                lat, lng = fix.lat, fix.lng
+            radius = json_number(data, 'radius', 1000, 0, MAX_PREFETCH_RADIUS)
+            count = tile_server.prefetch_around(style, lat, lng, radius, min_zoom, max_zoom)
+    except ValueError as e:
+        # Also raised by the tile server when the area needs too many tiles
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if count is None:
+        return jsonify({"status": "error", "message": "Prefetch already running"}), 409
+    return jsonify({"status": "success", "tiles": count})
+
+def announce_address(port=5000):
     # Helper to print the actual IP address for the user
     import socket
     try:
@@ -118,15 +454,17 @@ if __name__ == '__main__':
         s.close()
         print(f"--------------------------------------------------")
         print(f" Server is running on your network!")
-        print(f" Access it from other devices at: http://{ip_address}:5000")
+        print(f" Access it from other devices at: http://{ip_address}:{port}")
         print(f"--------------------------------------------------")
-        # Update LCD
-        try:
-            display_manager.display_ip()
-        except:
-            pass
     except Exception:
         print("Could not detect IP address. Check 'ifconfig' or 'hostname -I'")
+    # Update LCD (returns immediately, the display thread does the rest)
+    display_manager.display_ip()
 
+if __name__ == '__main__':
+    # Development server. On the car use serve.py (production WSGI server).
+    import sys
+    subsystems.start()
+    announce_address(5000)
     # Host='0.0.0.0' allows access from other devices on the network
-    app.run(debug=True, host='0.0.0.0', use_reloader=False)
+    app.run(debug='--debug' in sys.argv, host='0.0.0.0', threaded=True, use_reloader=False)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Flask Endpoint Benchmark
+Requests per second for the hot dashboard endpoints through the Flask test
+client (measures handler + framework cost, not the network).
+
+Run from the project root:
+    python benchmarks/bench_flask.py
+"""
+
+import time
+from common import ROOT  # noqa: F401 (sets up sys.path)
+
+from app import app
+from state_machine import state_machine, CarMode
+
+def requests_per_second(func, duration=1.0):
+    func() # Warm up
+    count = 0
+    start = time.perf_counter()
+    end = start + duration
+    while time.perf_counter() < end:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def run(duration=1.0):
+    client = app.test_client()
+    previous_mode = state_machine.current_mode
+    state_machine.current_mode = CarMode.MANUAL # /api/control only accepts MANUAL
+    try:
+        return {
+            'location_rps': requests_per_second(lambda: client.get('/api/location'), duration),
+            'state_rps': requests_per_second(lambda: client.get('/api/state'), duration),
+            'control_rps': requests_per_second(
+                lambda: client.post('/api/control', json={'speed': 0, 'angle': 0.1}), duration),
+        }
+    finally:
+        state_machine.current_mode = previous_mode
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("Flask endpoints (test client)")
+    print("=" * 50)
+    for name, value in run().items():
+        print(f"{name}: {value:.0f}")
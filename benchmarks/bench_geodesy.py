@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Geodesy Benchmark
+Scalar haversine / XTE per call, and whole-route analysis on a 5000 point
+route with the vectorized NumPy versions and the Route table.
+
+Run from the project root:
+    python benchmarks/bench_geodesy.py
+"""
+
+from common import time_us, sample_route
+
+import geodesy
+from route import Route
+
+def run(route_points=5000):
+    lats, lngs = sample_route(route_points)
+    waypoints = [{'lat': float(a), 'lng': float(b)} for a, b in zip(lats, lngs)]
+    lat, lng = float(lats[100]) + 2e-5, float(lngs[100])
+
+    results = {
+        'haversine_us': time_us(lambda: geodesy.haversine_distance(lat, lng, lats[101], lngs[101])),
+        'xte_us': time_us(lambda: geodesy.get_cross_track_error(lats[100], lngs[100], lats[101], lngs[101], lat, lng)),
+        'route_points': route_points,
+        # Whole-route analysis, one call each
+        'distances_to_all_vertices_ms': time_us(lambda: geodesy.haversine_distances(lat, lng, lats, lngs), 100) / 1000,
+        'polyline_bearings_ms': time_us(lambda: geodesy.polyline_bearings(lats, lngs), 100) / 1000,
+        'xte_all_segments_ms': time_us(lambda: geodesy.polyline_cross_track_errors(lats, lngs, lat, lng), 100) / 1000,
+        'route_build_ms': time_us(lambda: Route(waypoints), 10) / 1000,
+    }
+    route = Route(waypoints)
+    results['remaining_distance_us'] = time_us(lambda: route.remaining_distance(lat, lng, 101))
+    return results
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("Geodesy")
+    print("=" * 50)
+    for name, value in run().items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Navigator Tick Benchmark
+One full navigation iteration (route math for a new fix + actuation tick)
+against a mocked GPSFix on a 5000 point route. Runs in mock GPIO mode.
+
+Run from the project root:
+    python benchmarks/bench_nav.py
+"""
+
+import time
+from common import time_us, sample_route
+
+from gps_reader import GPSFix
+from navigator import navigator
+
+def run(route_points=5000):
+    lats, lngs = sample_route(route_points)
+    navigator.set_route([{'lat': float(a), 'lng': float(b)} for a, b in zip(lats, lngs)])
+    # Far from the first waypoint so the route never advances while timing
+    fix = GPSFix(float(lats[0]) - 0.01, float(lngs[0]), 0.0, 5.0, 0.0, time.monotonic(), 1)
+
+    def tick():
+        navigator._on_fix(fix)
+        navigator._actuate()
+
+    return {
+        'route_points': route_points,
+        'on_fix_us': time_us(lambda: navigator._on_fix(fix), 5000),
+        'actuate_us': time_us(navigator._actuate, 5000),
+        'nav_iteration_us': time_us(tick, 5000),
+    }
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("Navigator tick")
+    print("=" * 50)
+    for name, value in run().items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
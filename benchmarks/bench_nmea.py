@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+NMEA Parser Benchmark
+Compares the fast bytes parser (nmea_parser) with pynmea2 on GGA / RMC / VTG.
+
+Run from the project root:
+    python benchmarks/bench_nmea.py
+"""
+
+from common import time_us
+
+import pynmea2
+import nmea_parser
+
+SENTENCES = {
+    'GGA': b"$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47\r\n",
+    'RMC': b"$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n",
+    'VTG': b"$GPVTG,054.7,T,034.4,M,005.5,N,010.2,K*48\r\n",
+}
+
+def parse_pynmea2(line):
+    # What GPSReader used to do per line: decode, parse, then read the fields
+    msg = pynmea2.parse(line.decode('utf-8', errors='ignore'))
+    if msg.sentence_type == 'VTG':
+        return msg.true_track, msg.spd_over_grnd_kts
+    if msg.sentence_type == 'RMC':
+        return msg.timestamp, msg.latitude, msg.longitude, msg.spd_over_grnd, msg.true_course
+    return msg.timestamp, msg.latitude, msg.longitude
+
+def run(number=20000):
+    results = {}
+    for kind, line in SENTENCES.items():
+        fast = time_us(lambda: nmea_parser.parse(line), number)
+        slow = time_us(lambda: parse_pynmea2(line), number)
+        results[kind] = {'nmea_parser_us': fast, 'pynmea2_us': slow, 'speedup': slow / fast}
+    return results
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("NMEA parse time per sentence")
+    print("=" * 50)
+    for kind, r in run().items():
+        print(f"{kind}: nmea_parser {r['nmea_parser_us']:.2f}us | pynmea2 {r['pynmea2_us']:.2f}us | {r['speedup']:.1f}x faster")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Serving Benchmark
+Starts the app under each server in its own process and drives /api/control
+over real HTTP sockets, like the dashboard joystick does:
+
+    dev_debug  app.run(debug=True) (the old way of running on the car)
+    dev        threaded Werkzeug server, debug off (python app.py)
+    gunicorn   serve.py, gthread worker (skipped if gunicorn is not installed)
+
+Per server: saturated throughput from `clients` keep-alive connections, and
+the latency of one client sending at joystick rate (JOYSTICK_HZ). Under
+gunicorn the joystick latency is also measured over the binary WebSocket
+channel (control_channel.py) when flask-sock is installed.
+
+Run from the project root:
+    python benchmarks/bench_serve.py
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+import http.client
+from common import ROOT
+
+PORT = 5091
+JOYSTICK_HZ = 30
+
+SERVERS = {
+    'dev_debug': [sys.executable, '-c',
+                  f"import app; app.subsystems.start(); app.app.run(debug=True, host='127.0.0.1', port={PORT}, use_reloader=False)"],
+    'dev': [sys.executable, '-c',
+            f"import app; app.subsystems.start(); app.app.run(host='127.0.0.1', port={PORT}, threaded=True, use_reloader=False)"],
+    'gunicorn': [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{PORT}'],
+}
+
+BODY = json.dumps({'speed': 20, 'angle': 0.1})
+HEADERS = {'Content-Type': 'application/json'}
+
+def has_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+def post(conn, path, body):
+    # http.client reconnects by itself when the server closed the connection (HTTP/1.0)
+    conn.request('POST', path, body, HEADERS)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+def wait_for_server(timeout=30.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            with socket.create_connection(('127.0.0.1', PORT), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def percentile_ms(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000.0
+
+def saturate(clients, duration):
+    counts = [0] * clients
+    latencies = []
+    lock = threading.Lock()
+    end = time.perf_counter() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+        local = []
+        while time.perf_counter() < end:
+            t = time.perf_counter()
+            post(conn, '/api/control', BODY)
+            local.append(time.perf_counter() - t)
+            counts[i] += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start), latencies
+
+def paced(rate_hz, duration):
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+    latencies = []
+    period = 1.0 / rate_hz
+    next_send = time.perf_counter()
+    end = next_send + duration
+    while next_send < end:
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+        t = time.perf_counter()
+        post(conn, '/api/control', BODY)
+        latencies.append(time.perf_counter() - t)
+        next_send += period
+    conn.close()
+    return latencies
+
+def paced_ws(rate_hz, duration):
+    import simple_websocket
+    from control_channel import encode_command, decode_ack
+    ws = simple_websocket.Client.connect(f'ws://127.0.0.1:{PORT}/ws/control?client=bench')
+    latencies = []
+    period = 1.0 / rate_hz
+    next_send = time.perf_counter()
+    end = next_send + duration
+    seq = 0
+    while next_send < end:
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+        seq += 1
+        t = time.perf_counter()
+        ws.send(encode_command(seq, 20, 0.1, t * 1000.0))
+        decode_ack(ws.receive())
+        latencies.append(time.perf_counter() - t)
+        next_send += period
+    ws.close()
+    return latencies
+
+def bench_server(name, clients, duration):
+    trips_dir = os.path.join(ROOT, 'trips')
+    before = set(os.listdir(trips_dir)) if os.path.isdir(trips_dir) else set()
+    proc = subprocess.Popen(SERVERS[name], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_server():
+            raise RuntimeError(f"{name} did not start")
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+        post(conn, '/api/mode', json.dumps({'mode': 'MANUAL'})) # /api/control only acts in MANUAL
+        for _ in range(50): # Warm up
+            post(conn, '/api/control', BODY)
+        conn.close()
+
+        rps, latencies = saturate(clients, duration)
+        joystick = paced(JOYSTICK_HZ, duration)
+        results = {
+            'control_rps': rps,
+            'control_p50_ms': percentile_ms(latencies, 0.5),
+            'control_p99_ms': percentile_ms(latencies, 0.99),
+            'joystick_p50_ms': percentile_ms(joystick, 0.5),
+            'joystick_p99_ms': percentile_ms(joystick, 0.99),
+        }
+        if name == 'gunicorn' and has_module('flask_sock'):
+            ws_joystick = paced_ws(JOYSTICK_HZ, duration)
+            results['ws_joystick_p50_ms'] = percentile_ms(ws_joystick, 0.5)
+            results['ws_joystick_p99_ms'] = percentile_ms(ws_joystick, 0.99)
+        return results
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        # Drop the trip files the server started
+        if os.path.isdir(trips_dir):
+            for trip in set(os.listdir(trips_dir)) - before:
+                os.remove(os.path.join(trips_dir, trip))
+
+def run(clients=4, duration=3.0):
+    results = {}
+    for name in SERVERS:
+        if name == 'gunicorn' and not has_module('gunicorn'):
+            continue
+        results[name] = bench_server(name, clients, duration)
+    return results
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print(f"/api/control over HTTP (4 clients saturating, then 1 client at {JOYSTICK_HZ} Hz)")
+    print("=" * 50)
+    for server, values in run().items():
+        print(f"{server}: " + ', '.join(f"{k} {v:.1f}" for k, v in values.items()))
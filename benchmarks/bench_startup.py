@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Imports app.py in a fresh interpreter under `python -X importtime` and
+reports how long the imports took (total and for the heavy modules) and how
+long each subsystem took to come up (see subsystems.py).
+
+Run from the project root:
+    python benchmarks/bench_startup.py
+"""
+
+import sys
+import json
+import subprocess
+from common import ROOT
+
+# Cumulative import time is reported for these (anything else is in import_app_ms)
+MODULES = ['flask', 'numpy', 'serial', 'gps_reader', 'map_matcher', 'route_planner', 'tile_server',
+           'display_manager', 'car_controller', 'estimator', 'requests', 'pynmea2', 'sqlite3']
+
+# Runs in the child: start and wait for every subsystem, then drop the trip file it started
+CHILD = """
+import json, os, time
+import app
+from subsystems import subsystems
+from trip_recorder import trip_recorder
+subsystems.start()
+subsystems.wait(60)
+status = subsystems.status()
+trip_recorder.stop()
+if getattr(trip_recorder, 'path', None) and os.path.exists(trip_recorder.path):
+    os.remove(trip_recorder.path)
+print('STARTUP ' + json.dumps(status))
+"""
+
+def parse_importtime(stderr):
+    """
+    {module: cumulative microseconds} for top-level lines of -X importtime output.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        times.setdefault(name.strip(), int(cumulative_us))
+    return times
+
+def startup_once():
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD], cwd=ROOT,
+                          capture_output=True, text=True, timeout=120)
+    status = None
+    for line in proc.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            status = json.loads(line[len('STARTUP '):])
+    if status is None:
+        raise RuntimeError(f"app did not start: {proc.stderr[-500:]}")
+    return parse_importtime(proc.stderr), status
+
+def run(repeat=3):
+    """
+    Best of `repeat` fresh interpreters for every number.
+    """
+    results = {}
+    for _ in range(repeat):
+        imports, status = startup_once()
+        sample = {'import_app_ms': imports.get('app', 0) / 1000.0,
+                  'startup_ms': (status['startup_seconds'] or 0) * 1000.0}
+        for name in MODULES:
+            # Lazily imported modules are absent (or imported by an init thread), count them as 0
+            sample[f"import_{name}_ms"] = imports.get(name, 0) / 1000.0
+        for name, subsystem in status['subsystems'].items():
+            sample[f"init_{name}_ms"] = (subsystem['seconds'] or 0) * 1000.0
+        for key, value in sample.items():
+            results[key] = min(results.get(key, value), value)
+    return results
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("App startup (fresh interpreter, best of 3)")
+    print("=" * 50)
+    for name, value in run().items():
+        print(f"{name}: {value:.1f} ms")
@@ -0,0 +1,29 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def time_us(func, number=10000, repeat=5):
+    """
+    Best-of-`repeat` time per call in microseconds (best, not mean, so one
+    background hiccup does not show up as a regression).
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number * 1e6
+
+def sample_route(n=5000, seed=42):
+    """
+    Deterministic wiggly route of n points (~5-10m spacing) as lat/lng lists.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    lats = 12.9716 + np.cumsum(rng.uniform(0, 6e-5, n))
+    lngs = 77.5946 + np.cumsum(rng.uniform(-3e-5, 6e-5, n))
+    return lats, lngs
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite Runner
+Runs every benchmark, saves the results as JSON under benchmarks/results/
+(named after the current commit) and prints the change against the previous
+results file so regressions show up between commits.
+
+Run from the project root:
+    python benchmarks/run.py
+    python benchmarks/run.py --only geodesy nmea
+    python benchmarks/run.py --compare benchmarks/results/<file>.json
+"""
+
+import os
+import json
+import time
+import glob
+import platform
+import argparse
+import subprocess
+
+from common import ROOT
+
+import bench_geodesy
+import bench_nmea
+import bench_nav
+import bench_flask
+import bench_startup
+import bench_serve
+
+SUITES = {
+    'geodesy': bench_geodesy.run,
+    'nmea': bench_nmea.run,
+    'nav': bench_nav.run,
+    'flask': bench_flask.run,
+    'startup': bench_startup.run,
+    'serve': bench_serve.run,
+}
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+def compare(current, previous):
+    # Metrics ending in _rps / speedup are "higher is better", the rest are times
+    cur = flatten(current['results'])
+    prev = flatten(previous['results'])
+    print(f"\nChange vs {previous['commit']} ({previous['timestamp']}):")
+    for name in sorted(cur):
+        if name not in prev or not prev[name] or name.endswith('_points'):
+            continue
+        change = (cur[name] - prev[name]) / prev[name] * 100
+        higher_is_better = name.endswith('_rps') or name.endswith('speedup')
+        worse = change < -10 if higher_is_better else change > 10
+        flag = "  <-- REGRESSION" if worse else ""
+        print(f"  {name}: {prev[name]:.3f} -> {cur[name]:.3f} ({change:+.1f}%){flag}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--only', nargs='+', choices=sorted(SUITES), help="Run only these suites")
+    parser.add_argument('--compare', help="Results file to compare against (default: latest)")
+    args = parser.parse_args()
+
+    previous_files = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), key=os.path.getmtime)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'node': platform.node(),
+        'results': {},
+    }
+    for name in (args.only or SUITES):
+        print(f"Running {name}...")
+        report['results'][name] = SUITES[name]()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{report['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report['results'], indent=2))
+    print(f"Saved {path}")
+
+    baseline = args.compare or (previous_files[-1] if previous_files else None)
+    if baseline:
+        with open(baseline) as f:
+            compare(report, json.load(f))
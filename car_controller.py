@@ -24,6 +24,83 @@ except ImportError:
     GPIO = MockGPIO()
 import time
 import threading
+from telemetry import telemetry, MOTOR, STEERING
+from trip_recorder import trip_recorder
+from metrics import metrics
+
+
+class CachedPWM:
+    """
+    Wraps a GPIO.PWM channel and skips ChangeDutyCycle calls that would not
+    change the output, so repeated identical commands cost no GPIO writes.
+    """
+    def __init__(self, pwm):
+        self.pwm = pwm
+        self.duty = None
+
+    def start(self, duty):
+        self.pwm.start(duty)
+        self.duty = duty
+
+    def ChangeDutyCycle(self, duty):
+        if duty == self.duty:
+            return
+        self.pwm.ChangeDutyCycle(duty)
+        self.duty = duty
+
+    def stop(self):
+        self.pwm.stop()
+
+
+class ServoScheduler:
+    """
+    One long-lived thread that owns the servo signal.
+
+    set_duty() moves the servo and arms a single "relax" deadline; when it
+    passes, the signal is switched off so the servo stops jittering. Repeating
+    the command the servo already holds (or last relaxed at) is a no-op, so
+    high-rate callers neither write to the GPIO nor push the deadline back.
+    """
+    def __init__(self, pwm, relax_delay=0.5):
+        self.pwm = pwm
+        self.relax_delay = relax_delay
+        self.target = None # Last commanded duty (kept after relaxing)
+        self.deadline = None # monotonic time at which to relax, None = idle
+        self.running = True
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def set_duty(self, duty):
+        with self.cond:
+            if duty == self.target:
+                return
+            self.target = duty
+            self.pwm.ChangeDutyCycle(duty)
+            self.deadline = time.monotonic() + self.relax_delay
+            self.cond.notify()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join()
+
+    def _run(self):
+        with self.cond:
+            while self.running:
+                if self.deadline is None:
+                    self.cond.wait()
+                    continue
+                remaining = self.deadline - time.monotonic()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+                # Relax under the lock so a new command can't be overwritten
+                self.deadline = None
+                self.pwm.ChangeDutyCycle(0)
+
 
 class CarController:
     def __init__(self):
@@ -35,28 +112,43 @@ class CarController:
         self.PIN_FORWARD = 13
         
         # State
-        self.current_speed = 0
+        self.current_speed = 0 # Last commanded speed (-100 to 100)
+        self.current_steering = 0.0 # Last commanded steering (-1.0 to 1.0)
         self.current_angle = 90
         self.last_servo_update = 0
-        self.servo_timer = None
+        self.servo_scheduler = None
         
         # Configuration
         self.STEERING_INVERTED = False # Set to True if car turns Left when it should turn Right
         self.OFFSET_ANGLE = 0.0 # Trim in degrees
         
+        # Commands only update state until init_hardware() has set up the pins
+        self.mock_mode = True
+        self.hardware_ready = False
+
+    def init_hardware(self):
+        """
+        Sets up GPIO and PWM. Run once at startup (see subsystems.py);
+        returns None, or why the car is running without hardware control.
+        """
+        if self.hardware_ready:
+            return None
         if MOCK_GPIO:
             print("Using Mock GPIO Driver (Import Failed).")
-            self.mock_mode = True
             # Setup dummy objects so logic doesn't crash on undefined vars
             self._setup_gpio()
+            reason = "RPi.GPIO not installed, mock GPIO"
         else:
             try:
                 self._setup_gpio()
             except RuntimeError:
                 print("GPIO Error: Likely not running on a Pi. Hardware control disabled.")
-                self.mock_mode = True
+                reason = "GPIO setup failed, hardware control disabled"
             else:
                 self.mock_mode = False
+                reason = None
+        self.hardware_ready = True
+        return reason
 
     def _setup_gpio(self):
         GPIO.setmode(GPIO.BCM)
@@ -69,22 +161,28 @@ class CarController:
         GPIO.setup(self.SERVO_PIN, GPIO.OUT)
 
         # Initialize PWM
-        self.pwm_forward = GPIO.PWM(self.PIN_FORWARD, 1000)
+        self.pwm_forward = CachedPWM(GPIO.PWM(self.PIN_FORWARD, 1000))
         self.pwm_forward.start(0)
         
-        self.pwm_backward = GPIO.PWM(self.PIN_BACKWARD, 1000)
+        self.pwm_backward = CachedPWM(GPIO.PWM(self.PIN_BACKWARD, 1000))
         self.pwm_backward.start(0)
         
-        self.servo_pwm = GPIO.PWM(self.SERVO_PIN, 50)
+        self.servo_pwm = CachedPWM(GPIO.PWM(self.SERVO_PIN, 50))
         self.servo_pwm.start(0) # 0 means off initially
 
+        # Single thread that relaxes the servo after each move
+        self.servo_scheduler = ServoScheduler(self.servo_pwm, relax_delay=0.5)
+
     def set_speed(self, speed):
         """
         Control motor speed.
         speed: -100 (Full Reverse) to 100 (Full Forward)
         """
+        self.current_speed = speed
+        metrics.motor_commands.inc()
+        telemetry.record(MOTOR, speed)
+        trip_recorder.record_speed(speed)
         if self.mock_mode:
-            print(f"[MOCK] Motor Speed: {speed}%")
             return
 
         # Clamp speed
@@ -105,8 +203,11 @@ class CarController:
         Control steering servo.
         angle_percent: -1.0 (Left) to 1.0 (Right)
         """
+        self.current_steering = angle_percent
+        metrics.steering_commands.inc()
+        telemetry.record(STEERING, angle_percent)
+        trip_recorder.record_steering(angle_percent)
         if self.mock_mode:
-            print(f"[MOCK] Steering: {angle_percent}")
             return
 
         # Clamp (-1 to 1)
@@ -131,20 +232,9 @@ class CarController:
         # User code used: 2.5 + (angle / 18.0)
         duty = 2.5 + (target_angle / 18.0)
         
-        self.servo_pwm.ChangeDutyCycle(duty)
-        
-        # Prevent Jitter: Turn off servo signal after short delay
+        # Prevent Jitter: the scheduler turns the servo signal off 0.5s after a move.
         # This allows the servo to reach position then relax.
-        if hasattr(self, 'servo_timer') and self.servo_timer:
-            self.servo_timer.cancel()
-        
-        def stop_servo_signal():
-            if not self.mock_mode:
-                self.servo_pwm.ChangeDutyCycle(0)
-        
-        # Increased time slightly to ensure it reaches position "little by little"
-        self.servo_timer = threading.Timer(0.5, stop_servo_signal)
-        self.servo_timer.start()
+        self.servo_scheduler.set_duty(duty)
 
     def stop(self):
         self.set_speed(0)
@@ -152,6 +242,7 @@ class CarController:
         
     def cleanup(self):
         if not self.mock_mode:
+            self.servo_scheduler.stop()
             self.pwm_forward.stop()
             self.pwm_backward.stop()
             self.servo_pwm.stop()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Manual Command Mailbox
+Decouples manual driving commands from the request that carried them.
+
+/api/control only validates a command and drops it into a single-slot,
+latest-wins mailbox (pipeline.LatestQueue(1)); one actuator thread takes the
+newest command and writes it to the car, at most rate_hz times per second.
+A burst of joystick events therefore costs one motor / servo update, and the
+car never works through a backlog of commands that are already outdated.
+
+Every dashboard sends a client id and an increasing sequence number. A
+command whose seq is not newer than the last one accepted from that client
+(e.g. a request that overtook another on a different connection) is
+rejected as stale and never applied.
+
+Usage:
+    command_mailbox.start()
+    command_mailbox.submit(speed, angle, client_id, seq, recv_time)
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from pipeline import LatestQueue
+from car_controller import car
+from state_machine import state_machine, CarMode
+from metrics import metrics
+
+
+MAX_SPEED = 100.0 # |speed| accepted from the dashboard
+MAX_ANGLE = 1.0 # |angle| accepted from the dashboard
+
+
+def valid_command(speed, angle):
+    """
+    True for finite speed / angle within range. NaN must never reach the car:
+    max(-100, min(100, nan)) is 100, i.e. full throttle.
+    """
+    return (isinstance(speed, (int, float)) and isinstance(angle, (int, float))
+            and math.isfinite(speed) and math.isfinite(angle)
+            and abs(speed) <= MAX_SPEED and abs(angle) <= MAX_ANGLE)
+
+
+class ControlCommand(NamedTuple):
+    speed: float # -100..100 as sent by the dashboard (max_speed is applied when actuating)
+    angle: float # -1.0..1.0 (max_turn is applied when actuating)
+    client_id: str
+    seq: Optional[int]
+    recv_time: float # time.monotonic() when the command arrived
+
+
+class CommandMailbox:
+    def __init__(self, rate_hz=50.0, max_clients=32):
+        self.period = 1.0 / rate_hz # Minimum time between two actuations
+        self.max_clients = max_clients # Sequence numbers kept for this many recent clients
+        self.mailbox = LatestQueue(1)
+        self.lock = threading.Lock()
+        # Held while a command is checked against the mode and written to the car;
+        # /api/mode takes it around reset() + car.stop() so no older command lands after the stop
+        self.actuation_lock = threading.Lock()
+        self.last_seq = OrderedDict() # client_id -> last accepted seq, most recently active last
+        self.last_client = None # client_id of the most recently accepted command
+        self.stale = 0 # Commands rejected for an old seq
+        self.applied = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.mailbox = LatestQueue(1)
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.mailbox.close()
+        if self.thread:
+            self.thread.join()
+
+    def submit(self, speed, angle, client_id='', seq=None, recv_time=None):
+        """
+        Queues a command for the actuator, replacing any pending one.
+        Returns False if it is older than the last command from the same client.
+        Commands without a seq are always accepted.
+        Raises ValueError for non-finite or out of range values.
+        """
+        if not valid_command(speed, angle):
+            raise ValueError(f"Invalid command speed={speed!r} angle={angle!r}")
+        with self.lock:
+            if seq is not None:
+                last = self.last_seq.get(client_id)
+                if last is not None and seq <= last:
+                    self.stale += 1
+                    return False
+                self.last_seq[client_id] = seq
+                self.last_seq.move_to_end(client_id)
+                while len(self.last_seq) > self.max_clients:
+                    self.last_seq.popitem(last=False)
+            self.last_client = client_id
+        if recv_time is None:
+            recv_time = time.monotonic()
+        self.mailbox.put(ControlCommand(speed, angle, client_id, seq, recv_time))
+        return True
+
+    def stop_client(self, client_id):
+        """
+        Queues a stop if client_id sent the most recently accepted command,
+        i.e. it is the one driving (e.g. when its connection drops). Returns
+        True if it did. The stop carries the client's last seq, so its next
+        command is still accepted.
+        """
+        with self.lock:
+            if self.last_client != client_id:
+                return False
+            self.mailbox.put(ControlCommand(0, 0, client_id, self.last_seq.get(client_id), time.monotonic()))
+        return True
+
+    def reset(self):
+        """
+        Discards a pending command (e.g. on a mode change, with car.stop()
+        under actuation_lock).
+        """
+        self.mailbox.get_latest(timeout=0)
+
+    def _run(self):
+        while self.running:
+            command = self.mailbox.get_latest(timeout=1)
+            if command is None:
+                continue
+            start = time.monotonic()
+            try:
+                self._apply(command)
+            except Exception as e:
+                print(f"[Mailbox] Failed to apply command: {e}")
+            # Newer commands wait (and replace each other) until the next slot
+            remaining = self.period - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _apply(self, command):
+        with self.actuation_lock:
+            self._actuate(command)
+
+    def _actuate(self, command):
+        # The mode may have changed since the command was accepted
+        if state_machine.current_mode != CarMode.MANUAL:
+            return
+
+        # Apply Limits
+        # Max Speed reduces the effective output
+        effective_speed = command.speed * (state_machine.max_speed / 100.0)
+
+        # Max Turn reduces the effective angle
+        effective_angle = command.angle * (state_machine.max_turn / 100.0)
+
+        # Update Motion State
+        state_machine.update_motion_state(effective_speed, effective_angle)
+
+        # Drive Car
+        car.set_speed(effective_speed)
+        car.set_steering(effective_angle)
+        self.applied += 1
+        metrics.command_to_actuation.observe(time.monotonic() - command.recv_time)
+
+    def stats(self):
+        return {
+            'applied': self.applied,
+            'stale': self.stale,
+            'superseded': self.mailbox.dropped,
+        }
+
+# Global instance
+command_mailbox = CommandMailbox()
+metrics.gauge('control_commands_stale_total', "Manual commands rejected for an old sequence number",
+              lambda: command_mailbox.stale, kind='counter')
+metrics.gauge('control_commands_superseded_total', "Manual commands replaced in the mailbox before actuation",
+              lambda: command_mailbox.mailbox.dropped, kind='counter')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+WebSocket Control Channel
+Manual driving over one persistent WebSocket (/ws/control) instead of an HTTP
+POST per joystick update: no connection setup, headers or JSON per command,
+just a fixed-size binary frame each way.
+
+Dashboard -> car, 24 bytes, little endian:
+    seq       uint32   increasing per dashboard (shared with the HTTP fallback)
+    speed     float32  -100..100
+    angle     float32  -1.0..1.0
+    sent_ms   float64  dashboard clock (performance.now()) when sent
+    rtt_ms    float32  last round trip the dashboard measured, 0 = none yet
+
+Car -> dashboard, 13 bytes, sent as soon as the command is in the mailbox:
+    seq       uint32   of the acknowledged frame
+    sent_ms   float64  echoed, so the dashboard computes the round trip
+    status    uint8    ACCEPTED / STALE / NOT_MANUAL / BAD_FRAME (wrong size,
+                       non-finite or out of range values)
+
+Commands go into the same command_mailbox as /api/control. The route is only
+registered when flask-sock is installed; otherwise the dashboard stays on HTTP.
+"""
+
+import math
+import time
+import struct
+from command_mailbox import command_mailbox, valid_command
+from state_machine import state_machine, CarMode
+from metrics import metrics
+
+COMMAND = struct.Struct('<Iffdf')
+ACK = struct.Struct('<IdB')
+
+# Ack status
+ACCEPTED = 0
+STALE = 1
+NOT_MANUAL = 2
+BAD_FRAME = 3
+
+
+def encode_command(seq, speed, angle, sent_ms, rtt_ms=0.0):
+    return COMMAND.pack(seq, speed, angle, sent_ms, rtt_ms)
+
+def decode_ack(data):
+    return ACK.unpack(data)
+
+def handle_frame(data, client_id, recv_time=None):
+    """
+    Decodes one command frame, submits it and returns the ack frame.
+    """
+    if recv_time is None:
+        recv_time = time.monotonic()
+    if not isinstance(data, (bytes, bytearray)) or len(data) != COMMAND.size:
+        return ACK.pack(0, 0.0, BAD_FRAME)
+    seq, speed, angle, sent_ms, rtt_ms = COMMAND.unpack(data)
+    # float32 fields can carry NaN / inf; nothing out of range is submitted
+    if not valid_command(speed, angle) or not math.isfinite(sent_ms):
+        return ACK.pack(seq, 0.0, BAD_FRAME)
+    metrics.ws_commands.inc()
+    if math.isfinite(rtt_ms) and rtt_ms > 0:
+        metrics.control_rtt.observe(rtt_ms / 1000.0)
+
+    if state_machine.current_mode != CarMode.MANUAL:
+        status = NOT_MANUAL
+    elif command_mailbox.submit(speed, angle, client_id, seq, recv_time):
+        status = ACCEPTED
+    else:
+        status = STALE
+    return ACK.pack(seq, sent_ms, status)
+
+def serve(ws, client_id):
+    """
+    Runs one dashboard connection until it closes. Losing the connection
+    of the dashboard that is driving stops the car (it re-sends its state over
+    HTTP); a dashboard that only watched, or was overridden, stops nothing.
+    """
+    print(f"[Control] WebSocket client {client_id} connected")
+    try:
+        while True:
+            data = ws.receive()
+            ws.send(handle_frame(data, client_id, time.monotonic()))
+    finally:
+        print(f"[Control] WebSocket client {client_id} disconnected")
+        if state_machine.current_mode == CarMode.MANUAL:
+            command_mailbox.stop_client(client_id)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Control Scheduler
+One thread that runs registered control tasks at fixed rates.
+
+Every task has an absolute deadline on the monotonic clock that advances by
+exactly one period per tick, so the period does not drift with the time the
+task itself takes or with how late the thread woke up. If a tick runs past
+the next deadline (an overrun), the missed deadlines are skipped rather than
+run back to back, and counted.
+
+Per task the scheduler keeps the start jitter (wake-up time - deadline) and
+run time of the last ticks, exposed as percentiles through stats().
+
+A busy thread holding the GIL can still delay a tick by up to the
+interpreter's switch interval (5 ms). The scheduler leaves it alone: it is
+process-wide, so lowering it is up to the entry point (serve.py
+--switch-interval).
+
+Usage:
+    task = control_scheduler.add_task('navigator', 10.0, navigator._tick)
+    ...
+    task.cancel()
+"""
+
+import time
+import threading
+import numpy as np
+
+HISTORY = 1024 # Jitter / duration samples kept per task
+
+
+class ControlTask:
+    def __init__(self, name, rate_hz, callback):
+        self.name = name
+        self.period = 1.0 / rate_hz
+        self.callback = callback
+        self.deadline = time.monotonic()
+        self.active = True
+
+        self.ticks = 0
+        self.overruns = 0 # Ticks that ran past the next deadline
+        self.missed = 0 # Deadlines skipped because of overruns
+        self.errors = 0
+        self.jitter = np.zeros(HISTORY) # seconds late at start
+        self.duration = np.zeros(HISTORY) # seconds spent in the callback
+
+    def cancel(self):
+        """
+        Stops the task. Safe to call from inside its own callback.
+        """
+        self.active = False
+
+    def stats(self):
+        n = min(self.ticks, HISTORY)
+        stats = {
+            'rate_hz': round(1.0 / self.period, 2),
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'missed': self.missed,
+            'errors': self.errors,
+        }
+        if n:
+            p50, p95, p99 = (float(v) * 1000 for v in np.percentile(self.jitter[:n], (50, 95, 99)))
+            d50, d99 = (float(v) * 1000 for v in np.percentile(self.duration[:n], (50, 99)))
+            stats['jitter_ms'] = {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+                                  'max': round(float(self.jitter[:n].max()) * 1000, 3)}
+            stats['duration_ms'] = {'p50': round(d50, 3), 'p99': round(d99, 3)}
+        return stats
+
+
+class ControlScheduler:
+    def __init__(self):
+        self.tasks = []
+        self.finished = {} # name -> last stopped task, so its stats outlive it
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def add_task(self, name, rate_hz, callback):
+        """
+        Runs callback() every 1/rate_hz seconds, starting now.
+        The task stops when it is cancelled or the callback returns False.
+        """
+        task = ControlTask(name, rate_hz, callback)
+        with self.cond:
+            self.tasks.append(task)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run)
+                self.thread.daemon = True
+                self.thread.start()
+            self.cond.notify()
+        return task
+
+    def _run(self):
+        while True:
+            with self.cond:
+                for t in self.tasks:
+                    if not t.active:
+                        self.finished[t.name] = t
+                self.tasks = [t for t in self.tasks if t.active]
+                if not self.tasks:
+                    self.cond.wait()
+                    continue
+                task = min(self.tasks, key=lambda t: t.deadline)
+                delay = task.deadline - time.monotonic()
+                if delay > 0:
+                    # Woken early if a task with an earlier deadline is added
+                    self.cond.wait(delay)
+                    continue
+
+            self._run_task(task)
+
+    def _run_task(self, task):
+        if not task.active:
+            return
+        start = time.monotonic()
+        slot = task.ticks % HISTORY
+        task.jitter[slot] = start - task.deadline
+        try:
+            if task.callback() is False:
+                task.active = False
+        except Exception as e:
+            task.errors += 1
+            print(f"[ControlScheduler] Task {task.name} failed: {e}")
+        end = time.monotonic()
+        task.duration[slot] = end - start
+        task.ticks += 1
+
+        # Next deadline on the fixed grid; skip the ones we are already past
+        task.deadline += task.period
+        if end > task.deadline:
+            task.overruns += 1
+            skipped = int((end - task.deadline) / task.period) + 1
+            task.missed += skipped
+            task.deadline += skipped * task.period
+
+    def stats(self):
+        with self.cond:
+            tasks = list(self.finished.values()) + list(self.tasks)
+        stats = {}
+        for t in tasks:
+            stats[t.name] = t.stats()
+            stats[t.name]['active'] = t.active
+        return stats
+
+# Global instance
+control_scheduler = ControlScheduler()
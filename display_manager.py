@@ -1,57 +1,179 @@
-from RPLCD.i2c import CharLCD
 import time
 import socket
+import threading
 
 class DisplayManager:
-    def __init__(self, address=0x27, port=1, cols=16, rows=2):
+    """
+    16x2 LCD driven by one background thread.
+
+    Callers only change the framebuffer (set_line / flash) and return at once.
+    The render thread diffs each frame against what the LCD currently shows and
+    writes only the changed cells, so a ticking speed readout costs a few I2C
+    writes instead of a full clear + redraw.
+    """
+    def __init__(self, address=0x27, port=1, cols=16, rows=2, refresh_interval=0.25):
         self.lcd = None
         self.cols = cols
         self.rows = rows
+        self.refresh_interval = refresh_interval # seconds between live status refreshes
+
+        self.lines = [' ' * cols for _ in range(rows)] # Base content
+        self.overlay = None # (lines, until) shown instead of the base content for a while
+        self.shown = None # What the LCD shows right now, None = unknown (full redraw)
+        self.status_provider = None # Callable returning the base lines, polled every refresh
+        self.ip = None
+
+        self.cond = threading.Condition()
+        self.dirty = False
+        self.thread = None
+        self.lcd_args = dict(i2c_expander='PCF8574', address=address, port=port, cols=cols, rows=rows, charmap='A00')
+
+    def init_hardware(self):
+        """
+        Opens the LCD over I2C and starts the render thread. Run once at startup
+        (see subsystems.py); returns None, or why the display is unavailable.
+        Lines set before this are shown as soon as it succeeds.
+        """
+        if self.thread is not None:
+            return None
         try:
-            self.lcd = CharLCD(i2c_expander='PCF8574', address=address, port=port, cols=cols, rows=rows, charmap='A00')
-            self.lcd.backlight_enabled = True # User requested backlight ON
-            self.clear()
-            self.write_line("Display Init", 0)
+            from RPLCD.i2c import CharLCD
+            self.lcd = CharLCD(**self.lcd_args)
+            self.lcd.backlight_enabled = True # User requested backlight ON (set once, not per write)
+            self.lcd.clear()
+            self.shown = [' ' * self.cols for _ in range(self.rows)]
+            self.set_line("Display Init", 0)
             print("LCD Initialized successfully")
         except Exception as e:
             print(f"LCD Initialization failed (might not be connected): {e}")
+            self.lcd = None
+            return f"LCD not available: {e}"
 
-    def clear(self):
-        if self.lcd:
-            try:
-                self.lcd.clear()
-                self.lcd.backlight_enabled = True # Force ON
-            except Exception:
-                pass
+        self.thread = threading.Thread(target=self._render_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        return None
+
+    # --- Non-blocking API ---
+
+    def _fit(self, text):
+        return str(text)[:self.cols].ljust(self.cols)
+
+    def set_line(self, text, row=0):
+        with self.cond:
+            self.lines[row] = self._fit(text)
+            self.dirty = True
+            self.cond.notify()
 
     def write_line(self, text, row=0):
-        if self.lcd:
-            try:
-                # Ensure text fits
-                text = text[:self.cols]
-                self.lcd.cursor_pos = (row, 0)
-                self.lcd.write_string(text)
-                self.lcd.backlight_enabled = True # Force ON
-            except Exception:
-                pass
+        self.set_line(text, row)
+
+    def clear(self):
+        with self.cond:
+            self.lines = [' ' * self.cols for _ in range(self.rows)]
+            self.dirty = True
+            self.cond.notify()
+
+    def flash(self, lines, seconds):
+        """
+        Shows `lines` for `seconds`, then goes back to the base content.
+        """
+        with self.cond:
+            self.overlay = ([self._fit(line) for line in lines] + [' ' * self.cols] * self.rows)[:self.rows], \
+                time.monotonic() + seconds
+            self.dirty = True
+            self.cond.notify()
+
+    def set_status_provider(self, provider):
+        """
+        provider() -> list of lines, polled every refresh_interval while no overlay is shown.
+        """
+        with self.cond:
+            self.status_provider = provider
+            self.cond.notify()
+
+    # --- Render thread ---
+
+    def _frame(self):
+        """
+        The frame to show now. Caller holds the lock.
+        """
+        if self.overlay is not None:
+            lines, until = self.overlay
+            if time.monotonic() < until:
+                return lines
+            self.overlay = None
+        return list(self.lines)
+
+    def _render_loop(self):
+        while True:
+            with self.cond:
+                if not self.dirty:
+                    timeout = self.refresh_interval if (self.status_provider or self.overlay) else None
+                    self.cond.wait(timeout)
+                self.dirty = False
+                if self.overlay is not None and time.monotonic() >= self.overlay[1]:
+                    self.overlay = None
+                provider = self.status_provider if self.overlay is None else None
+
+            if provider is not None:
+                try:
+                    lines = provider()
+                    with self.cond:
+                        for row, text in enumerate(lines[:self.rows]):
+                            self.lines[row] = self._fit(text)
+                except Exception as e:
+                    print(f"[Display] Status provider failed: {e}")
+
+            with self.cond:
+                frame = self._frame()
+            self._draw(frame)
+
+    def _draw(self, frame):
+        """
+        Writes the cells that differ from what is shown, one run per changed span.
+        """
+        try:
+            for row, text in enumerate(frame):
+                old = self.shown[row] if self.shown else None
+                col = 0
+                while col < self.cols:
+                    if old is not None and old[col] == text[col]:
+                        col += 1
+                        continue
+                    end = col + 1
+                    while end < self.cols and (old is None or old[end] != text[end]):
+                        end += 1
+                    self.lcd.cursor_pos = (row, col)
+                    self.lcd.write_string(text[col:end])
+                    col = end
+            self.shown = frame
+        except Exception as e:
+            print(f"[Display] Write failed: {e}")
+            self.shown = None # Redraw everything next time
+            time.sleep(1)
+
+    # --- Startup screen ---
 
     def display_ip(self):
-        if not self.lcd:
-            return
-        
+        """
+        Shows the WiFi SSID for a few seconds, then the IP address.
+        Returns immediately; the lookups run on a helper thread. Safe to call
+        before the LCD is up (the framebuffer is drawn once it is).
+        """
+        thread = threading.Thread(target=self._show_network)
+        thread.daemon = True
+        thread.start()
+
+    def _show_network(self):
         # 1. Show Connection Status briefly
         try:
             # Try to get SSID (works on Linux/Pi)
             import subprocess
-            ssid = subprocess.check_output(['iwgetid', '-r']).decode('utf-8').strip()
-            self.clear()
-            self.write_line("WiFi Connected!", 0)
-            self.write_line(f"SSID: {ssid}", 1)
-            time.sleep(3) # Show for 3 seconds
+            ssid = subprocess.check_output(['iwgetid', '-r'], timeout=2).decode('utf-8').strip()
+            self.flash(["WiFi Connected!", f"SSID: {ssid}"], 3)
         except Exception:
-            self.clear()
-            self.write_line("WiFi Connected!", 0)
-            time.sleep(2)
+            self.flash(["WiFi Connected!"], 2)
 
         # 2. Get IP
         ip = "No IP"
@@ -62,11 +184,11 @@ class DisplayManager:
             s.close()
         except Exception:
             pass
-            
-        # 3. Show IP Continuously
-        self.clear()
-        self.write_line("Status: Running", 0)
-        self.write_line(f"IP:{ip}", 1)
+        self.ip = ip
+
+        # 3. Show IP Continuously (unless a status provider takes over the base lines)
+        self.set_line("Status: Running", 0)
+        self.set_line(f"IP:{ip}", 1)
 
 # Global instance
 display_manager = DisplayManager()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Position Estimator
+Extended Kalman Filter that fuses ~1 Hz GPS fixes with the commanded speed
+and steering from CarController, so the navigator gets a fresh position and
+heading every control tick instead of a fix that can be a second old.
+
+State (local flat frame around the first fix, like simulator.Simulator):
+    x, y     meters East / North
+    heading  radians clockwise from North
+    v        m/s along the heading
+
+Prediction is the kinematic bicycle model (vehicle_model.py) driven by the last
+motor / steering commands; each new fix corrects position, plus speed and
+course when the receiver reports them.
+"""
+
+import math
+import time
+import threading
+from typing import NamedTuple
+import numpy as np
+import geodesy
+from vehicle_model import BicycleModel
+from control_scheduler import control_scheduler
+from gps_reader import gps_reader
+from car_controller import car
+
+
+class Estimate(NamedTuple):
+    """
+    Duck-compatible with GPSFix for the fields the navigator uses.
+    """
+    lat: float
+    lng: float
+    heading: float # degrees
+    speed: float # km/h
+    time: float # time.monotonic() the estimate is valid for
+    fix_seq: int # GPSFix.seq of the last fix fused in
+    position_std: float # meters, 1-sigma
+
+
+class PositionEstimator:
+    def __init__(self, model=None, rate_hz=10.0):
+        self.model = model or BicycleModel() # Only its parameters are used
+        self.rate_hz = rate_hz
+        self.task = None
+
+        # Measurement noise (1-sigma)
+        self.gps_position_std = 2.5 # meters
+        self.gps_speed_std = 0.3 # m/s
+        self.gps_heading_std = math.radians(10.0)
+        self.min_course_speed = 1.5 # km/h, below this the receiver's course is held, not measured
+
+        # Process noise (1-sigma growth per sqrt(second))
+        self.position_noise = 0.3 # meters
+        self.heading_noise = math.radians(15.0)
+        self.speed_noise = 0.5 # m/s
+
+        self.lock = threading.Lock()
+        self.origin = None
+        self.m_per_deg_lat = math.pi * geodesy.EARTH_RADIUS / 180.0
+        self.m_per_deg_lng = self.m_per_deg_lat
+        self.x = np.zeros(4)
+        self.P = np.eye(4)
+        self.state_time = 0.0
+        self.last_seq = 0
+        self.estimate = None # Latest published Estimate
+
+    def reset(self):
+        with self.lock:
+            self.origin = None
+            self.last_seq = 0
+            self.estimate = None
+
+    # --- Filter ---
+
+    def _initialize(self, fix, now):
+        self.origin = (fix.lat, fix.lng)
+        self.m_per_deg_lng = self.m_per_deg_lat * math.cos(math.radians(fix.lat))
+        self.x = np.array([0.0, 0.0, math.radians(fix.heading), fix.speed / 3.6])
+        self.P = np.diag([self.gps_position_std ** 2, self.gps_position_std ** 2,
+                          math.radians(45.0) ** 2, 1.0])
+        self.state_time = now
+
+    def predict(self, speed_cmd, steering_cmd, dt):
+        """
+        Advances the state dt seconds with the bicycle model under the given commands.
+        """
+        if dt <= 0:
+            return
+        m = self.model
+        px, py, h, v = self.x
+        target_v = max(-100, min(100, speed_cmd)) / 100.0 * m.max_speed_mps
+        a = min(1.0, dt / m.speed_tau)
+        v1 = v + (target_v - v) * a
+        k = math.tan(max(-1.0, min(1.0, steering_cmd)) * m.max_steer) / m.wheelbase # yaw rate per m/s
+        sin_h, cos_h = math.sin(h), math.cos(h)
+
+        self.x = np.array([px + v1 * sin_h * dt, py + v1 * cos_h * dt, h + v1 * k * dt, v1])
+
+        # Jacobian of the update above
+        F = np.eye(4)
+        F[0, 2] = v1 * cos_h * dt
+        F[0, 3] = (1 - a) * sin_h * dt
+        F[1, 2] = -v1 * sin_h * dt
+        F[1, 3] = (1 - a) * cos_h * dt
+        F[2, 3] = (1 - a) * k * dt
+        F[3, 3] = 1 - a
+        Q = np.diag([self.position_noise ** 2, self.position_noise ** 2,
+                     self.heading_noise ** 2, self.speed_noise ** 2]) * dt
+        self.P = F @ self.P @ F.T + Q
+
+    def update(self, fix):
+        """
+        Corrects the state with a GPS fix (position, plus speed / course when moving).
+        """
+        zx = (fix.lng - self.origin[1]) * self.m_per_deg_lng
+        zy = (fix.lat - self.origin[0]) * self.m_per_deg_lat
+        rows = [[1, 0, 0, 0], [0, 1, 0, 0]]
+        residual = [zx - self.x[0], zy - self.x[1]]
+        noise = [self.gps_position_std ** 2, self.gps_position_std ** 2]
+
+        if self.x[3] >= 0:
+            if fix.speed >= self.min_course_speed:
+                # Course over ground only means something while moving
+                rows.append([0, 0, 1, 0])
+                residual.append((math.radians(fix.heading) - self.x[2] + math.pi) % (2 * math.pi) - math.pi)
+                noise.append(self.gps_heading_std ** 2)
+            # Ground speed (unsigned, so only while not reversing)
+            rows.append([0, 0, 0, 1])
+            residual.append(fix.speed / 3.6 - self.x[3])
+            noise.append(self.gps_speed_std ** 2)
+
+        H = np.array(rows, dtype=float)
+        S = H @ self.P @ H.T + np.diag(noise)
+        K = self.P @ H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ np.array(residual)
+        self.x[2] %= 2 * math.pi
+        self.P = (np.eye(4) - K @ H) @ self.P
+
+    def step(self, now, fix, speed_cmd, steering_cmd):
+        """
+        One filter step at monotonic time `now`: fuses `fix` if it is new,
+        predicts up to `now` and publishes the estimate. Returns the Estimate
+        or None before the first fix.
+        """
+        with self.lock:
+            if fix.seq != self.last_seq and fix.lat != 0:
+                if self.origin is None:
+                    self._initialize(fix, fix.recv_time)
+                else:
+                    # Bring the state up to when the fix was read, then correct
+                    self.predict(speed_cmd, steering_cmd, fix.recv_time - self.state_time)
+                    self.state_time = max(self.state_time, fix.recv_time)
+                    self.update(fix)
+                self.last_seq = fix.seq
+            if self.origin is None:
+                return None
+
+            self.predict(speed_cmd, steering_cmd, now - self.state_time)
+            self.state_time = max(self.state_time, now)
+
+            px, py, h, v = self.x.tolist()
+            self.estimate = Estimate(
+                self.origin[0] + py / self.m_per_deg_lat,
+                self.origin[1] + px / self.m_per_deg_lng,
+                math.degrees(h) % 360,
+                abs(v) * 3.6,
+                self.state_time,
+                self.last_seq,
+                math.sqrt(max(self.P[0, 0], self.P[1, 1], 0.0)),
+            )
+            return self.estimate
+
+    # --- Live operation ---
+
+    def start(self):
+        """
+        Runs the filter at rate_hz on the control scheduler against the live
+        GPSReader and CarController.
+        """
+        if self.task is not None:
+            return
+        self.task = control_scheduler.add_task('estimator', self.rate_hz, self._tick)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def _tick(self):
+        self.step(time.monotonic(), gps_reader.get_fix(), car.current_speed, car.current_steering)
+
+    def get_estimate(self):
+        return self.estimate
+
+# Global instance
+estimator = PositionEstimator()
@@ -0,0 +1,122 @@
+import math
+import numpy as np
+
+EARTH_RADIUS = 6371000 # Radius of Earth in meters
+
+# --- Scalar versions (cheapest for a single point per control tick) ---
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi/2)**2 + \
+        math.cos(phi1) * math.cos(phi2) * \
+        math.sin(delta_lambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return EARTH_RADIUS * c
+
+def calculate_bearing(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    y = math.sin(delta_lambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - \
+        math.sin(phi1) * math.cos(phi2) * math.cos(delta_lambda)
+
+    theta = math.atan2(y, x)
+    bearing = (math.degrees(theta) + 360) % 360
+    return bearing
+
+def get_cross_track_error(start_lat, start_lng, end_lat, end_lng, curr_lat, curr_lng):
+    """
+    Calculates Cross-Track Error (distance from the line start->end).
+    Returns distance in meters. Positive = Right of line, Negative = Left.
+    """
+    # Distance from Start to Current
+    dist_13 = haversine_distance(start_lat, start_lng, curr_lat, curr_lng)
+
+    # Bearing from Start to End (Path Bearing)
+    bearing_12 = calculate_bearing(start_lat, start_lng, end_lat, end_lng)
+
+    # Bearing from Start to Current
+    bearing_13 = calculate_bearing(start_lat, start_lng, curr_lat, curr_lng)
+
+    # Angle Difference
+    diff = math.radians(bearing_13 - bearing_12)
+
+    # XTE Formula (approximate for small distances, or precise spherical)
+    # XTE = asin(sin(dist_13/R) * sin(diff)) * R
+    # Since distances are small compared to Earth radius, simpler formula:
+    # XTE = dist_13 * math.sin(diff)
+    return dist_13 * math.sin(diff)
+
+# --- Vectorized versions (array in / array out, NumPy broadcasting rules) ---
+
+def haversine_distances(lat1, lon1, lat2, lon2):
+    """
+    Same as haversine_distance() for arrays, e.g. the distance from the car
+    to every route vertex: haversine_distances(lat, lng, route_lats, route_lngs)
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(delta_phi/2)**2 + \
+        np.cos(phi1) * np.cos(phi2) * \
+        np.sin(delta_lambda/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return EARTH_RADIUS * c
+
+def calculate_bearings(lat1, lon1, lat2, lon2):
+    """
+    Same as calculate_bearing() for arrays. Returns degrees in [0, 360).
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+
+    y = np.sin(delta_lambda) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - \
+        np.sin(phi1) * np.cos(phi2) * np.cos(delta_lambda)
+
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+def cross_track_errors(start_lat, start_lng, end_lat, end_lng, curr_lat, curr_lng):
+    """
+    Same as get_cross_track_error() for arrays (Positive = Right, Negative = Left).
+    """
+    dist_13 = haversine_distances(start_lat, start_lng, curr_lat, curr_lng)
+    bearing_12 = calculate_bearings(start_lat, start_lng, end_lat, end_lng)
+    bearing_13 = calculate_bearings(start_lat, start_lng, curr_lat, curr_lng)
+
+    return dist_13 * np.sin(np.radians(bearing_13 - bearing_12))
+
+def polyline_segment_lengths(lats, lngs):
+    """
+    Length in meters of every segment of a polyline (n points -> n-1 lengths).
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    return haversine_distances(lats[:-1], lngs[:-1], lats[1:], lngs[1:])
+
+def polyline_bearings(lats, lngs):
+    """
+    Initial bearing of every segment of a polyline (n points -> n-1 bearings).
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    return calculate_bearings(lats[:-1], lngs[:-1], lats[1:], lngs[1:])
+
+def polyline_cross_track_errors(lats, lngs, curr_lat, curr_lng):
+    """
+    Cross-track error of one position against every segment of a polyline.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    return cross_track_errors(lats[:-1], lngs[:-1], lats[1:], lngs[1:], curr_lat, curr_lng)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+GPS Receiver Configuration
+Startup negotiation that moves the receiver from its factory 9600 baud / 1 Hz
+to the profile in gps_profile.json (default 115200 baud, 10 Hz, GGA + RMC only).
+
+    1. Find the baud rate the receiver is talking at (valid NMEA checksums).
+    2. Detect the chipset: u-blox answers a UBX-MON-VER poll, MediaTek a PMTK605 query.
+    3. Turn off unused sentences and set the update rate at the old baud rate.
+    4. Switch the receiver's baud rate, reopen the port and check fixes still arrive.
+
+9600 baud is ~960 bytes/s; one GGA + RMC epoch is ~150 bytes, so anything
+above ~5 Hz needs the faster link.
+
+Usage:
+    python gps_config.py [--port /dev/serial0] [--profile gps_profile.json]
+"""
+
+import os
+import json
+import time
+import struct
+import serial
+import nmea_parser
+
+DEFAULT_PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gps_profile.json')
+
+DEFAULT_PROFILE = {
+    'enabled': True,
+    'baudrate': 115200,
+    'rate_hz': 10,
+    'sentences': ['GGA', 'RMC'], # Everything else is switched off
+    'probe_baudrates': [9600, 115200, 38400, 57600, 19200, 4800],
+    'persist': False, # u-blox: also save to flash / battery-backed RAM
+}
+
+EPOCH_BYTES = 150 # GGA + RMC, with margin
+
+# u-blox NMEA message ids (class 0xF0)
+UBX_NMEA_IDS = {'GGA': 0x00, 'GLL': 0x01, 'GSA': 0x02, 'GSV': 0x03, 'RMC': 0x04, 'VTG': 0x05, 'ZDA': 0x08}
+# Field positions in PMTK314 (19 fields, the rest are reserved)
+MTK_SENTENCE_FIELDS = {'GLL': 0, 'RMC': 1, 'VTG': 2, 'GGA': 3, 'GSA': 4, 'GSV': 5, 'ZDA': 17}
+
+
+def load_profile(path=DEFAULT_PROFILE_FILE):
+    profile = dict(DEFAULT_PROFILE)
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            profile.update(json.load(f))
+    return profile
+
+# --- Message builders ---
+
+def ubx_message(msg_class, msg_id, payload=b''):
+    """
+    UBX frame: sync chars, class, id, little endian length, payload, Fletcher-8 checksum.
+    """
+    body = struct.pack('<BBH', msg_class, msg_id, len(payload)) + payload
+    ck_a = ck_b = 0
+    for b in body:
+        ck_a = (ck_a + b) & 0xFF
+        ck_b = (ck_b + ck_a) & 0xFF
+    return b'\xb5\x62' + body + bytes((ck_a, ck_b))
+
+def nmea_command(body):
+    c = 0
+    for b in body.encode('ascii'):
+        c ^= b
+    return f"${body}*{c:02X}\r\n".encode('ascii')
+
+def ubx_set_message_rate(sentence, rate):
+    # UBX-CFG-MSG, rate on the current port (1 = every epoch, 0 = off)
+    return ubx_message(0x06, 0x01, bytes((0xF0, UBX_NMEA_IDS[sentence], rate)))
+
+def ubx_set_rate(rate_hz):
+    # UBX-CFG-RATE: measurement period (ms), navigation cycles per measurement, time reference (1 = GPS)
+    return ubx_message(0x06, 0x08, struct.pack('<HHH', int(round(1000 / rate_hz)), 1, 1))
+
+def ubx_set_baudrate(baudrate):
+    # UBX-CFG-PRT for UART1: 8N1, UBX + NMEA (+ RTCM) in, UBX + NMEA out
+    return ubx_message(0x06, 0x00, struct.pack('<BBHIIHHHH', 1, 0, 0, 0x000008D0, baudrate, 0x0007, 0x0003, 0, 0))
+
+def ubx_save_config():
+    # UBX-CFG-CFG: save io port, message and navigation config to every non-volatile device
+    return ubx_message(0x06, 0x09, struct.pack('<IIIB', 0, 0x0000001F, 0, 0x17))
+
+def mtk_set_sentences(sentences):
+    fields = [0] * 19
+    for name in sentences:
+        if name in MTK_SENTENCE_FIELDS:
+            fields[MTK_SENTENCE_FIELDS[name]] = 1
+    return nmea_command('PMTK314,' + ','.join(str(v) for v in fields))
+
+def mtk_set_rate(rate_hz):
+    return nmea_command(f"PMTK220,{int(round(1000 / rate_hz))}")
+
+def mtk_set_baudrate(baudrate):
+    return nmea_command(f"PMTK251,{baudrate}")
+
+# --- Serial helpers ---
+
+def _read_for(ser, seconds, until=None):
+    """
+    Everything the receiver sends within `seconds`, or up to the first `until`.
+    """
+    data = b''
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        chunk = ser.read(ser.in_waiting or 1)
+        if chunk:
+            data += chunk
+            if until is not None and until in data:
+                break
+    return data
+
+def _nmea_lines(data):
+    return [line for line in data.split(b'\n')
+            if line.startswith(b'$') and b'*' in line and nmea_parser.checksum_ok(line.strip())]
+
+def find_baudrate(port, baudrates, listen=1.5):
+    """
+    First baud rate at which the port yields valid NMEA sentences, or None.
+    """
+    for baudrate in baudrates:
+        with serial.Serial(port, baudrate, timeout=0.1) as ser:
+            ser.reset_input_buffer()
+            if len(_nmea_lines(_read_for(ser, listen))) >= 2:
+                return baudrate
+    return None
+
+def detect_receiver(ser, listen=1.0):
+    """
+    Returns 'ublox', 'mtk' or 'nmea' (unknown chipset, leave it alone).
+    """
+    ser.reset_input_buffer()
+    ser.write(ubx_message(0x0A, 0x04)) # UBX-MON-VER poll
+    reply = b'\xb5\x62\x0a\x04'
+    if reply in _read_for(ser, listen, reply):
+        return 'ublox'
+    ser.reset_input_buffer()
+    ser.write(nmea_command('PMTK605')) # Query firmware release
+    reply = b'$PMTK705'
+    if reply in _read_for(ser, listen, reply):
+        return 'mtk'
+    return 'nmea'
+
+def _ubx_acked(ser, msg_class, msg_id, timeout=1.0):
+    # UBX-ACK-ACK carries the class / id of the acknowledged message
+    ack = b'\xb5\x62\x05\x01\x02\x00' + bytes((msg_class, msg_id))
+    return ack in _read_for(ser, timeout, ack)
+
+def _mtk_acked(ser, command, timeout=1.0):
+    """
+    True if the receiver answers PMTK<command> with PMTK001,<command>,3 (valid, succeeded).
+    """
+    prefix = f"$PMTK001,{command},".encode('ascii')
+    data = b''
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        data += _read_for(ser, end - time.monotonic(), b'\n')
+        for line in _nmea_lines(data):
+            line = line.strip()
+            if line.startswith(prefix):
+                return line[len(prefix):].split(b'*')[0] == b'3'
+    return False
+
+def configure_ublox(ser, profile):
+    """
+    Returns None, or why the profile is only partly applied.
+    """
+    problem = None
+    for name in UBX_NMEA_IDS:
+        ser.write(ubx_set_message_rate(name, 1 if name in profile['sentences'] else 0))
+        if not _ubx_acked(ser, 0x06, 0x01):
+            print(f"[GPSConfig] No ACK disabling/enabling {name}")
+    ser.write(ubx_set_rate(profile['rate_hz']))
+    if not _ubx_acked(ser, 0x06, 0x08):
+        print("[GPSConfig] No ACK for update rate")
+        problem = "no ACK for the update rate"
+    if profile.get('persist'):
+        ser.write(ubx_save_config())
+        _ubx_acked(ser, 0x06, 0x09)
+    # Last: the ACK for this one may already be sent at the new rate
+    ser.write(ubx_set_baudrate(profile['baudrate']))
+    ser.flush()
+    return problem
+
+def configure_mtk(ser, profile):
+    """
+    Sentences and baud rate; the update rate follows in negotiate() at the new baud rate.
+    """
+    ser.write(mtk_set_sentences(profile['sentences']))
+    if not _mtk_acked(ser, 314, 0.3):
+        print("[GPSConfig] No ACK for the sentence selection")
+    ser.write(mtk_set_baudrate(profile['baudrate']))
+    ser.flush()
+    time.sleep(0.2)
+    return None
+
+def negotiate(port, profile=None):
+    """
+    Brings the receiver on `port` to the profile's baud rate and update rate.
+    Returns (baud rate to open the port at, None or why the profile is not fully
+    applied). The baud rate is None if no receiver answered.
+    """
+    profile = profile or load_profile()
+    target = profile['baudrate']
+    start = time.monotonic()
+
+    current = find_baudrate(port, profile['probe_baudrates'])
+    if current is None:
+        print(f"[GPSConfig] No NMEA on {port}")
+        return None, f"no NMEA on {port}"
+
+    with serial.Serial(port, current, timeout=0.1) as ser:
+        kind = detect_receiver(ser)
+        print(f"[GPSConfig] {kind} receiver at {current} baud")
+        if kind == 'nmea':
+            return current, f"unknown receiver left at {current} baud"
+        if kind == 'ublox':
+            problem = configure_ublox(ser, profile)
+        else:
+            problem = configure_mtk(ser, profile)
+
+    # Reopen at the new rate and make sure the receiver followed
+    with serial.Serial(port, target, timeout=0.1) as ser:
+        time.sleep(0.1)
+        if kind == 'mtk':
+            ser.write(mtk_set_rate(profile['rate_hz'])) # Only possible once the link is fast enough
+            if not _mtk_acked(ser, 220):
+                print("[GPSConfig] No ACK for update rate")
+                problem = "no ACK for the update rate"
+        lines = _nmea_lines(_read_for(ser, 1.5))
+        if len(lines) < 2:
+            print(f"[GPSConfig] Receiver silent at {target} baud, staying at {current}")
+            return find_baudrate(port, [current, target]), f"receiver silent at {target} baud"
+
+    if profile['rate_hz'] * EPOCH_BYTES > target / 10 * 0.8:
+        print(f"[GPSConfig] Warning: {profile['rate_hz']} Hz may not fit in {target} baud")
+    print(f"[GPSConfig] {kind} set to {target} baud, {profile['rate_hz']} Hz in {time.monotonic() - start:.1f}s")
+    return target, problem
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Configure the GPS receiver")
+    parser.add_argument('--port', default='/dev/serial0')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE_FILE)
+    args = parser.parse_args()
+    baudrate, problem = negotiate(args.port, load_profile(args.profile))
+    print(f"Baud rate: {baudrate}" + (f" ({problem})" if problem else ""))
@@ -1,98 +1,327 @@
 import serial
 import time
 import threading
-import pynmea2
+import nmea_parser
+import gps_config
+from typing import NamedTuple, Optional
 from map_matcher import map_matcher
+from pipeline import LatestQueue
+from telemetry import telemetry, GPS_ERROR
+from trip_recorder import trip_recorder
+from metrics import metrics
+
+# GPS_ERROR telemetry stages
+READ_ERROR = 1
+PARSE_ERROR = 2
+
+class GPSFix(NamedTuple):
+    """
+    One published GPS fix. Immutable, so a reader always sees lat/lng/heading/speed
+    from the same fix; GPSReader swaps in a whole new record on every update.
+    """
+    lat: float
+    lng: float
+    heading: float # degrees, held while stationary
+    speed: float # km/h
+    fix_time: Optional[float] # UTC seconds of day reported by the receiver
+    recv_time: float # time.monotonic() when the sentence was read from the port
+    seq: int # increments once per new fix (epoch)
+    snapped_lat: Optional[float] = None
+    snapped_lng: Optional[float] = None
+
+NO_FIX = GPSFix(0.0, 0.0, 0.0, 0.0, None, 0.0, 0)
+
 
 class GPSReader:
-    def __init__(self, port='/dev/serial0', baudrate=9600):
+    """
+    Three stage pipeline so the serial port is always drained on time:
+
+        _read_loop  --(parse_queue)-->  _parse_loop  --(match_queue)-->  _match_loop
+
+    The raw fix is published by the parse stage as soon as a sentence is decoded.
+    Map matching runs on its own thread and only ever sees the latest fix, so a
+    slow matcher can never delay readline() or the fix the navigator consumes.
+
+    Fixes are published as immutable GPSFix records by swapping `self.fix`, so
+    readers never need a lock. Writers (parse and match stages) serialize on
+    `publish_lock` so a late map match cannot overwrite a newer fix.
+    """
+    def __init__(self, port='/dev/serial0', baudrate=9600, parse_queue_size=16, serial_factory=None,
+                 profile_file=gps_config.DEFAULT_PROFILE_FILE):
         self.port = port
-        self.baudrate = baudrate
-        self.current_location = {'lat': 0.0, 'lng': 0.0, 'heading': 0.0, 'speed': 0.0}
+        self.baudrate = baudrate # Used when the receiver is not (re)configured
+        self.profile_file = profile_file # Receiver profile negotiated at startup (None = skip)
+        # Optional callable returning a readline() source instead of the real port
+        # (see replay.NmeaReplaySource and simulator.SimulatedSerial)
+        self.serial_factory = serial_factory
+        self.fix = NO_FIX
+        self.publish_lock = threading.Lock()
+        self.new_fix = threading.Condition(self.publish_lock) # notified once per new seq
         self.running = False
-        self.thread = None
+        self.threads = []
+        self.port_ready = threading.Event() # Set once the port is open (or failed to open)
+        self.port_error = None
+        self.config_problem = None # Why the receiver profile is not (fully) applied
+
+        # Bounded, latest-wins hand-off between the stages
+        self.parse_queue_size = parse_queue_size
+        self.parse_queue = LatestQueue(parse_queue_size)
+        self.match_queue = LatestQueue(1)
 
     def start(self):
         if self.running:
             return
         self.running = True
-        self.thread = threading.Thread(target=self._read_loop)
-        self.thread.daemon = True
-        self.thread.start()
+        self.port_ready.clear()
+        self.port_error = None
+        self.config_problem = None
+        self.parse_queue = LatestQueue(self.parse_queue_size)
+        self.match_queue = LatestQueue(1)
+        self.threads = []
+        for target in (self._read_loop, self._parse_loop, self._match_loop):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
 
     def stop(self):
         self.running = False
-        if self.thread:
-            self.thread.join()
+        self.parse_queue.close()
+        self.match_queue.close()
+        for thread in self.threads:
+            thread.join()
 
     def _read_loop(self):
         try:
-            ser = serial.Serial(self.port, self.baudrate, timeout=1)
-            print(f"Connected to GPS on {self.port}")
+            if self.serial_factory:
+                ser = self.serial_factory()
+                print(f"Reading GPS from {ser}")
+            else:
+                baudrate = self._configure_receiver()
+                ser = serial.Serial(self.port, baudrate, timeout=1)
+                print(f"Connected to GPS on {self.port} at {baudrate} baud")
         except Exception as e:
             print(f"Error connecting to GPS: {e}")
+            self.port_error = str(e)
+            self.port_ready.set()
             return
+        self.port_ready.set()
 
+        # Only readline() here - everything else happens downstream
         while self.running:
             try:
-                line = ser.readline().decode('utf-8', errors='ignore')
-                if line.startswith('$GPGGA') or line.startswith('$GNGGA'):
-                    try:
-                        msg = pynmea2.parse(line)
-                        if msg.latitude and msg.longitude:
-                            lat = msg.latitude
-                            lng = msg.longitude
-                            
-                            # Attempt Map Matching
-                            snapped = map_matcher.match_to_road(lat, lng)
-                            if snapped:
-                                lat, lng = snapped
-                            
-                            self.current_location['lat'] = lat
-                            self.current_location['lng'] = lng
-                    except pynmea2.ParseError:
-                        continue
-                elif line.startswith('$GPRMC') or line.startswith('$GNRMC'):
-                    try:
-                        msg = pynmea2.parse(line)
-                        if msg.latitude and msg.longitude:
-                             lat = msg.latitude
-                             lng = msg.longitude
-                             
-                             # Attempt Map Matching
-                             snapped = map_matcher.match_to_road(lat, lng)
-                             if snapped:
-                                 lat, lng = snapped
-                                 
-                             self.current_location['lat'] = lat
-                             self.current_location['lng'] = lng
-                        
-                        # Extract Heading (True Course) and Speed
-                        speed_knots = 0.0
-                        if hasattr(msg, 'spd_over_grnd') and msg.spd_over_grnd is not None:
-                             speed_knots = float(msg.spd_over_grnd)
-                             self.current_location['speed'] = speed_knots * 1.852 # Convert Knots to km/h
-                        
-                        # Heading Hold Logic
-                        # Only update heading if we have significant speed (> 0.5 knot approx 0.25 m/s)
-                        # This prevents "spinning" when stopped due to GPS noise.
-                        if hasattr(msg, 'true_course') and msg.true_course is not None:
-                            heading = float(msg.true_course)
-                            if speed_knots > 0.1: # Reduced from 0.5 for testing
-                                self.current_location['heading'] = heading
-                            # Else: Keep previous heading (Heading Hold)
-                        else:
-                            # If no course data, keep previous
-                            pass
-                        
-                    except pynmea2.ParseError:
-                        continue
+                line = ser.readline()
+                if line:
+                    self.parse_queue.put((line, time.monotonic()))
+                    metrics.gps_lines.inc()
             except Exception as e:
-                print(f"Error reading GPS: {e}")
+                telemetry.record(GPS_ERROR, READ_ERROR, note=e)
+                metrics.gps_errors.inc()
                 time.sleep(1)
 
+    def _configure_receiver(self):
+        """
+        Switches the receiver to the profile's baud / update rate (gps_config.py).
+        Returns the baud rate to open the port at.
+        """
+        self.config_problem = None
+        if not self.profile_file:
+            return self.baudrate
+        profile = gps_config.load_profile(self.profile_file)
+        if not profile.get('enabled'):
+            return self.baudrate
+        try:
+            baudrate, self.config_problem = gps_config.negotiate(self.port, profile)
+            return baudrate or self.baudrate
+        except Exception as e:
+            print(f"[GPSConfig] Receiver configuration failed: {e}")
+            self.config_problem = f"receiver configuration failed: {e}"
+            return self.baudrate
+
+    def _parse_loop(self):
+        while self.running:
+            item = self.parse_queue.get(timeout=1)
+            if item is None:
+                continue
+            line, recv_time = item
+            try:
+                self.process_line(line, recv_time)
+            except Exception as e:
+                telemetry.record(GPS_ERROR, PARSE_ERROR, note=e)
+                metrics.gps_errors.inc()
+
+    def _match_loop(self):
+        while self.running:
+            fix = self.match_queue.get_latest(timeout=1)
+            if fix is None:
+                continue
+            snapped = map_matcher.match_to_road(fix.lat, fix.lng)
+            with self.publish_lock:
+                # Only attach the match if no newer fix was published meanwhile
+                if self.fix.seq != fix.seq:
+                    continue
+                if snapped:
+                    self.fix = self.fix._replace(snapped_lat=snapped[0], snapped_lng=snapped[1])
+                else:
+                    self.fix = self.fix._replace(snapped_lat=None, snapped_lng=None)
+            metrics.gps_match.observe(time.monotonic() - fix.recv_time)
+
+    def process_line(self, line, recv_time=None):
+        """
+        Parses one NMEA sentence (raw bytes from the port) and publishes the raw fix.
+        GGA/RMC/VTG go through the fast bytes parser; pynmea2 is only used as a
+        fallback for sentences the fast parser cannot decode.
+        """
+        if recv_time is None:
+            recv_time = time.monotonic()
+        if isinstance(line, str):
+            line = line.encode('ascii', errors='ignore')
+
+        try:
+            msg = nmea_parser.parse(line)
+        except ValueError:
+            self._process_pynmea2(line.decode('utf-8', errors='ignore'), recv_time)
+            return
+        if msg is None:
+            return
+
+        kind = msg[0]
+        if kind == 'GGA':
+            _, fix_time, lat, lng = msg[:4]
+            if lat and lng:
+                self._publish(lat, lng, None, None, fix_time, recv_time)
+        elif kind == 'RMC':
+            _, fix_time, lat, lng, _, speed_knots, course = msg
+            if lat and lng:
+                heading, speed = self._motion(speed_knots, course)
+                self._publish(lat, lng, heading, speed, fix_time, recv_time)
+        elif kind == 'VTG':
+            heading, speed = self._motion(msg[2], msg[1])
+            self._update_motion(heading, speed)
+
+    @staticmethod
+    def _motion(speed_knots, course):
+        """
+        Converts speed / course over ground into (heading, speed_kmh).
+        None means "keep the previous value".
+        """
+        speed = None
+        if speed_knots is not None:
+            speed = speed_knots * 1.852 # Convert Knots to km/h
+        else:
+            speed_knots = 0.0
+
+        # Heading Hold Logic
+        # Only update heading if we have significant speed (> 0.5 knot approx 0.25 m/s)
+        # This prevents "spinning" when stopped due to GPS noise.
+        heading = None
+        if course is not None and speed_knots > 0.1: # Reduced from 0.5 for testing
+            heading = course
+        # Else: Keep previous heading (Heading Hold)
+        return heading, speed
+
+    def _process_pynmea2(self, line, recv_time):
+        """
+        Slow path: general purpose pynmea2 parsing for odd GGA/RMC variants.
+        """
+        import pynmea2 # Only needed for sentences the fast parser rejects
+        try:
+            msg = pynmea2.parse(line)
+        except pynmea2.ParseError:
+            return
+
+        if msg.sentence_type == 'GGA':
+            if msg.latitude and msg.longitude:
+                self._publish(msg.latitude, msg.longitude, None, None,
+                              self._seconds_of_day(msg.timestamp), recv_time)
+        elif msg.sentence_type == 'RMC':
+            if not (msg.latitude and msg.longitude):
+                return
+            speed_knots = float(msg.spd_over_grnd) if msg.spd_over_grnd is not None else None
+            course = float(msg.true_course) if msg.true_course is not None else None
+            heading, speed = self._motion(speed_knots, course)
+            self._publish(msg.latitude, msg.longitude, heading, speed,
+                          self._seconds_of_day(msg.timestamp), recv_time)
+
+    @staticmethod
+    def _seconds_of_day(timestamp):
+        if timestamp is None:
+            return None
+        return timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second + timestamp.microsecond / 1e6
+
+    def _publish(self, lat, lng, heading, speed, fix_time, recv_time):
+        """
+        Swaps in a new GPSFix. heading/speed of None keep the previous values.
+        GGA and RMC of the same epoch are merged into one fix (same seq).
+        """
+        with self.publish_lock:
+            prev = self.fix
+            if heading is None:
+                heading = prev.heading
+            if speed is None:
+                speed = prev.speed
+            same_epoch = fix_time is not None and fix_time == prev.fix_time and \
+                lat == prev.lat and lng == prev.lng
+            if same_epoch:
+                self.fix = prev._replace(heading=heading, speed=speed)
+                trip_recorder.record_fix(self.fix)
+                return
+            fix = GPSFix(lat, lng, heading, speed, fix_time, recv_time, prev.seq + 1)
+            self.fix = fix
+            self.new_fix.notify_all()
+            trip_recorder.record_fix(fix)
+
+        metrics.gps_fixes.inc()
+        if self.running:
+            # Only the live pipeline stamps recv_time with time.monotonic()
+            metrics.gps_parse.observe(time.monotonic() - recv_time)
+
+        # Hand off to the matcher; an older unmatched fix is simply replaced
+        self.match_queue.put(fix)
+
+    def _update_motion(self, heading, speed):
+        """
+        Applies heading/speed from a position-less sentence (VTG) to the current fix.
+        """
+        with self.publish_lock:
+            prev = self.fix
+            self.fix = prev._replace(heading=prev.heading if heading is None else heading,
+                                     speed=prev.speed if speed is None else speed)
+            trip_recorder.record_fix(self.fix)
+
+    def wait_ready(self, timeout=None):
+        """
+        Waits for the port to open (after receiver negotiation). Returns None
+        once it is open with the receiver profile applied, else why not (error,
+        still negotiating, or the receiver did not take the whole profile).
+        """
+        if not self.port_ready.wait(timeout):
+            return "port not open yet"
+        return self.port_error or self.config_problem
+
+    def get_fix(self):
+        """
+        Returns the latest GPSFix snapshot. Compare .seq to detect a new fix.
+        """
+        return self.fix
+
+    def wait_for_fix(self, last_seq, timeout=None):
+        """
+        Blocks until a fix newer than `last_seq` is published.
+        Returns the new GPSFix, or None if none arrived within `timeout` seconds.
+        """
+        fix = self.fix
+        if fix.seq != last_seq:
+            return fix
+        with self.new_fix:
+            self.new_fix.wait_for(lambda: self.fix.seq != last_seq, timeout)
+            fix = self.fix
+        return fix if fix.seq != last_seq else None
+
     def get_location(self):
-        return self.current_location
+        return self.fix._asdict()
 
 # Global instance for easy import if needed, or instantiate in app.py
 gps_reader = GPSReader()
+metrics.gauge('gps_lines_dropped_total', "NMEA lines dropped because the parser fell behind",
+              lambda: gps_reader.parse_queue.dropped, kind='counter')
@@ -7,6 +7,7 @@ from flask import Flask, render_template, jsonify, request
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from car_controller import car
+car.init_hardware()
 
 app = Flask(__name__)
 
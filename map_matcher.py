@@ -1,13 +1,261 @@
-import requests
+import os
+import math
+import json
 import time
+import importlib.util
+
+# pyosmium / requests are only imported when actually used (PBF extracts, OSRM fallback)
+HAS_OSMIUM = importlib.util.find_spec('osmium') is not None
+
+# Default location of the offline road extract (GeoJSON or OSM PBF)
+DEFAULT_ROAD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'maps', 'roads.geojson')
+
+EARTH_RADIUS = 6371000 # meters
+
+# OSM highway types that the car can actually drive on / follow
+DRIVABLE_HIGHWAYS = {
+    'motorway', 'trunk', 'primary', 'secondary', 'tertiary', 'unclassified',
+    'residential', 'service', 'living_street', 'track', 'road',
+    'motorway_link', 'trunk_link', 'primary_link', 'secondary_link', 'tertiary_link',
+    'pedestrian', 'footway', 'path', 'cycleway',
+}
+
+
+class RoadIndex:
+    """
+    Uniform grid index of road segments for fast offline nearest-road lookup.
+
+    Coordinates are projected to a local flat (equirectangular) plane around
+    the first point loaded, which is accurate to well under a meter over a
+    city-sized extract. Each segment is registered in every grid cell its
+    bounding box touches, so a query only has to look at a handful of cells.
+    """
+    def __init__(self, cell_size=50.0):
+        self.cell_size = cell_size # meters
+        self.origin = None # (lat0, lng0) of the projection
+        self.m_per_deg_lat = math.pi * EARTH_RADIUS / 180.0
+        self.m_per_deg_lng = self.m_per_deg_lat
+
+        # Segment table (parallel lists, projected meters)
+        self.x1 = []
+        self.y1 = []
+        self.x2 = []
+        self.y2 = []
+        self.grid = {} # (cx, cy) -> [segment index, ...]
+
+    def __len__(self):
+        return len(self.x1)
+
+    def _project(self, lat, lng):
+        return ((lng - self.origin[1]) * self.m_per_deg_lng,
+                (lat - self.origin[0]) * self.m_per_deg_lat)
+
+    def _unproject(self, x, y):
+        return (self.origin[0] + y / self.m_per_deg_lat,
+                self.origin[1] + x / self.m_per_deg_lng)
+
+    def add_polyline(self, points):
+        """
+        points: sequence of (lat, lng) tuples along one road.
+        """
+        if len(points) < 2:
+            return
+        if self.origin is None:
+            lat0, lng0 = points[0]
+            self.origin = (lat0, lng0)
+            self.m_per_deg_lng = self.m_per_deg_lat * math.cos(math.radians(lat0))
+
+        cs = self.cell_size
+        px, py = self._project(*points[0])
+        for lat, lng in points[1:]:
+            x, y = self._project(lat, lng)
+            if x == px and y == py:
+                continue
+            idx = len(self.x1)
+            self.x1.append(px)
+            self.y1.append(py)
+            self.x2.append(x)
+            self.y2.append(y)
+
+            for cx in range(int(math.floor(min(px, x) / cs)), int(math.floor(max(px, x) / cs)) + 1):
+                for cy in range(int(math.floor(min(py, y) / cs)), int(math.floor(max(py, y) / cs)) + 1):
+                    self.grid.setdefault((cx, cy), []).append(idx)
+            px, py = x, y
+
+    def nearest(self, lat, lng, max_distance=25.0):
+        """
+        Projects (lat, lng) onto the closest road segment within max_distance meters.
+        Returns (snapped_lat, snapped_lng, distance_m, segment_index) or None.
+        """
+        if self.origin is None:
+            return None
+
+        x, y = self._project(lat, lng)
+        cs = self.cell_size
+        cx0 = int(math.floor(x / cs))
+        cy0 = int(math.floor(y / cs))
+        reach = int(math.ceil(max_distance / cs))
+
+        best_d2 = max_distance * max_distance
+        best = None
+        seen = set()
+        for cx in range(cx0 - reach, cx0 + reach + 1):
+            for cy in range(cy0 - reach, cy0 + reach + 1):
+                cell = self.grid.get((cx, cy))
+                if not cell:
+                    continue
+                for i in cell:
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    ax, ay = self.x1[i], self.y1[i]
+                    dx, dy = self.x2[i] - ax, self.y2[i] - ay
+                    # Parameter of the perpendicular foot, clamped to the segment
+                    t = ((x - ax) * dx + (y - ay) * dy) / (dx * dx + dy * dy)
+                    if t < 0.0:
+                        t = 0.0
+                    elif t > 1.0:
+                        t = 1.0
+                    qx = ax + t * dx
+                    qy = ay + t * dy
+                    d2 = (x - qx) ** 2 + (y - qy) ** 2
+                    if d2 <= best_d2:
+                        best_d2 = d2
+                        best = (qx, qy, i)
+
+        if best is None:
+            return None
+        snapped_lat, snapped_lng = self._unproject(best[0], best[1])
+        return snapped_lat, snapped_lng, math.sqrt(best_d2), best[2]
+
+    def load_geojson(self, path):
+        """
+        Loads LineString / MultiLineString road features from a GeoJSON extract.
+        """
+        for points, _ in read_geojson_roads(path):
+            self.add_polyline(points)
+
+    def load_pbf(self, path):
+        """
+        Loads highway ways from an OSM PBF/XML extract. Requires pyosmium.
+        """
+        for points, _ in read_pbf_roads(path):
+            self.add_polyline(points)
+
+
+def read_geojson_roads(path):
+    """
+    Yields (points, properties) for LineString / MultiLineString features
+    (e.g. exported from an OSM extract), points as [(lat, lng), ...].
+    Features with a 'highway' property outside DRIVABLE_HIGHWAYS are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    features = data.get('features', []) if data.get('type') == 'FeatureCollection' else [data]
+    for feature in features:
+        props = feature.get('properties') or {}
+        highway = props.get('highway')
+        if highway is not None and highway not in DRIVABLE_HIGHWAYS:
+            continue
+        geom = feature.get('geometry') or {}
+        if geom.get('type') == 'LineString':
+            lines = [geom['coordinates']]
+        elif geom.get('type') == 'MultiLineString':
+            lines = geom['coordinates']
+        else:
+            continue
+        for line in lines:
+            # GeoJSON is [lng, lat]
+            yield [(c[1], c[0]) for c in line], props
+
+def read_pbf_roads(path):
+    """
+    Yields (points, tags) for highway ways of an OSM PBF/XML extract. Requires pyosmium.
+    """
+    if not HAS_OSMIUM:
+        raise RuntimeError("pyosmium is not installed; convert the extract to GeoJSON instead")
+    import osmium
+
+    ways = []
+
+    class _WayHandler(osmium.SimpleHandler):
+        def way(self, w):
+            if w.tags.get('highway') not in DRIVABLE_HIGHWAYS:
+                return
+            points = []
+            for n in w.nodes:
+                if n.location.valid():
+                    points.append((n.location.lat, n.location.lon))
+            ways.append((points, {'highway': w.tags.get('highway'), 'oneway': w.tags.get('oneway')}))
+
+    _WayHandler().apply_file(path, locations=True)
+    return iter(ways)
+
+def read_roads(path):
+    """
+    Yields (points, tags) from a GeoJSON or OSM PBF/XML road extract.
+    """
+    if path.endswith('.pbf') or path.endswith('.osm'):
+        return read_pbf_roads(path)
+    return read_geojson_roads(path)
+
 
 class MapMatcher:
-    def __init__(self):
+    def __init__(self, road_file=DEFAULT_ROAD_FILE, max_snap_distance=25.0, use_osrm_fallback=True):
+        self.road_file = road_file # Loaded by load() at startup, see subsystems.py
+        self.road_index = None
+        self.max_snap_distance = max_snap_distance # meters, beyond this we assume off-road
+
+        # Optional online fallback (used when no local extract covers the fix)
+        self.use_osrm_fallback = use_osrm_fallback
         self.osrm_url = "http://router.project-osrm.org/nearest/v1/driving/{},{}"
         self.last_request_time = 0
         self.request_interval = 1.0 # 1 second between requests to be polite
 
+    def load(self):
+        """
+        Loads the default road extract. Returns None, or why matching is degraded.
+        """
+        if not self.road_file or not os.path.exists(self.road_file):
+            return "no road extract, using OSRM" if self.use_osrm_fallback else "no road extract"
+        if not self.load_roads(self.road_file):
+            return "road extract failed to load"
+        return None
+
+    def load_roads(self, path):
+        """
+        Builds the offline road index from a GeoJSON or OSM PBF extract.
+        """
+        index = RoadIndex()
+        try:
+            start = time.time()
+            for points, _ in read_roads(path):
+                index.add_polyline(points)
+            print(f"[MapMatcher] Loaded {len(index)} road segments from {path} in {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"[MapMatcher] Failed to load road extract {path}: {e}")
+            return False
+
+        self.road_index = index
+        return True
+
     def match_to_road(self, lat, lng):
+        """
+        Snaps the given lat/lng to the nearest road.
+        Uses the local road index when available, falling back to OSRM.
+        Returns (snapped_lat, snapped_lng) or None if failed.
+        """
+        if self.road_index is not None:
+            match = self.road_index.nearest(lat, lng, self.max_snap_distance)
+            if match:
+                return match[0], match[1]
+
+        if not self.use_osrm_fallback:
+            return None
+        return self.match_to_road_osrm(lat, lng)
+
+    def match_to_road_osrm(self, lat, lng):
         """
         Snaps the given lat/lng to the nearest road using OSRM.
         Returns (snapped_lat, snapped_lng) or None if failed.
@@ -16,14 +264,15 @@ class MapMatcher:
         current_time = time.time()
         if current_time - self.last_request_time < self.request_interval:
             return None
-        
+
         self.last_request_time = current_time
 
+        import requests
         try:
             # OSRM expects {lng},{lat}
             url = self.osrm_url.format(lng, lat)
             response = requests.get(url, timeout=2)
-            
+
             if response.status_code == 200:
                 data = response.json()
                 if data.get('code') == 'Ok' and data.get('waypoints'):
@@ -38,7 +287,7 @@ class MapMatcher:
         except Exception as e:
             print(f"[MapMatcher] Unexpected Error: {e}")
             return None
-            
+
         return None
 
 # Global instance
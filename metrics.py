@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Control Loop Metrics
+Latency histograms and counters along the path from the serial port to the
+motor, exposed at /api/metrics in the Prometheus text format.
+
+Stages are timed against the time.monotonic() stamp taken when the NMEA
+line came off the port (GPSFix.recv_time) or when Flask started handling a
+command, so every histogram answers "how old was the input by now":
+
+    receive -> parse (fix published) -> map match -> navigator -> PWM written
+    HTTP request / WebSocket frame                             -> PWM written
+"""
+
+import time
+import bisect
+import threading
+
+PREFIX = 'jager_'
+
+# Seconds; fine at the low end for parse / actuation, up to a few seconds for stale fixes
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RATE_WINDOW = 10 # seconds of history for per-second rates
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self):
+        with self.lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for le, c in zip(self.buckets, counts):
+            cumulative += c
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total:.6f}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter that also knows its recent per-second rate
+    (one slot per second over the last RATE_WINDOW seconds).
+    """
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self.slots = [0] * RATE_WINDOW
+        self.slot_second = [0] * RATE_WINDOW
+        self.lock = threading.Lock()
+
+    def inc(self, n=1):
+        second = int(time.monotonic())
+        i = second % RATE_WINDOW
+        with self.lock:
+            self.value += n
+            if self.slot_second[i] != second:
+                self.slot_second[i] = second
+                self.slots[i] = 0
+            self.slots[i] += n
+
+    def rate(self):
+        """
+        Events per second over the last complete RATE_WINDOW - 1 seconds.
+        """
+        now = int(time.monotonic())
+        with self.lock:
+            total = sum(c for c, s in zip(self.slots, self.slot_second) if now - RATE_WINDOW < s < now)
+        return total / (RATE_WINDOW - 1)
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time.
+    """
+    def __init__(self, name, help_text, fn, kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value}"]
+
+
+class Metrics:
+    def __init__(self):
+        self.items = []
+
+        # Per-stage latency, seconds since the NMEA line was read from the port
+        self.gps_parse = self.histogram('gps_parse_seconds', "Serial receive to fix published (queue + parse)")
+        self.gps_match = self.histogram('gps_match_seconds', "Serial receive to map-matched fix published")
+        self.nav_fix_age = self.histogram('nav_fix_age_seconds', "Age of a new fix when the navigator picks it up")
+        self.nav_compute = self.histogram('nav_compute_seconds', "Navigator route math per tick")
+        self.fix_to_actuation = self.histogram('fix_to_actuation_seconds',
+                                               "Serial receive of the latest fix to navigator PWM write")
+        # Manual driving
+        self.command_to_actuation = self.histogram('command_to_actuation_seconds',
+                                                   "Manual command received (HTTP or WebSocket) to PWM write")
+        self.control_rtt = self.histogram('control_rtt_seconds',
+                                          "Dashboard-measured round trip of WebSocket control frames")
+
+        self.gps_lines = self.counter('gps_lines_total', "NMEA lines read from the port")
+        self.gps_fixes = self.counter('gps_fixes_total', "New GPS fixes (epochs) published")
+        self.gps_errors = self.counter('gps_errors_total', "Serial read / parse errors")
+        self.motor_commands = self.counter('motor_commands_total', "Motor speed commands")
+        self.steering_commands = self.counter('steering_commands_total', "Steering commands")
+        self.http_commands = self.counter('http_commands_total', "Manual /api/control commands")
+        self.ws_commands = self.counter('ws_commands_total', "Manual commands over the WebSocket channel")
+
+        self.gauge('gps_fixes_per_second', "GPS fix rate", self.gps_fixes.rate)
+        self.gauge('gps_lines_per_second', "NMEA line rate", self.gps_lines.rate)
+        self.gauge('motor_commands_per_second', "Motor command rate", self.motor_commands.rate)
+        self.gauge('http_commands_per_second', "Manual command rate", self.http_commands.rate)
+        self.gauge('ws_commands_per_second', "Manual WebSocket command rate", self.ws_commands.rate)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        item = Histogram(PREFIX + name, help_text, buckets)
+        self.items.append(item)
+        return item
+
+    def counter(self, name, help_text):
+        item = Counter(PREFIX + name, help_text)
+        self.items.append(item)
+        return item
+
+    def gauge(self, name, help_text, fn, kind='gauge'):
+        """
+        fn() is called at scrape time; kind='counter' for totals kept elsewhere.
+        """
+        item = Gauge(PREFIX + name, help_text, fn, kind)
+        self.items.append(item)
+        return item
+
+    def render(self):
+        lines = []
+        for item in self.items:
+            lines.extend(item.render())
+        return "\n".join(lines) + "\n"
+
+# Global instance
+metrics = Metrics()
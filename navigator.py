@@ -1,6 +1,10 @@
-import math
 import time
-import threading
+import geodesy
+from route import Route
+from control_scheduler import control_scheduler
+from estimator import estimator
+from telemetry import telemetry, NAV
+from metrics import metrics
 from gps_reader import gps_reader
 from car_controller import car
 from state_machine import state_machine, CarMode, MotionState
@@ -9,10 +13,28 @@ from state_machine import state_machine, CarMode, MotionState
 class Navigator:
     def __init__(self):
         self.waypoints = [] # List of {lat, lng}
+        self.route = Route([]) # Preprocessed copy of waypoints (cumulative distances etc.)
         self.current_waypoint_index = 0
+        self.progress = self._make_progress(0.0, None)
         self.is_navigating = False
-        self.thread = None
+        self.task = None # ControlTask running _tick
         self.arrival_threshold_meters = 5.0
+
+        # Route preprocessing (see route.prepare_waypoints), overridable per /api/navigate request
+        self.route_tolerance = 1.0 # meters, Douglas-Peucker tolerance (0 = keep every point)
+        self.route_spacing = 0.0 # meters, max distance between waypoints after resampling (0 = off)
+
+        # Loop timing: _tick runs at a fixed rate on the control scheduler,
+        # route math only when it sees a new GPS fix
+        self.control_rate_hz = 10.0 # Actuation ticks per second
+        self.fix_timeout = 3.0 # Seconds without a new fix before we stop the car
+        self.fix_lost = False # Latched on GPS loss: the car stays stopped until a new fix arrives
+        self.last_visited_wp = None
+        self.last_seq = -1
+        self.last_fix_time = 0.0
+        self.last_fix_recv = None # GPSFix.recv_time of the fix behind the current commands
+        self.use_estimator = True # Arrival checks on the fused estimate every tick instead of on raw fixes
+        self.estimate_max_age = 2.0 / self.control_rate_hz # Seconds; older estimates fall back to the raw fix
         
         # PID / Control Parameters
         self.base_speed = 40 # Duty Cycle %
@@ -30,8 +52,11 @@ class Navigator:
         waypoints: list of dicts {'lat': float, 'lng': float}
         """
         self.waypoints = waypoints
+        self.route = Route(waypoints)
         self.current_waypoint_index = 0
-        print(f"Route set with {len(waypoints)} waypoints.")
+        self.progress = self._make_progress(self.route.total_length, None)
+        estimator.reset() # Re-centered on the next fix
+        print(f"Route set with {len(waypoints)} waypoints ({self.route.total_length:.0f}m).")
 
     def start_navigation(self):
         if self.is_navigating:
@@ -42,13 +67,19 @@ class Navigator:
             return
 
         self.is_navigating = True
-        self.thread = threading.Thread(target=self._nav_loop)
-        self.thread.daemon = True
-        self.thread.start()
+        self.last_visited_wp = None # Set from the first fix in _tick
+        self.last_seq = -1 # Forces the current fix to be processed on the first tick
+        self.last_fix_time = time.monotonic()
+        self.last_fix_recv = None
+        self.fix_lost = False
+        self.task = control_scheduler.add_task('navigator', self.control_rate_hz, self._tick)
         print("Navigation Started")
 
     def stop_navigation(self):
         self.is_navigating = False
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
         car.stop()
         print("Navigation Stopped")
 
@@ -57,160 +88,173 @@ class Navigator:
     def calculate_total_remaining_distance(self, current_loc, target_index):
         """
         Calculates the total distance from current location to the target waypoint,
-        plus the distance of all subsequent segments.
+        plus the distance of all subsequent segments (precomputed in set_route).
         """
-        if target_index >= len(self.waypoints):
-            return 0.0
+        return self.route.remaining_distance(current_loc.lat, current_loc.lng, target_index)
 
-        total_dist = 0.0
-        
-        # 1. Distance from current location to current target
-        target_wp = self.waypoints[target_index]
-        total_dist += self.haversine_distance(
-            current_loc['lat'], current_loc['lng'],
-            target_wp['lat'], target_wp['lng']
-        )
-        
-        # 2. Distance for remaining segments
-        for i in range(target_index, len(self.waypoints) - 1):
-            p1 = self.waypoints[i]
-            p2 = self.waypoints[i+1]
-            total_dist += self.haversine_distance(
-                p1['lat'], p1['lng'],
-                p2['lat'], p2['lng']
-            )
-            
-        return total_dist
+    def _make_progress(self, remaining, speed_kmh):
+        """
+        Builds the progress snapshot exposed through /api/state.
+        """
+        eta = None
+        if speed_kmh and speed_kmh > 0.5:
+            eta = remaining / (speed_kmh / 3.6)
+        return {
+            "waypoint_index": self.current_waypoint_index,
+            "waypoint_count": len(self.route),
+            "total_distance": round(self.route.total_length, 1),
+            "remaining_distance": round(remaining, 1),
+            "progress_pct": round(self.route.progress(remaining) * 100, 1),
+            "eta_seconds": round(eta) if eta is not None else None,
+        }
+
+    def get_progress(self):
+        progress = dict(self.progress)
+        progress["is_navigating"] = self.is_navigating
+        return progress
 
     def get_cross_track_error(self, start_lat, start_lng, end_lat, end_lng, curr_lat, curr_lng):
         """
         Calculates Cross-Track Error (distance from the line start->end).
         Returns distance in meters. Positive = Right of line, Negative = Left.
         """
-        R = 6371000 # Earth Radius
-        
-        # Distance from Start to Current
-        dist_13 = self.haversine_distance(start_lat, start_lng, curr_lat, curr_lng)
-        
-        # Bearing from Start to End (Path Bearing)
-        bearing_12 = self.calculate_bearing(start_lat, start_lng, end_lat, end_lng)
-        
-        # Bearing from Start to Current
-        bearing_13 = self.calculate_bearing(start_lat, start_lng, curr_lat, curr_lng)
-        
-        # Angle Difference
-        diff = math.radians(bearing_13 - bearing_12)
-        
-        # XTE Formula (approximate for small distances, or precise spherical)
-        # XTE = asin(sin(dist_13/R) * sin(diff)) * R
-        # Since distances are small compared to Earth radius, simpler formula:
-        # XTE = dist_13 * math.sin(diff)
-        
-        return dist_13 * math.sin(diff)
+        return geodesy.get_cross_track_error(start_lat, start_lng, end_lat, end_lng, curr_lat, curr_lng)
 
-    def _nav_loop(self):
-        # Initialize last_visited with current location when starting
+    def _tick(self):
+        """
+        One control period, run by the control scheduler at control_rate_hz.
+        Returns False to stop the task.
+        """
+        if not self.is_navigating:
+            return False
+
+        # Check Mode
+        if state_machine.current_mode != CarMode.AUTONOMOUS:
+            print("Mode changed. Stopping navigation.")
+            self.stop_navigation()
+            return False
+
+        fix = gps_reader.get_fix()
+        now = time.monotonic()
+
+        # Initialize last_visited with the first location after starting
         # We need a stable start point for the first segment
-        start_loc = gps_reader.get_location()
-        while start_loc['lat'] == 0:
-             print("Waiting for GPS to initialize start point...")
-             time.sleep(1)
-             if not self.is_navigating: return
-             start_loc = gps_reader.get_location()
-
-        last_visited_wp = start_loc
-        print(f"Navigation Loop Started. Start Loc: {start_loc}")
-
-        while self.is_navigating:
-            # Check Mode
-            if state_machine.current_mode != CarMode.AUTONOMOUS:
-                print("Mode changed. Stopping navigation.")
-                self.stop_navigation()
-                break
-
-            current_loc = gps_reader.get_location()
-            
-            if current_loc['lat'] == 0:
-                print("Lost GPS fix...")
-                car.stop()
-                time.sleep(0.5)
-                continue
+        if self.last_visited_wp is None:
+            if fix.lat == 0:
+                if now - self.last_fix_time > 1.0:
+                    print("Waiting for GPS to initialize start point...")
+                    self.last_fix_time = now
+                return True
+            self.last_visited_wp = {'lat': fix.lat, 'lng': fix.lng}
+            self.last_fix_time = now
+            print(f"Navigation Loop Started. Start Loc: {fix}")
+
+        if fix.seq != self.last_seq:
+            self.last_seq = fix.seq
+            self.last_fix_time = now
+            self.last_fix_recv = fix.recv_time
+            metrics.nav_fix_age.observe(now - fix.recv_time)
+            if fix.lat == 0:
+                self._lose_fix()
+                return True
+            if self.fix_lost:
+                print("GPS fix regained.")
+                self.fix_lost = False
+            # Without the estimator, route math only runs on new data
+            if not self.use_estimator and not self._timed_on_fix(fix):
+                return False
+        elif self.fix_lost:
+            # Neither actuate nor dead-reckon (the estimator would follow our own commands)
+            return True
+        elif now - self.last_fix_time > self.fix_timeout:
+            self._lose_fix()
+            return True
+
+        if self.use_estimator:
+            # At most one control period old, vs up to a second for the raw fix,
+            # unless the estimator task has stopped or fallen behind
+            estimate = estimator.get_estimate()
+            if estimate is None or now - estimate.time > self.estimate_max_age:
+                estimate = fix
+            if not self._timed_on_fix(estimate):
+                return False
 
+        self._actuate()
+        if self.last_fix_recv is not None:
+            metrics.fix_to_actuation.observe(time.monotonic() - self.last_fix_recv)
+        return True
+
+    def _lose_fix(self):
+        if not self.fix_lost:
+            print("Lost GPS fix...")
+            car.stop()
+            state_machine.update_motion_state(0, 0)
+        self.fix_lost = True
+
+    def _timed_on_fix(self, current_loc):
+        start = time.monotonic()
+        result = self._on_fix(current_loc)
+        metrics.nav_compute.observe(time.monotonic() - start)
+        return result
+
+    def _on_fix(self, current_loc):
+        """
+        Route math for one position (GPSFix or estimator.Estimate).
+        Returns False once the route is complete.
+        """
+        if self.current_waypoint_index >= len(self.waypoints):
+            print("Destination Reached!")
+            self.stop_navigation()
+            return False
+
+        target_wp = self.waypoints[self.current_waypoint_index]
+
+        # Distance to Target
+        dist_to_target = self.haversine_distance(
+            current_loc.lat, current_loc.lng,
+            target_wp['lat'], target_wp['lng']
+        )
+
+        # Total Distance (O(1) lookup into the precomputed route table)
+        total_remaining = self.calculate_total_remaining_distance(current_loc, self.current_waypoint_index)
+        self.progress = self._make_progress(total_remaining, current_loc.speed)
+
+        # --- Waypoint Switching ---
+        if dist_to_target < self.arrival_threshold_meters:
+            print(f"Reached Waypoint {self.current_waypoint_index}")
+            # Update last visited to the waypoint we just reached (ideal point)
+            # This snaps the start of the next line to the exact waypoint coordinate
+            self.last_visited_wp = target_wp
+
+            self.current_waypoint_index += 1
             if self.current_waypoint_index >= len(self.waypoints):
-                print("Destination Reached!")
-                self.stop_navigation()
-                break
-
-            target_wp = self.waypoints[self.current_waypoint_index]
-            
-            # Distance to Target
-            dist_to_target = self.haversine_distance(
-                current_loc['lat'], current_loc['lng'],
-                target_wp['lat'], target_wp['lng']
-            )
-
-            # Total Distance
-            total_remaining = self.calculate_total_remaining_distance(current_loc, self.current_waypoint_index)
-
-            # --- Waypoint Switching ---
-            if dist_to_target < self.arrival_threshold_meters:
-                print(f"Reached Waypoint {self.current_waypoint_index}")
-                # Update last visited to the waypoint we just reached (ideal point)
-                # This snaps the start of the next line to the exact waypoint coordinate
-                last_visited_wp = target_wp 
-                
-                self.current_waypoint_index += 1
-                if self.current_waypoint_index >= len(self.waypoints):
-                   print("Route Complete.")
-                   self.stop_navigation()
-                   break
-                
-                # Update target
-                target_wp = self.waypoints[self.current_waypoint_index]
-
-            # --- STEERING DISABLED IN AUTONOMOUS MODE ---
-            # User requested: Always keep servo at 90 degrees (straight)
-            # No GPS-based steering corrections
-            
-            steering_mode = "LOCK"
-            final_steering = 0.0
-            self.current_steering = 0.0
-
-            # Drive
-            target_speed = min(self.base_speed, state_machine.max_speed)
-            car.set_steering(final_steering)
-            car.set_speed(target_speed)
-            state_machine.update_motion_state(target_speed, final_steering)
-
-            print(f"WP:{self.current_waypoint_index} | DistToWP:{dist_to_target:.1f}m | Tot:{total_remaining:.1f}m | Mode:STRAIGHT_ONLY | Str:0.00")
-
-            time.sleep(0.1)
+               print("Route Complete.")
+               self.stop_navigation()
+               return False
+
+        telemetry.record(NAV, self.current_waypoint_index, dist_to_target, total_remaining, self.current_steering)
+        return True
+
+    def _actuate(self):
+        """
+        Fixed-rate actuation tick: applies the current speed / steering decision.
+        """
+        # --- STEERING DISABLED IN AUTONOMOUS MODE ---
+        # User requested: Always keep servo at 90 degrees (straight)
+        # No GPS-based steering corrections
+        final_steering = 0.0
+        self.current_steering = 0.0
+
+        # Drive
+        target_speed = min(self.base_speed, state_machine.max_speed)
+        car.set_steering(final_steering)
+        car.set_speed(target_speed)
+        state_machine.update_motion_state(target_speed, final_steering)
 
     def haversine_distance(self, lat1, lon1, lat2, lon2):
-        R = 6371000 # Radius of Earth in meters
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        
-        a = math.sin(delta_phi/2)**2 + \
-            math.cos(phi1) * math.cos(phi2) * \
-            math.sin(delta_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        return R * c
+        return geodesy.haversine_distance(lat1, lon1, lat2, lon2)
 
     def calculate_bearing(self, lat1, lon1, lat2, lon2):
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_lambda = math.radians(lon2 - lon1)
-        
-        y = math.sin(delta_lambda) * math.cos(phi2)
-        x = math.cos(phi1) * math.sin(phi2) - \
-            math.sin(phi1) * math.cos(phi2) * math.cos(delta_lambda)
-        
-        theta = math.atan2(y, x)
-        bearing = (math.degrees(theta) + 360) % 360
-        return bearing
+        return geodesy.calculate_bearing(lat1, lon1, lat2, lon2)
 
 navigator = Navigator()
@@ -0,0 +1,94 @@
+"""
+Fast bytes-level parser for the NMEA sentences the car actually uses.
+
+Works directly on the raw bytes from the serial port (no decode, no message
+objects) and returns plain tuples:
+
+    ('GGA', fix_time, lat, lng, quality, num_sats, hdop)
+    ('RMC', fix_time, lat, lng, valid, speed_knots, course)
+    ('VTG', course, speed_knots)
+
+fix_time is UTC seconds of day. Optional numeric fields that are empty in the
+sentence come back as None. Any talker ID is accepted ($GP, $GN, $GL, ...).
+
+parse() returns None for other sentence types and for sentences with a bad
+checksum, and raises ValueError for a GGA/RMC/VTG sentence it cannot decode so
+the caller can fall back to pynmea2.
+"""
+
+def checksum_ok(line):
+    """
+    Validates the '*hh' checksum. Sentences without a checksum are accepted.
+    """
+    star = line.rfind(b'*')
+    if star < 0:
+        return True
+    try:
+        expected = int(line[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+    c = 0
+    for b in line[1:star]:
+        c ^= b
+    return c == expected
+
+def _float(field):
+    return float(field) if field else None
+
+def _time(field):
+    """
+    hhmmss.sss -> seconds of day
+    """
+    if not field:
+        return None
+    return int(field[0:2]) * 3600 + int(field[2:4]) * 60 + float(field[4:])
+
+def _coord(value, hemi):
+    """
+    ddmm.mmmm / dddmm.mmmm + N/S/E/W -> signed decimal degrees
+    """
+    if not value:
+        return None
+    # Split on the text so no float rounding sneaks into the degrees part
+    dot = value.find(b'.')
+    if dot < 0:
+        dot = len(value)
+    deg = int(value[:dot - 2] or 0) + float(value[dot - 2:]) / 60.0
+    if hemi == b'S' or hemi == b'W':
+        return -deg
+    return deg
+
+def parse(line):
+    """
+    line: raw bytes of one sentence, e.g. b'$GPGGA,...*47\\r\\n'
+    """
+    if len(line) < 7 or line[0] != 0x24: # '$'
+        return None
+
+    kind = line[3:6]
+    if kind != b'GGA' and kind != b'RMC' and kind != b'VTG':
+        return None
+
+    line = line.rstrip()
+    if not checksum_ok(line):
+        return None
+
+    star = line.rfind(b'*')
+    f = (line[:star] if star >= 0 else line).split(b',')
+
+    try:
+        if kind == b'GGA':
+            # $xxGGA,time,lat,N,lng,E,quality,sats,hdop,alt,M,geoid,M,age,station
+            return ('GGA', _time(f[1]), _coord(f[2], f[3]), _coord(f[4], f[5]),
+                    int(f[6]) if f[6] else 0, int(f[7]) if f[7] else 0, _float(f[8]))
+        if kind == b'RMC':
+            # $xxRMC,time,status,lat,N,lng,E,speed_knots,course,date,magvar,E[,mode]
+            return ('RMC', _time(f[1]), _coord(f[3], f[4]), _coord(f[5], f[6]),
+                    f[2] == b'A', _float(f[7]), _float(f[8]))
+        # $xxVTG,course_true,T,course_mag,M,speed_knots,N,speed_kmh,K[,mode]
+        # (very old receivers omit the T/M/N/K unit fields)
+        if len(f) >= 8 and f[2] == b'T':
+            return ('VTG', _float(f[1]), _float(f[5]))
+        return ('VTG', _float(f[1]), _float(f[3]))
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Malformed {kind.decode()} sentence: {e}")
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+
+
+class LatestQueue:
+    """
+    Bounded queue where the newest item always wins.
+
+    put() never blocks: when the queue is full the oldest item is discarded
+    (and counted in `dropped`), so a slow consumer can only ever lose stale
+    data, never delay the producer or build up a backlog.
+    """
+    def __init__(self, maxsize=1):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Returns the oldest pending item, or None on timeout / close.
+        """
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def get_latest(self, timeout=None):
+        """
+        Returns the newest pending item and discards anything older.
+        """
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.pop()
+            self.dropped += len(self.items)
+            self.items.clear()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+NMEA Log Replay
+Feeds a recorded NMEA file through GPSReader's normal parse path, paced by
+the receiver timestamps in the log, at 1x - 100x real time (or flat out).
+
+Usage:
+    python replay.py drive.nmea --speed 10
+"""
+
+import time
+import argparse
+import nmea_parser
+
+
+class NmeaReplaySource:
+    """
+    Stand-in for serial.Serial: readline() returns the recorded lines, sleeping
+    between epochs so fix timestamps advance at `speed` x real time.
+    speed=0 replays as fast as possible.
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        with open(path, 'rb') as f:
+            self.lines = [line for line in f if line.startswith(b'$')]
+        self.index = 0
+        self.last_fix_time = None
+        self.last_wall_time = None
+
+    def __repr__(self):
+        return f"NmeaReplaySource({self.path!r}, speed={self.speed})"
+
+    def readline(self):
+        if self.index >= len(self.lines):
+            if not self.loop or not self.lines:
+                time.sleep(0.1) # Behave like an idle port
+                return b''
+            self.index = 0
+            self.last_fix_time = None
+
+        line = self.lines[self.index]
+        self.index += 1
+
+        if self.speed > 0:
+            self._pace(line)
+        return line
+
+    def _pace(self, line):
+        fix_time = self._fix_time(line)
+        if fix_time is None:
+            return
+        now = time.monotonic()
+        if self.last_fix_time is not None and fix_time > self.last_fix_time:
+            due = self.last_wall_time + (fix_time - self.last_fix_time) / self.speed
+            if due > now:
+                time.sleep(due - now)
+                now = due
+        if self.last_fix_time is None or fix_time != self.last_fix_time:
+            self.last_fix_time = fix_time
+            self.last_wall_time = now
+
+    @staticmethod
+    def _fix_time(line):
+        # GGA and RMC carry the UTC time in field 1
+        if line[3:6] not in (b'GGA', b'RMC'):
+            return None
+        fields = line.split(b',', 2)
+        try:
+            return nmea_parser._time(fields[1])
+        except (IndexError, ValueError):
+            return None
+
+    def close(self):
+        pass
+
+
+if __name__ == '__main__':
+    from gps_reader import GPSReader
+
+    parser = argparse.ArgumentParser(description="Replay an NMEA log through GPSReader")
+    parser.add_argument('path')
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed multiplier (0 = flat out)")
+    args = parser.parse_args()
+
+    source = NmeaReplaySource(args.path, speed=args.speed)
+    reader = GPSReader(serial_factory=lambda: source)
+    reader.start()
+
+    last_seq = 0
+    start = time.monotonic()
+    while True:
+        fix = reader.wait_for_fix(last_seq, timeout=0.5)
+        if fix is None:
+            if source.index >= len(source.lines) and not len(reader.parse_queue):
+                break
+            continue
+        last_seq = fix.seq
+        print(f"#{fix.seq} t={fix.fix_time} lat={fix.lat:.6f} lng={fix.lng:.6f} hdg={fix.heading:.1f} spd={fix.speed:.1f}km/h")
+
+    print(f"Replayed {len(source.lines)} sentences, {last_seq} fixes in {time.monotonic() - start:.1f}s")
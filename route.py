@@ -0,0 +1,148 @@
+import numpy as np
+import geodesy
+
+
+class Route:
+    """
+    A route preprocessed once in Navigator.set_route() so the nav loop never
+    has to walk the waypoint list again.
+
+    cumulative[i] is the along-route distance from the first waypoint to
+    waypoint i, so the distance left after waypoint i is a single subtraction.
+    """
+    def __init__(self, waypoints):
+        """
+        waypoints: list of dicts {'lat': float, 'lng': float}
+        """
+        self.waypoints = waypoints
+        self.lats = np.array([wp['lat'] for wp in waypoints], dtype=float)
+        self.lngs = np.array([wp['lng'] for wp in waypoints], dtype=float)
+
+        # Per segment (n-1 entries)
+        self.segment_lengths = geodesy.polyline_segment_lengths(self.lats, self.lngs)
+        self.bearings = geodesy.polyline_bearings(self.lats, self.lngs)
+        rad = np.radians(self.bearings)
+        self.unit_vectors = np.column_stack((np.sin(rad), np.cos(rad))) # (east, north)
+
+        # Per waypoint (n entries)
+        self.cumulative = np.concatenate(([0.0], np.cumsum(self.segment_lengths)))
+        self.total_length = float(self.cumulative[-1]) if len(waypoints) else 0.0
+
+    def __len__(self):
+        return len(self.waypoints)
+
+    def distance_after(self, index):
+        """
+        Along-route distance from waypoint `index` to the end of the route.
+        """
+        if index >= len(self.waypoints):
+            return 0.0
+        return self.total_length - float(self.cumulative[index])
+
+    def remaining_distance(self, lat, lng, target_index):
+        """
+        Distance from (lat, lng) to the target waypoint plus every segment after it.
+        """
+        if target_index >= len(self.waypoints):
+            return 0.0
+        target_wp = self.waypoints[target_index]
+        return geodesy.haversine_distance(lat, lng, target_wp['lat'], target_wp['lng']) + \
+            self.distance_after(target_index)
+
+    def progress(self, remaining):
+        """
+        Fraction of the route completed (0.0 - 1.0) for a given remaining distance.
+        """
+        if self.total_length <= 0:
+            return 1.0 if remaining <= 0 else 0.0
+        return max(0.0, min(1.0, 1.0 - remaining / self.total_length))
+
+
+def _local_xy(lats, lngs):
+    """
+    Equirectangular projection around the first point, in meters (x = East, y = North).
+    """
+    m_per_deg_lat = np.pi * geodesy.EARTH_RADIUS / 180.0
+    m_per_deg_lng = m_per_deg_lat * np.cos(np.radians(lats[0]))
+    return (lngs - lngs[0]) * m_per_deg_lng, (lats - lats[0]) * m_per_deg_lat
+
+def simplify_indices(lats, lngs, tolerance):
+    """
+    Douglas-Peucker: indices of the points to keep so that no dropped point is
+    more than `tolerance` meters from the simplified line. Endpoints are kept.
+    """
+    n = len(lats)
+    if n < 3:
+        return np.arange(n)
+    x, y = _local_xy(lats, lngs)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        ax, ay = x[first], y[first]
+        dx, dy = x[last] - ax, y[last] - ay
+        px = x[first + 1:last] - ax
+        py = y[first + 1:last] - ay
+        seg2 = dx * dx + dy * dy
+        if seg2 > 0:
+            # Distance to the segment (not the infinite line), so hairpins survive
+            t = np.clip((px * dx + py * dy) / seg2, 0.0, 1.0)
+            dist2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+        else:
+            dist2 = px * px + py * py
+        i = int(np.argmax(dist2))
+        if dist2[i] > tolerance * tolerance:
+            mid = first + 1 + i
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return np.flatnonzero(keep)
+
+def resample(lats, lngs, spacing):
+    """
+    Splits every segment longer than `spacing` meters into equal parts, so
+    points are never more than `spacing` apart. Existing points (corners) are kept.
+    """
+    lengths = geodesy.polyline_segment_lengths(lats, lngs)
+    parts = np.maximum(1, np.ceil(lengths / spacing).astype(int))
+    # Fraction along each segment of every output point (start of each part)
+    seg = np.repeat(np.arange(len(lengths)), parts)
+    frac = (np.arange(len(seg)) - np.repeat(np.cumsum(parts) - parts, parts)) / np.repeat(parts, parts)
+    out_lats = lats[seg] + (lats[seg + 1] - lats[seg]) * frac
+    out_lngs = lngs[seg] + (lngs[seg + 1] - lngs[seg]) * frac
+    return np.append(out_lats, lats[-1]), np.append(out_lngs, lngs[-1])
+
+def resampled_count(lats, lngs, spacing):
+    """
+    Upper bound on the number of points resample() (after any simplification)
+    returns for this polyline; the point count itself when spacing is 0.
+    """
+    if spacing <= 0 or len(lats) < 2:
+        return len(lats)
+    lengths = geodesy.polyline_segment_lengths(np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float))
+    return int(np.maximum(1, np.ceil(lengths / spacing)).sum()) + 1
+
+def prepare_waypoints(waypoints, tolerance=1.0, spacing=0.0):
+    """
+    Route preprocessing before Navigator.set_route(): drops repeated points,
+    simplifies with Douglas-Peucker (`tolerance` meters, 0 = off), then
+    optionally resamples so points are at most `spacing` meters apart (0 = off).
+    Returns a new list of {'lat', 'lng'} dicts.
+    """
+    if len(waypoints) < 2:
+        return [{'lat': float(wp['lat']), 'lng': float(wp['lng'])} for wp in waypoints]
+    lats = np.array([wp['lat'] for wp in waypoints], dtype=float)
+    lngs = np.array([wp['lng'] for wp in waypoints], dtype=float)
+
+    moved = np.concatenate(([True], (np.diff(lats) != 0) | (np.diff(lngs) != 0)))
+    lats, lngs = lats[moved], lngs[moved]
+    if tolerance > 0:
+        keep = simplify_indices(lats, lngs, tolerance)
+        lats, lngs = lats[keep], lngs[keep]
+    if spacing > 0 and len(lats) > 1:
+        lats, lngs = resample(lats, lngs, spacing)
+    return [{'lat': lat, 'lng': lng} for lat, lng in zip(lats.tolist(), lngs.tolist())]
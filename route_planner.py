@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Onboard Route Planner
+Plans routes on the Pi from the same offline road extract the map matcher
+uses (maps/roads.geojson or a .osm.pbf), so routing works without internet.
+
+The road graph is compressed so only junctions are search nodes (chains of
+degree-2 road vertices become one edge that keeps its geometry), and an ALT
+index (A*, Landmarks, Triangle inequality) gives A* a much tighter lower
+bound than straight-line distance. The built graph and landmark tables are
+cached next to the extract as <extract>.graph.npz.
+
+Usage:
+    python route_planner.py maps/roads.geojson 12.9716 77.5946 12.9352 77.6245
+"""
+
+import os
+import math
+import time
+import heapq
+import numpy as np
+import geodesy
+from map_matcher import DEFAULT_ROAD_FILE, read_roads
+
+INF = float('inf')
+CACHE_VERSION = 1
+
+
+def _is_oneway(tags):
+    oneway = str(tags.get('oneway', '')).lower()
+    if oneway in ('yes', 'true', '1'):
+        return 1
+    if oneway == '-1':
+        return -1
+    return 0
+
+def _dijkstra(offsets, targets, weights, source, count):
+    """
+    Plain Dijkstra over a CSR graph. Returns distances to every node.
+    """
+    dist = [INF] * count
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return np.array(dist)
+
+def _csr(count, src, dst, weight, edge):
+    order = np.argsort(src, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.add.at(offsets, np.asarray(src, dtype=np.int64) + 1, 1)
+    offsets = np.cumsum(offsets)
+    return (offsets.tolist(), np.asarray(dst)[order].tolist(),
+            np.asarray(weight)[order].tolist(), np.asarray(edge)[order].tolist())
+
+
+class RoadGraph:
+    """
+    Junction graph with geometry-carrying edges plus ALT landmark tables.
+    """
+    def __init__(self):
+        self.node_lat = None # All road vertices
+        self.node_lng = None
+        self.junctions = None # Road vertex id of each search node
+        self.edge_src = None # Search node ids
+        self.edge_dst = None
+        self.edge_len = None # meters
+        self.geom_offsets = None # Edge e geometry = geom_nodes[geom_offsets[e]:geom_offsets[e + 1]]
+        self.geom_nodes = None
+        self.lm_from = None # (k, junctions) distance landmark -> node
+        self.lm_to = None # (k, junctions) distance node -> landmark
+
+    # --- Building ---
+
+    def build(self, polylines, num_landmarks=8):
+        """
+        polylines: iterable of (points, tags), points as [(lat, lng), ...]
+        """
+        key_to_id = {}
+        lats = []
+        lngs = []
+        out = [] # out[u] = {v: meters}
+
+        def node_id(lat, lng):
+            key = (round(lat, 7), round(lng, 7))
+            nid = key_to_id.get(key)
+            if nid is None:
+                nid = len(lats)
+                key_to_id[key] = nid
+                lats.append(lat)
+                lngs.append(lng)
+                out.append({})
+            return nid
+
+        for points, tags in polylines:
+            oneway = _is_oneway(tags)
+            ids = [node_id(lat, lng) for lat, lng in points]
+            for a, b in zip(ids, ids[1:]):
+                if a == b:
+                    continue
+                w = geodesy.haversine_distance(lats[a], lngs[a], lats[b], lngs[b])
+                if oneway >= 0 and w < out[a].get(b, INF):
+                    out[a][b] = w
+                if oneway <= 0 and w < out[b].get(a, INF):
+                    out[b][a] = w
+
+        count = len(lats)
+        inn = [set() for _ in range(count)]
+        for u in range(count):
+            for v in out[u]:
+                inn[v].add(u)
+
+        # A vertex is a plain chain vertex if it has exactly two neighbours and
+        # traffic flows straight through it (both ways or one way), else a junction
+        is_junction = [False] * count
+        for u in range(count):
+            nbrs = set(out[u]) | inn[u]
+            o = set(out[u])
+            if len(nbrs) != 2:
+                is_junction[u] = True
+            elif not (o == inn[u] == nbrs or (len(o) == 1 and len(inn[u]) == 1 and o != inn[u])):
+                is_junction[u] = True
+
+        edge_src, edge_dst, edge_len, geoms = [], [], [], []
+        covered = [False] * count
+
+        def walk_from(u):
+            for v, w in out[u].items():
+                geom = [u]
+                length = w
+                prev, cur = u, v
+                while not is_junction[cur]:
+                    covered[cur] = True
+                    geom.append(cur)
+                    nxt = [x for x in out[cur] if x != prev]
+                    if not nxt:
+                        break
+                    length += out[cur][nxt[0]]
+                    prev, cur = cur, nxt[0]
+                if not is_junction[cur]:
+                    continue # Dead end inside a chain, cannot happen with the rules above
+                geom.append(cur)
+                edge_src.append(u)
+                edge_dst.append(cur)
+                edge_len.append(length)
+                geoms.append(geom)
+
+        for u in range(count):
+            if is_junction[u]:
+                walk_from(u)
+        # Closed loops without any junction: promote one vertex per loop
+        for u in range(count):
+            if not is_junction[u] and not covered[u] and out[u]:
+                is_junction[u] = True
+                walk_from(u)
+
+        junctions = [u for u in range(count) if is_junction[u]]
+        jid = {u: j for j, u in enumerate(junctions)}
+
+        self.node_lat = np.array(lats)
+        self.node_lng = np.array(lngs)
+        self.junctions = np.array(junctions, dtype=np.int64)
+        self.edge_src = np.array([jid[u] for u in edge_src], dtype=np.int64)
+        self.edge_dst = np.array([jid[u] for u in edge_dst], dtype=np.int64)
+        self.edge_len = np.array(edge_len)
+        self.geom_offsets = np.cumsum([0] + [len(g) for g in geoms]).astype(np.int64)
+        self.geom_nodes = np.array([n for g in geoms for n in g], dtype=np.int64)
+        self._prepare()
+        self._build_landmarks(num_landmarks)
+
+    def _build_landmarks(self, k):
+        """
+        Picks k landmarks spread around the edge of the map (farthest point
+        selection) and stores shortest distances from and to each of them.
+        """
+        n = len(self.junctions)
+        k = min(k, n)
+        lat = self.node_lat[self.junctions]
+        lng = self.node_lng[self.junctions]
+        x = (lng - lng.mean()) * np.cos(np.radians(lat.mean()))
+        y = lat - lat.mean()
+
+        chosen = [int(np.argmax(x * x + y * y))]
+        min_d2 = (x - x[chosen[0]]) ** 2 + (y - y[chosen[0]]) ** 2
+        while len(chosen) < k:
+            nxt = int(np.argmax(min_d2))
+            chosen.append(nxt)
+            min_d2 = np.minimum(min_d2, (x - x[nxt]) ** 2 + (y - y[nxt]) ** 2)
+
+        self.lm_from = np.array([_dijkstra(*self.fwd, l, n) for l in chosen]) if k else np.zeros((0, n))
+        self.lm_to = np.array([_dijkstra(*self.rev[:3], l, n) for l in chosen]) if k else np.zeros((0, n))
+
+    def _prepare(self):
+        """
+        Derived lookup structures (not cached on disk).
+        """
+        n = len(self.junctions)
+        edges = np.arange(len(self.edge_src))
+        self.fwd_offsets, self.fwd_targets, self.fwd_weights, self.fwd_edges = \
+            _csr(n, self.edge_src, self.edge_dst, self.edge_len, edges)
+        self.fwd = (self.fwd_offsets, self.fwd_targets, self.fwd_weights)
+        self.rev = _csr(n, self.edge_dst, self.edge_src, self.edge_len, edges)
+
+        self.junction_of = {int(u): j for j, u in enumerate(self.junctions)}
+        # Interior vertex -> [(edge, index in geometry, meters from edge start)]
+        self.interior = {}
+        lat = self.node_lat
+        lng = self.node_lng
+        offsets = self.geom_offsets.tolist()
+        nodes = self.geom_nodes.tolist()
+        for e in range(len(self.edge_src)):
+            geom = nodes[offsets[e]:offsets[e + 1]]
+            along = 0.0
+            for i in range(1, len(geom) - 1):
+                a, b = geom[i - 1], geom[i]
+                along += geodesy.haversine_distance(lat[a], lng[a], lat[b], lng[b])
+                self.interior.setdefault(b, []).append((e, i, along))
+
+        # Only vertices that are part of an edge can be snapped to
+        self.routable = np.unique(self.geom_nodes)
+        rlat = lat[self.routable]
+        self.snap_scale = math.cos(math.radians(float(rlat.mean()))) if len(rlat) else 1.0
+
+    # --- Cache ---
+
+    def save(self, path):
+        np.savez(path, version=CACHE_VERSION, node_lat=self.node_lat, node_lng=self.node_lng,
+                 junctions=self.junctions, edge_src=self.edge_src, edge_dst=self.edge_dst,
+                 edge_len=self.edge_len, geom_offsets=self.geom_offsets, geom_nodes=self.geom_nodes,
+                 lm_from=self.lm_from, lm_to=self.lm_to)
+
+    def load(self, path):
+        with np.load(path) as data:
+            if int(data['version']) != CACHE_VERSION:
+                raise ValueError("Outdated graph cache")
+            for name in ('node_lat', 'node_lng', 'junctions', 'edge_src', 'edge_dst', 'edge_len',
+                         'geom_offsets', 'geom_nodes', 'lm_from', 'lm_to'):
+                setattr(self, name, data[name])
+        self._prepare()
+
+    # --- Queries ---
+
+    def nearest_node(self, lat, lng):
+        """
+        Closest routable road vertex and its distance in meters.
+        """
+        dy = self.node_lat[self.routable] - lat
+        dx = (self.node_lng[self.routable] - lng) * self.snap_scale
+        i = int(np.argmin(dx * dx + dy * dy))
+        node = int(self.routable[i])
+        return node, geodesy.haversine_distance(lat, lng, self.node_lat[node], self.node_lng[node])
+
+    def _heuristic(self, target):
+        """
+        ALT lower bound of the distance from every search node to `target`.
+        """
+        with np.errstate(invalid='ignore'):
+            h = np.fmax(self.lm_from[:, target][:, None] - self.lm_from,
+                        self.lm_to - self.lm_to[:, target][:, None])
+        h = np.nanmax(h, axis=0) if len(h) else np.zeros(len(self.junctions))
+        return np.maximum(np.nan_to_num(h, nan=0.0, posinf=INF), 0.0)
+
+    def _edge_geom(self, e, start=0, end=None):
+        geom = self.geom_nodes[self.geom_offsets[e]:self.geom_offsets[e + 1]]
+        return geom[start:end].tolist()
+
+    def shortest_path(self, source, target):
+        """
+        A* with ALT heuristic between two road vertices (junction or interior).
+        Returns (meters, [road vertex ids]) or None if unreachable.
+        """
+        if source == target:
+            return 0.0, [source]
+
+        # Start: a junction, or the far ends of the edges the vertex lies on
+        starts = [] # (search node, cost, geometry to get there)
+        if source in self.junction_of:
+            starts.append((self.junction_of[source], 0.0, [source]))
+        else:
+            for e, i, along in self.interior[source]:
+                starts.append((int(self.edge_dst[e]), float(self.edge_len[e]) - along, self._edge_geom(e, i)))
+
+        # Goal: a junction, or the near ends of the edges the vertex lies on
+        goals = {} # search node -> (extra cost, geometry from it)
+        if target in self.junction_of:
+            goals[self.junction_of[target]] = (0.0, [target])
+        else:
+            for e, i, along in self.interior[target]:
+                u = int(self.edge_src[e])
+                if u not in goals or along < goals[u][0]:
+                    goals[u] = (along, self._edge_geom(e, 0, i + 1))
+
+        best = INF
+        best_path = None
+        # Both ends on the same edge, in driving order
+        if source not in self.junction_of and target not in self.junction_of:
+            t_pos = {e: (i, along) for e, i, along in self.interior[target]}
+            for e, i, along in self.interior[source]:
+                if e in t_pos and t_pos[e][0] >= i:
+                    cost = t_pos[e][1] - along
+                    if cost < best:
+                        best = cost
+                        best_path = self._edge_geom(e, i, t_pos[e][0] + 1)
+
+        h = None
+        for goal, (extra, _) in goals.items():
+            hg = self._heuristic(goal) + extra
+            h = hg if h is None else np.minimum(h, hg)
+        h = h.tolist()
+
+        offsets, targets, weights, edges = self.fwd_offsets, self.fwd_targets, self.fwd_weights, self.fwd_edges
+        dist = {}
+        parent = {} # node -> (previous node or None, edge id or start index)
+        heap = []
+        for i, (node, cost, _) in enumerate(starts):
+            if cost < dist.get(node, INF):
+                dist[node] = cost
+                parent[node] = (None, i)
+                heapq.heappush(heap, (cost + h[node], cost, node))
+
+        best_goal = None
+        while heap:
+            f, g, u = heapq.heappop(heap)
+            if f >= best:
+                break
+            if g > dist.get(u, INF):
+                continue
+            if u in goals and g + goals[u][0] < best:
+                best = g + goals[u][0]
+                best_goal = u
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = g + weights[i]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    parent[v] = (u, edges[i])
+                    heapq.heappush(heap, (nd + h[v], nd, v))
+
+        if best_goal is not None:
+            # Walk back through the search tree, then expand edge geometry
+            chain = []
+            node = best_goal
+            while True:
+                prev, via = parent[node]
+                if prev is None:
+                    head = starts[via][2]
+                    break
+                chain.append(via)
+                node = prev
+            path = list(head)
+            for e in reversed(chain):
+                path.extend(self._edge_geom(e, 1))
+            path.extend(goals[best_goal][1][1:])
+            best_path = path
+
+        if best_path is None:
+            return None
+        return best, best_path
+
+
+class RoutePlanner:
+    def __init__(self, road_file=DEFAULT_ROAD_FILE, max_snap_distance=100.0):
+        self.road_file = road_file # Loaded by load() at startup, see subsystems.py
+        self.graph = None
+        self.max_snap_distance = max_snap_distance # meters from the road to start / end
+
+    def load(self):
+        """
+        Loads the default road extract. Returns None, or why routing is unavailable.
+        """
+        if not self.road_file or not os.path.exists(self.road_file):
+            return "no road extract, browser falls back to OSRM"
+        if not self.load_roads(self.road_file):
+            return "road graph failed to build"
+        return None
+
+    def load_roads(self, path):
+        """
+        Builds (or loads the cached) road graph for a GeoJSON / OSM PBF extract.
+        """
+        cache = path + '.graph.npz'
+        graph = RoadGraph()
+        start = time.time()
+        try:
+            if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+                try:
+                    graph.load(cache)
+                    print(f"[RoutePlanner] Loaded cached graph {cache} in {time.time() - start:.2f}s")
+                    self.graph = graph
+                    return True
+                except Exception as e:
+                    print(f"[RoutePlanner] Ignoring graph cache: {e}")
+
+            graph.build(read_roads(path))
+            print(f"[RoutePlanner] Built graph with {len(graph.junctions)} junctions, "
+                  f"{len(graph.edge_src)} edges from {path} in {time.time() - start:.2f}s")
+            try:
+                graph.save(cache)
+            except OSError as e:
+                print(f"[RoutePlanner] Could not write graph cache: {e}")
+        except Exception as e:
+            print(f"[RoutePlanner] Failed to build road graph from {path}: {e}")
+            return False
+
+        self.graph = graph
+        return True
+
+    def plan(self, start_lat, start_lng, end_lat, end_lng):
+        """
+        Returns {'distance': meters, 'waypoints': [{'lat', 'lng'}, ...]} or None
+        if either end is too far from a road or no route exists.
+        """
+        if self.graph is None:
+            return None
+        source, d_start = self.graph.nearest_node(start_lat, start_lng)
+        target, d_end = self.graph.nearest_node(end_lat, end_lng)
+        if d_start > self.max_snap_distance or d_end > self.max_snap_distance:
+            return None
+
+        result = self.graph.shortest_path(source, target)
+        if result is None:
+            return None
+        distance, path = result
+        lat = self.graph.node_lat
+        lng = self.graph.node_lng
+        return {
+            'distance': distance,
+            'waypoints': [{'lat': float(lat[n]), 'lng': float(lng[n])} for n in path],
+        }
+
+# Global instance
+route_planner = RoutePlanner()
+
+
+if __name__ == '__main__':
+    import sys
+
+    planner = RoutePlanner(sys.argv[1])
+    planner.load()
+    coords = [float(v) for v in sys.argv[2:6]]
+    t = time.perf_counter()
+    route = planner.plan(*coords)
+    elapsed = (time.perf_counter() - t) * 1000
+    if route is None:
+        print(f"No route found ({elapsed:.1f}ms)")
+    else:
+        print(f"{route['distance']:.0f}m, {len(route['waypoints'])} points in {elapsed:.1f}ms")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Production Server
+Runs the dashboard and API under gunicorn instead of Flask's development
+server (no debugger, HTTP/1.1 keep-alive, requests handled by a thread pool).
+
+There is always exactly one worker process: it owns the GPIO pins, the GPS
+serial port, the LCD and every other global singleton in app.py. Concurrency
+comes from the threads of that one process (gunicorn's gthread worker).
+
+Each open dashboard permanently holds two threads: one for /api/stream (SSE)
+and one for /ws/control (WebSocket). When every thread is taken, /api/mode
+and the HTTP stop path wait as well. The thread pool is therefore sized per
+dashboard: `--dashboards` (default 4) x 2 + REQUEST_THREADS for ordinary API
+calls. `--threads` overrides the total. A phone that reconnects can leave its
+old connections open for a while, so leave some headroom.
+
+The app is imported inside the worker (no preloading) and its subsystems
+are started in post_worker_init, so their threads live in the process that
+serves the requests.
+When the worker exits the motors are stopped and the GPIO released.
+
+`--switch-interval MS` lowers the interpreter's thread switch interval
+(default 5 ms) for the whole process, so a request thread holding the GIL
+delays a control scheduler tick by about that much instead. Off unless given:
+every thread then switches more often, which costs some request throughput.
+
+Without gunicorn installed this falls back to the threaded Werkzeug server
+(debug off).
+
+Usage:
+    python serve.py [--bind 0.0.0.0:5000] [--dashboards 4] [--threads N] [--keepalive 75]
+                    [--switch-interval 1]
+"""
+
+import sys
+import argparse
+
+try:
+    from gunicorn.app.base import BaseApplication
+    HAS_GUNICORN = True
+except ImportError:
+    HAS_GUNICORN = False
+
+DEFAULT_BIND = '0.0.0.0:5000'
+THREADS_PER_DASHBOARD = 2 # /api/stream + /ws/control
+REQUEST_THREADS = 4 # Short API requests (mode, stop, route, tiles, HTTP control)
+DEFAULT_DASHBOARDS = 4
+DEFAULT_THREADS = DEFAULT_DASHBOARDS * THREADS_PER_DASHBOARD + REQUEST_THREADS
+DEFAULT_KEEPALIVE = 75 # seconds an idle keep-alive connection stays open (joystick pauses)
+
+
+def post_worker_init(worker):
+    from app import announce_address
+    from subsystems import subsystems
+    subsystems.start()
+    bind = worker.cfg.bind[0]
+    if bind.startswith('unix:'):
+        return # Behind a local proxy, no network address to announce
+    announce_address(int(bind.rsplit(':', 1)[1]))
+
+def worker_exit(server, worker):
+    # Never leave the motors running when the server goes away
+    from car_controller import car
+    car.stop()
+    car.cleanup()
+
+
+def gunicorn_options(bind=DEFAULT_BIND, threads=DEFAULT_THREADS, keepalive=DEFAULT_KEEPALIVE, access_log=False):
+    return {
+        'bind': bind,
+        'workers': 1, # One process owns the hardware
+        'worker_class': 'gthread',
+        'threads': threads,
+        'keepalive': keepalive,
+        'preload_app': False,
+        'timeout': 30, # Worker heartbeat; long /api/stream responses are fine with gthread
+        'graceful_timeout': 5,
+        'accesslog': '-' if access_log else None, # Logging every joystick command costs more than handling it
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }
+
+
+if HAS_GUNICORN:
+    class CarServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+
+def serve(bind=DEFAULT_BIND, threads=DEFAULT_THREADS, keepalive=DEFAULT_KEEPALIVE, access_log=False):
+    if HAS_GUNICORN:
+        print(f"[Serve] gunicorn gthread, 1 worker x {threads} threads on {bind}")
+        CarServer(gunicorn_options(bind, threads, keepalive, access_log)).run()
+        return
+
+    if bind.startswith('unix:'):
+        raise SystemExit("[Serve] A unix: bind needs gunicorn")
+    print("[Serve] gunicorn not installed, using the threaded Werkzeug server")
+    from app import app, announce_address
+    from subsystems import subsystems
+    subsystems.start()
+    host, port = bind.rsplit(':', 1)
+    announce_address(int(port))
+    app.run(host=host, port=int(port), threaded=True, debug=False, use_reloader=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the car's web server")
+    parser.add_argument('--bind', default=DEFAULT_BIND, help="host:port, or unix:PATH behind a proxy")
+    parser.add_argument('--dashboards', type=int, default=DEFAULT_DASHBOARDS,
+                        help=f"open dashboards to size the thread pool for ({THREADS_PER_DASHBOARD} threads each)")
+    parser.add_argument('--threads', type=int, help="total threads in the single worker (overrides --dashboards)")
+    parser.add_argument('--keepalive', type=int, default=DEFAULT_KEEPALIVE, help="idle keep-alive seconds")
+    parser.add_argument('--switch-interval', type=float,
+                        help="thread switch interval in ms (default: interpreter's 5 ms)")
+    parser.add_argument('--access-log', action='store_true', help="log every request to stdout")
+    args = parser.parse_args()
+    if args.switch_interval is not None:
+        if args.switch_interval <= 0:
+            parser.error("--switch-interval must be above 0 ms")
+        # Before the app (and its threads) are loaded in the worker
+        sys.setswitchinterval(args.switch_interval / 1000.0)
+        print(f"[Serve] Thread switch interval {args.switch_interval} ms")
+    threads = args.threads or args.dashboards * THREADS_PER_DASHBOARD + REQUEST_THREADS
+    serve(args.bind, threads, args.keepalive, args.access_log)
@@ -30,4 +30,4 @@ echo "5. Reboot"
 echo "---------------------------------------------------"
 echo "To run the app:"
 echo "source env/bin/activate"
-echo "python app.py"
+echo "python serve.py"
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Vehicle Kinematics Simulator
+Turns CarController commands into synthetic GPS fixes with a kinematic
+bicycle model, so GPSReader + Navigator can be exercised without the car.
+
+Two ways to use it:
+  * run_route(): deterministic, single-threaded stepping of the real
+    parse path and navigator logic in simulated time (a route takes seconds).
+  * SimulatedSerial: a readline() source for GPSReader.serial_factory that
+    drives the full threaded app against the model at `speed` x real time.
+
+Usage:
+    python simulator.py route.json          # [{"lat": .., "lng": ..}, ...]
+"""
+
+import math
+import time
+import json
+import argparse
+import geodesy
+from vehicle_model import BicycleModel
+
+KNOTS_PER_MPS = 1.0 / 0.514444
+
+
+def nmea_checksum(body):
+    c = 0
+    for ch in body.encode('ascii'):
+        c ^= ch
+    return f"${body}*{c:02X}\r\n".encode('ascii')
+
+def _nmea_time(seconds):
+    seconds = seconds % 86400
+    h = int(seconds // 3600)
+    m = int(seconds % 3600 // 60)
+    return f"{h:02d}{m:02d}{seconds % 60:05.2f}"
+
+def _nmea_coord(value, is_lat):
+    hemi = ('N' if value >= 0 else 'S') if is_lat else ('E' if value >= 0 else 'W')
+    value = abs(value)
+    deg = int(value)
+    minutes = (value - deg) * 60
+    if is_lat:
+        return f"{deg:02d}{minutes:07.4f},{hemi}"
+    return f"{deg:03d}{minutes:07.4f},{hemi}"
+
+def format_gga(fix_time, lat, lng):
+    return nmea_checksum(f"GPGGA,{_nmea_time(fix_time)},{_nmea_coord(lat, True)},{_nmea_coord(lng, False)},1,08,0.9,0.0,M,0.0,M,,")
+
+def format_rmc(fix_time, lat, lng, speed_knots, course):
+    return nmea_checksum(f"GPRMC,{_nmea_time(fix_time)},A,{_nmea_coord(lat, True)},{_nmea_coord(lng, False)},"
+                         f"{speed_knots:.2f},{course:.1f},010126,,,A")
+
+
+class Simulator:
+    def __init__(self, origin_lat, origin_lng, heading=0.0, gps_rate_hz=1.0, model=None):
+        self.model = model or BicycleModel()
+        self.model.heading = heading
+        self.origin = (origin_lat, origin_lng)
+        self.m_per_deg_lat = math.pi * geodesy.EARTH_RADIUS / 180.0
+        self.m_per_deg_lng = self.m_per_deg_lat * math.cos(math.radians(origin_lat))
+        self.gps_period = 1.0 / gps_rate_hz
+        self.sim_time = 0.0
+        self.start_fix_time = 12 * 3600.0 # Fix timestamps start at 12:00:00 UTC
+
+    def position(self):
+        return (self.origin[0] + self.model.y / self.m_per_deg_lat,
+                self.origin[1] + self.model.x / self.m_per_deg_lng)
+
+    def step(self, speed_cmd, steering_cmd, dt):
+        self.model.step(speed_cmd, steering_cmd, dt)
+        self.sim_time += dt
+
+    def nmea_epoch(self):
+        """
+        The GGA + RMC pair a receiver would send for the current model state.
+        """
+        lat, lng = self.position()
+        fix_time = self.start_fix_time + self.sim_time
+        speed_knots = abs(self.model.v) * KNOTS_PER_MPS
+        return [format_gga(fix_time, lat, lng),
+                format_rmc(fix_time, lat, lng, speed_knots, self.model.heading)]
+
+    def run_route(self, waypoints, max_time=600.0, control_dt=0.1):
+        """
+        Drives the real Navigator over `waypoints` in simulated time.
+        Everything runs on the calling thread, so results are deterministic.
+        """
+        from gps_reader import gps_reader
+        from navigator import navigator
+        from car_controller import car
+        from state_machine import state_machine
+
+        state_machine.set_mode('AUTONOMOUS')
+        navigator.set_route(waypoints)
+        navigator.is_navigating = True
+        navigator.last_visited_wp = {'lat': self.origin[0], 'lng': self.origin[1]}
+
+        last_seq = gps_reader.get_fix().seq
+        ticks_per_fix = max(1, int(round(self.gps_period / control_dt)))
+        tick = 0
+        completed = False
+        while navigator.is_navigating and self.sim_time < max_time:
+            if tick % ticks_per_fix == 0:
+                for line in self.nmea_epoch():
+                    gps_reader.process_line(line, recv_time=self.sim_time)
+
+            fix = gps_reader.get_fix()
+            if fix.seq != last_seq:
+                last_seq = fix.seq
+                if not navigator._on_fix(fix):
+                    completed = True
+                    break
+
+            navigator._actuate()
+            self.step(car.current_speed, car.current_steering, control_dt)
+            tick += 1
+
+        navigator.is_navigating = False
+        car.stop()
+        lat, lng = self.position()
+        last = waypoints[-1]
+        return {
+            'completed': completed,
+            'sim_time': round(self.sim_time, 2),
+            'waypoint_index': navigator.current_waypoint_index,
+            'final_lat': lat,
+            'final_lng': lng,
+            'distance_to_goal': geodesy.haversine_distance(lat, lng, last['lat'], last['lng']),
+        }
+
+
+class SimulatedSerial:
+    """
+    readline() source for GPSReader.serial_factory that follows the live
+    CarController commands. Emits one NMEA epoch per GPS period, at
+    `speed` x real time.
+    """
+    def __init__(self, simulator, car, speed=1.0, physics_dt=0.05):
+        self.sim = simulator
+        self.car = car
+        self.speed = speed
+        self.physics_dt = physics_dt
+        self.pending = []
+        self.next_wall = time.monotonic()
+
+    def __repr__(self):
+        return f"SimulatedSerial(origin={self.sim.origin}, speed={self.speed})"
+
+    def readline(self):
+        if not self.pending:
+            self.next_wall += self.sim.gps_period / self.speed
+            delay = self.next_wall - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            steps = int(round(self.sim.gps_period / self.physics_dt))
+            for _ in range(steps):
+                self.sim.step(self.car.current_speed, self.car.current_steering, self.physics_dt)
+            self.pending = self.sim.nmea_epoch()
+        return self.pending.pop(0)
+
+    def close(self):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a route against the simulated car")
+    parser.add_argument('route', help="JSON list of {lat, lng} waypoints")
+    parser.add_argument('--max-time', type=float, default=600.0, help="Simulated seconds before giving up")
+    args = parser.parse_args()
+
+    with open(args.route) as f:
+        waypoints = json.load(f)
+
+    start = waypoints[0]
+    heading = geodesy.calculate_bearing(start['lat'], start['lng'], waypoints[-1]['lat'], waypoints[-1]['lng'])
+    sim = Simulator(start['lat'], start['lng'], heading=heading)
+
+    wall = time.monotonic()
+    result = sim.run_route(waypoints, max_time=args.max_time)
+    print(json.dumps(result, indent=2))
+    print(f"Simulated {result['sim_time']:.0f}s in {time.monotonic() - wall:.2f}s")
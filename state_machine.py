@@ -1,4 +1,5 @@
 from enum import Enum
+from trip_recorder import trip_recorder
 
 class CarMode(Enum):
     MANUAL = "MANUAL"
@@ -23,6 +24,7 @@ class StateMachine:
     def set_mode(self, mode_str):
         try:
             self.current_mode = CarMode(mode_str)
+            trip_recorder.record_mode(self.current_mode.value)
             return True
         except ValueError:
             return False
@@ -1,8 +1,10 @@
 document.addEventListener('DOMContentLoaded', () => {
     // --- Configuration ---
     const DEFAULT_ZOOM = 13;
-    const POLLING_INTERVAL = 500; // ms
+    const POLLING_INTERVAL = 500; // ms (only used when the event stream is unavailable)
     const DEFAULT_SPEED_LIMIT = 20;
+    const CONTROL_INTERVAL = 50; // ms between manual commands (joystick events are coalesced)
+    const CONTROL_INTERVAL_WS = 20; // ms between manual commands over the WebSocket channel
 
     // --- State ---
     let map;
@@ -19,6 +21,14 @@ document.addEventListener('DOMContentLoaded', () => {
     // Control State
     let currentSpeed = 0;
     let currentAngle = 0;
+    const controlClientId = Math.random().toString(36).slice(2); // Server drops commands older than the last seq seen from this id
+    let controlSeq = 0;
+    let lastControlSent = 0;
+    let controlTimer = null;
+    let controlSocket = null; // Binary control channel, HTTP POST is used while it is down
+    let controlSocketRetry = 1000; // ms, doubles up to 30 s while the server has no WebSocket
+    let lastRtt = 0; // ms, latest measured round trip (reported back to the car)
+    let smoothedRtt = null;
 
     // --- DOM Elements ---
     const calcBtn = document.getElementById('calc-route-btn');
@@ -32,6 +42,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const motionStateEl = document.getElementById('motion-state');
     const currentModeEl = document.getElementById('current-mode');
     const gpsStatusEl = document.getElementById('gps-status');
+    const linkStatusEl = document.getElementById('link-status');
     const hudLat = document.getElementById('hud-lat');
     const hudLng = document.getElementById('hud-lng');
     const hudSpeed = document.getElementById('hud-speed');
@@ -67,7 +78,8 @@ document.addEventListener('DOMContentLoaded', () => {
     setTimeout(initJoystick, 500);
     setupEventListeners();
     updateConfig(); // Sync initial slider
-    startPolling();
+    startUpdates();
+    connectControlSocket();
     locateUser();
 
     // Set initial UI for mode
@@ -76,15 +88,14 @@ document.addEventListener('DOMContentLoaded', () => {
     function initMap() {
         map = L.map('map').setView([20.5937, 78.9629], 5);
 
-        // Map Tile Providers
-        const darkUrl = 'https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png';
-        // Switched to CartoDB Positron for cleaner look and better reliability
-        const lightUrl = 'https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png';
+        // Map tiles are served (and cached) by the car, see tile_server.py
+        const darkUrl = '/tiles/dark/{z}/{x}/{y}.png';
+        // CartoDB Positron for cleaner look and better reliability
+        const lightUrl = '/tiles/{z}/{x}/{y}.png';
 
         // Init with Light Theme (since isDarkTheme = false now)
         tileLayer = L.tileLayer(isDarkTheme ? darkUrl : lightUrl, {
             attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/attributions">CARTO</a>',
-            subdomains: 'abcd',
             maxZoom: 20
         }).addTo(map);
 
@@ -132,7 +143,7 @@ document.addEventListener('DOMContentLoaded', () => {
         joyManager.on('end', () => {
             if (currentMode !== 'MANUAL') return;
             currentAngle = 0;
-            sendControl();
+            sendControl(true);
         });
     }
 
@@ -219,7 +230,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function stopMotor() {
         currentSpeed = 0;
-        sendControl();
+        sendControl(true);
     }
 
     // --- API Calls ---
@@ -241,15 +252,84 @@ document.addEventListener('DOMContentLoaded', () => {
             .catch(err => console.error('Error setting mode:', err));
     }
 
-    function sendControl() {
+    function sendControl(immediate = false) {
+        // At most one command per CONTROL_INTERVAL; the latest state is always sent last.
+        // Stops (immediate) go out at once.
+        const interval = controlSocket ? CONTROL_INTERVAL_WS : CONTROL_INTERVAL;
+        const wait = lastControlSent + interval - performance.now();
+        if (!immediate && wait > 0) {
+            if (!controlTimer) controlTimer = setTimeout(flushControl, wait);
+            return;
+        }
+        flushControl();
+    }
+
+    function flushControl() {
+        if (controlTimer) {
+            clearTimeout(controlTimer);
+            controlTimer = null;
+        }
+        lastControlSent = performance.now();
+        controlSeq++;
+        if (controlSocket && controlSocket.readyState === WebSocket.OPEN) {
+            // seq, speed, angle, sent time, last round trip (see control_channel.py)
+            const frame = new DataView(new ArrayBuffer(24));
+            frame.setUint32(0, controlSeq, true);
+            frame.setFloat32(4, currentSpeed, true);
+            frame.setFloat32(8, currentAngle, true);
+            frame.setFloat64(12, performance.now(), true);
+            frame.setFloat32(20, lastRtt, true);
+            controlSocket.send(frame.buffer);
+            return;
+        }
         // Send composite state
         fetch('/api/control', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ speed: currentSpeed, angle: currentAngle })
+            body: JSON.stringify({ speed: currentSpeed, angle: currentAngle, client: controlClientId, seq: controlSeq })
         }).catch(err => console.error(err));
     }
 
+    function connectControlSocket() {
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const ws = new WebSocket(`${protocol}//${location.host}/ws/control?client=${controlClientId}`);
+        ws.binaryType = 'arraybuffer';
+
+        ws.onopen = () => {
+            controlSocket = ws;
+            controlSocketRetry = 1000;
+            updateLinkStatus();
+        };
+
+        ws.onmessage = (evt) => {
+            // Ack: seq, echoed sent time, status
+            if (!(evt.data instanceof ArrayBuffer) || evt.data.byteLength !== 13) return;
+            const ack = new DataView(evt.data);
+            lastRtt = performance.now() - ack.getFloat64(4, true);
+            smoothedRtt = smoothedRtt === null ? lastRtt : smoothedRtt * 0.8 + lastRtt * 0.2;
+            updateLinkStatus();
+        };
+
+        ws.onclose = () => {
+            if (controlSocket === ws) controlSocket = null;
+            smoothedRtt = null;
+            updateLinkStatus();
+            setTimeout(connectControlSocket, controlSocketRetry);
+            controlSocketRetry = Math.min(controlSocketRetry * 2, 30000);
+        };
+    }
+
+    function updateLinkStatus() {
+        if (!linkStatusEl) return;
+        if (!controlSocket) {
+            linkStatusEl.textContent = "HTTP";
+        } else if (smoothedRtt === null) {
+            linkStatusEl.textContent = "WS";
+        } else {
+            linkStatusEl.textContent = `WS ${smoothedRtt.toFixed(1)} ms`;
+        }
+    }
+
     function updateConfig() {
         fetch('/api/config', {
             method: 'POST',
@@ -261,33 +341,67 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    function applyState(data) {
+        motionStateEl.textContent = data.motion_state.replace('_', ' ');
+
+        if (data.mode !== currentMode) {
+            updateModeUI(data.mode);
+        }
+    }
+
+    function applyLocation(loc) {
+        if (mainUserUpdate(loc)) {
+            gpsStatusEl.textContent = "LOCKED";
+            gpsStatusEl.style.color = "#2ed573";
+        } else {
+            gpsStatusEl.textContent = "SEARCHING";
+            gpsStatusEl.style.color = "#ffa502";
+        }
+    }
+
     function updateState() {
         fetch('/api/state')
             .then(res => res.json())
-            .then(data => {
-                motionStateEl.textContent = data.motion_state.replace('_', ' ');
-
-                if (data.mode !== currentMode) {
-                    updateModeUI(data.mode);
-                }
-            })
+            .then(applyState)
             .catch(console.error);
 
         fetch('/api/location')
             .then(res => res.json())
-            .then(loc => {
-                if (mainUserUpdate(loc)) {
-                    gpsStatusEl.textContent = "LOCKED";
-                    gpsStatusEl.style.color = "#2ed573";
-                } else {
-                    gpsStatusEl.textContent = "SEARCHING";
-                    gpsStatusEl.style.color = "#ffa502";
-                }
-            });
+            .then(applyLocation)
+            .catch(console.error);
     }
 
+    let pollingTimer = null;
+
     function startPolling() {
-        setInterval(updateState, POLLING_INTERVAL);
+        if (pollingTimer) return;
+        pollingTimer = setInterval(updateState, POLLING_INTERVAL);
+    }
+
+    function stopPolling() {
+        if (!pollingTimer) return;
+        clearInterval(pollingTimer);
+        pollingTimer = null;
+    }
+
+    function startUpdates() {
+        // Prefer server push; poll only while the stream is down
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+
+        const source = new EventSource('/api/stream');
+        source.addEventListener('state', e => applyState(JSON.parse(e.data)));
+        source.addEventListener('location', e => applyLocation(JSON.parse(e.data)));
+        source.onopen = () => stopPolling();
+        source.onerror = () => {
+            startPolling();
+            // CLOSED means the browser gave up (e.g. endpoint missing), so stay on polling
+            if (source.readyState === EventSource.CLOSED) {
+                source.close();
+            }
+        };
     }
 
     // --- UI Logic ---
@@ -336,8 +450,13 @@ document.addEventListener('DOMContentLoaded', () => {
             hudSpeed.innerHTML = `${loc.speed.toFixed(1)} <small>km/h</small>`;
         }
 
+        // Show the road-snapped position on the map when the matcher has one
+        const markerPos = (loc.snapped_lat != null && loc.snapped_lng != null)
+            ? [loc.snapped_lat, loc.snapped_lng]
+            : [loc.lat, loc.lng];
+
         if (!userMarker) {
-            userMarker = L.marker([loc.lat, loc.lng], {
+            userMarker = L.marker(markerPos, {
                 icon: L.divIcon({
                     className: 'car-icon',
                     html: '🚗',
@@ -347,7 +466,7 @@ document.addEventListener('DOMContentLoaded', () => {
             map.setView([loc.lat, loc.lng], DEFAULT_ZOOM);
             hasZooomedToCar = true;
         } else {
-            userMarker.setLatLng([loc.lat, loc.lng]);
+            userMarker.setLatLng(markerPos);
             // Auto-follow if not zoomed yet or if tracking mode (optional)
             // For now, only zoom once on first lock
             if (!hasZooomedToCar) {
@@ -391,6 +510,36 @@ document.addEventListener('DOMContentLoaded', () => {
 
         loader.classList.remove('hidden');
 
+        // Plan on the car first (offline road graph), OSRM only if the car has no map
+        fetch('/api/route', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ start: userLocation, end: destinationLocation })
+        })
+            .then(res => {
+                if (res.status === 503) return null;
+                return res.json();
+            })
+            .then(data => {
+                if (data === null) {
+                    calculateRouteOSRM();
+                    return;
+                }
+                loader.classList.add('hidden');
+                if (data.status === 'success') {
+                    drawRoute(data.geometry);
+                    startTravelBtn.classList.remove('hidden');
+                } else {
+                    alert(data.message || "No route found!");
+                }
+            })
+            .catch(err => {
+                console.error('Onboard routing failed, trying OSRM:', err);
+                calculateRouteOSRM();
+            });
+    }
+
+    function calculateRouteOSRM() {
         const start = `${userLocation.lng},${userLocation.lat}`;
         const end = `${destinationLocation.lng},${destinationLocation.lat}`;
         const url = `https://router.project-osrm.org/route/v1/driving/${start};${end}?overview=full&geometries=geojson`;
@@ -429,7 +578,7 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
 
-        // Convert OSRM [lng, lat] to [{lat, lng}]
+        // Convert GeoJSON [lng, lat] to [{lat, lng}]
         const waypoints = currentRouteGeoJSON.coordinates.map(coord => ({
             lat: coord[1],
             lng: coord[0]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Subsystem Registry
+Starts the car's devices and data sets concurrently at app startup and keeps
+a ready / degraded / failed status per subsystem for /api/health.
+
+Each subsystem is a cheap, already constructed object plus an init function
+(GPIO setup, LCD over I2C, GPS negotiation, road graph build, ...). The init
+functions run on their own threads, so the slow ones (serial negotiation,
+parsing the road extract) overlap instead of adding up, and Flask can start
+serving as soon as the modules are imported.
+
+An init function returns None when the subsystem is fully up, a short reason
+string when it runs in a reduced mode (e.g. mock GPIO, no road extract), and
+raises when it failed. An optional check function reports live problems
+afterwards (e.g. no GPS fix yet).
+
+Usage:
+    subsystems.register('car', car.init_hardware)
+    subsystems.start() # returns at once
+    subsystems.status()
+"""
+
+import time
+import threading
+
+PENDING = 'pending'
+STARTING = 'starting'
+READY = 'ready'
+DEGRADED = 'degraded'
+FAILED = 'failed'
+
+
+class Subsystem:
+    def __init__(self, name, init, check=None):
+        self.name = name
+        self.init = init
+        self.check = check
+        self.status = PENDING
+        self.detail = None
+        self.seconds = None # Time the init function took
+        self.done = threading.Event()
+
+    def run(self):
+        self.status = STARTING
+        start = time.monotonic()
+        try:
+            reason = self.init()
+        except Exception as e:
+            self.status = FAILED
+            self.detail = f"{type(e).__name__}: {e}"
+            print(f"[Subsystems] {self.name} failed: {self.detail}")
+        else:
+            self.status = READY if reason is None else DEGRADED
+            self.detail = reason
+        self.seconds = time.monotonic() - start
+        self.done.set()
+
+    def to_dict(self):
+        status, detail = self.status, self.detail
+        if status in (READY, DEGRADED) and self.check:
+            try:
+                problem = self.check()
+            except Exception as e:
+                problem = str(e)
+            if problem:
+                status = DEGRADED
+                detail = f"{detail}; {problem}" if detail else problem
+        return {
+            'status': status,
+            'detail': detail,
+            'seconds': round(self.seconds, 4) if self.seconds is not None else None,
+        }
+
+
+class SubsystemRegistry:
+    def __init__(self):
+        self.subsystems = {} # name -> Subsystem, in registration order
+        self.lock = threading.Lock()
+        self.import_seconds = None # Set by app.py: time spent importing the app modules
+        self.start_time = None
+        self.startup_seconds = None # Wall time until every init function returned
+
+    def register(self, name, init, check=None):
+        if self.start_time is not None:
+            raise RuntimeError("Subsystems already started")
+        self.subsystems[name] = Subsystem(name, init, check)
+
+    def start(self):
+        """
+        Runs every init function on its own thread. Returns immediately.
+        """
+        if self.start_time is not None:
+            return
+        self.start_time = time.monotonic()
+        for subsystem in self.subsystems.values():
+            thread = threading.Thread(target=self._run, args=(subsystem,), name=f"init-{subsystem.name}")
+            thread.daemon = True
+            thread.start()
+
+    def _run(self, subsystem):
+        subsystem.run()
+        with self.lock:
+            if self.startup_seconds is not None or not all(s.done.is_set() for s in self.subsystems.values()):
+                return
+            self.startup_seconds = time.monotonic() - self.start_time
+        # Last one to finish prints the breakdown
+        parts = ', '.join(f"{s.name} {s.status} {s.seconds:.2f}s" for s in self.subsystems.values())
+        print(f"[Subsystems] Started in {self.startup_seconds:.2f}s: {parts}")
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every init function has returned. False on timeout.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        for subsystem in self.subsystems.values():
+            remaining = None if end is None else max(0.0, end - time.monotonic())
+            if not subsystem.done.wait(remaining):
+                return False
+        return True
+
+    def status(self):
+        subsystems = {name: s.to_dict() for name, s in self.subsystems.items()}
+        states = [s['status'] for s in subsystems.values()]
+        if any(state in (PENDING, STARTING) for state in states):
+            state = STARTING
+        elif FAILED in states:
+            state = FAILED
+        elif DEGRADED in states:
+            state = DEGRADED
+        else:
+            state = READY
+        return {
+            'status': state,
+            'import_seconds': round(self.import_seconds, 4) if self.import_seconds is not None else None,
+            'startup_seconds': round(self.startup_seconds, 4) if self.startup_seconds is not None else None,
+            'subsystems': subsystems,
+        }
+
+# Global instance
+subsystems = SubsystemRegistry()
@@ -0,0 +1,106 @@
+import time
+import threading
+import numpy as np
+
+# Record kinds and the meaning of their value fields (a, b, c, d)
+NAV = 1 # Navigator, once per new fix
+MOTOR = 2 # Motor command
+STEERING = 3 # Steering command
+GPS_ERROR = 4 # Serial / parse error in GPSReader
+
+KINDS = {
+    NAV: ('nav', ('waypoint', 'dist_to_wp', 'remaining', 'steering')),
+    MOTOR: ('motor', ('speed',)),
+    STEERING: ('steering', ('angle',)),
+    GPS_ERROR: ('gps_error', ('stage',)),
+}
+KIND_IDS = {name: kind for kind, (name, _) in KINDS.items()}
+
+RECORD_DTYPE = np.dtype([
+    ('t', 'f8'), # time.monotonic()
+    ('kind', 'u1'),
+    ('a', 'f8'),
+    ('b', 'f8'),
+    ('c', 'f8'),
+    ('d', 'f8'),
+])
+
+
+class Telemetry:
+    """
+    Preallocated ring buffer of typed telemetry records.
+
+    record() only stores numbers into the next slot - no string formatting,
+    no printing - so it is safe to call from the nav loop and the motor
+    drivers. A background sink prints at most one summary line per kind
+    every `log_interval` seconds, and /api/telemetry reads the buffer.
+    """
+    def __init__(self, size=4096, log_interval=2.0):
+        self.buffer = np.zeros(size, dtype=RECORD_DTYPE)
+        self.size = size
+        self.count = 0 # Total records ever written (next slot = count % size)
+        self.lock = threading.Lock()
+        self.notes = {} # kind -> last error object, formatted only by the sink
+
+        self.log_interval = log_interval
+        self.logged_count = 0
+        self.thread = threading.Thread(target=self._log_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def record(self, kind, a=0.0, b=0.0, c=0.0, d=0.0, note=None):
+        with self.lock:
+            self.buffer[self.count % self.size] = (time.monotonic(), kind, a, b, c, d)
+            self.count += 1
+        if note is not None:
+            self.notes[kind] = note
+
+    def last(self, n=100, kind=None):
+        """
+        Returns up to n most recent records (oldest first) as dicts.
+        """
+        with self.lock:
+            count = self.count
+            available = min(count, self.size)
+            idx = (np.arange(count - available, count)) % self.size
+            records = self.buffer[idx].copy()
+
+        if kind is not None:
+            records = records[records['kind'] == kind]
+        records = records[-n:] if n > 0 else records[:0]
+
+        out = []
+        for r in records:
+            name, fields = KINDS.get(int(r['kind']), ('unknown', ()))
+            entry = {'t': float(r['t']), 'kind': name}
+            for field, key in zip(fields, ('a', 'b', 'c', 'd')):
+                entry[field] = float(r[key])
+            out.append(entry)
+        return out
+
+    def _log_loop(self):
+        while True:
+            time.sleep(self.log_interval)
+            with self.lock:
+                new = self.count - self.logged_count
+                if new <= 0:
+                    continue
+                new = min(new, self.size)
+                idx = np.arange(self.count - new, self.count) % self.size
+                records = self.buffer[idx].copy()
+                self.logged_count = self.count
+
+            # Latest record per kind, plus how many were folded into it
+            for kind in np.unique(records['kind']):
+                of_kind = records[records['kind'] == kind]
+                r = of_kind[-1]
+                name, fields = KINDS.get(int(kind), ('unknown', ()))
+                values = ' | '.join(f"{field}:{float(r[key]):.2f}" for field, key in zip(fields, ('a', 'b', 'c', 'd')))
+                line = f"[{name.upper()}] {values} (x{len(of_kind)})"
+                note = self.notes.pop(int(kind), None)
+                if note is not None:
+                    line += f" {note}"
+                print(line)
+
+# Global instance
+telemetry = Telemetry()
@@ -0,0 +1,103 @@
+import time
+import pytest
+import car_controller as car_module
+from car_controller import CachedPWM, ServoScheduler, CarController
+
+
+class CountingPWM:
+    """
+    Stands in for GPIO.PWM and records every duty cycle written.
+    """
+    instances = []
+
+    def __init__(self, pin=None, freq=None):
+        self.pin = pin
+        self.writes = []
+        CountingPWM.instances.append(self)
+
+    def start(self, duty):
+        pass
+
+    def ChangeDutyCycle(self, duty):
+        self.writes.append(duty)
+
+    def stop(self):
+        pass
+
+
+def wait_for(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < end:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_cached_pwm_skips_unchanged_duty():
+    pwm = CountingPWM()
+    cached = CachedPWM(pwm)
+    cached.start(0)
+    for duty in (0, 40, 40, 40, 0, 0, 40):
+        cached.ChangeDutyCycle(duty)
+    assert pwm.writes == [40, 0, 40]
+
+
+@pytest.fixture
+def servo():
+    pwm = CountingPWM()
+    scheduler = ServoScheduler(CachedPWM(pwm), relax_delay=0.05)
+    yield scheduler, pwm
+    scheduler.stop()
+
+
+def test_servo_relaxes_after_delay(servo):
+    scheduler, pwm = servo
+    scheduler.set_duty(7.5)
+    assert pwm.writes == [7.5]
+    assert wait_for(lambda: pwm.writes == [7.5, 0])
+    assert scheduler.deadline is None
+
+
+def test_repeated_servo_command_is_a_no_op(servo):
+    scheduler, pwm = servo
+    scheduler.set_duty(7.5)
+    deadline = scheduler.deadline
+    for _ in range(100):
+        scheduler.set_duty(7.5)
+    # No GPIO writes and the relax deadline is not pushed back
+    assert pwm.writes == [7.5]
+    assert scheduler.deadline == deadline
+    assert wait_for(lambda: pwm.writes == [7.5, 0])
+
+    # Holding the position it relaxed at does not wake the servo either
+    scheduler.set_duty(7.5)
+    time.sleep(0.08)
+    assert pwm.writes == [7.5, 0]
+
+
+def test_new_servo_command_rearms_relax(servo):
+    scheduler, pwm = servo
+    scheduler.set_duty(7.5)
+    scheduler.set_duty(9.0)
+    assert pwm.writes == [7.5, 9.0]
+    assert wait_for(lambda: pwm.writes == [7.5, 9.0, 0])
+
+
+def test_controller_writes_only_changes(monkeypatch):
+    CountingPWM.instances = []
+    monkeypatch.setattr(car_module.GPIO, 'PWM', CountingPWM)
+    controller = CarController()
+    controller._setup_gpio()
+    controller.mock_mode = False
+    forward, backward, servo_pwm = CountingPWM.instances
+    try:
+        for _ in range(10):
+            controller.set_speed(50)
+            controller.set_steering(0.0)
+        assert forward.writes == [50]
+        assert backward.writes == [] # Already 0 since start()
+        assert servo_pwm.writes == [7.5]
+
+        controller.set_speed(-20)
+        assert (forward.writes, backward.writes) == ([50, 0], [20])
+    finally:
+        controller.servo_scheduler.stop()
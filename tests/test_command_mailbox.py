@@ -0,0 +1,104 @@
+import math
+import threading
+import pytest
+from command_mailbox import CommandMailbox, valid_command
+from car_controller import car
+from state_machine import state_machine, CarMode
+
+
+@pytest.fixture
+def manual(monkeypatch):
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.MANUAL)
+    monkeypatch.setattr(state_machine, 'max_speed', 100)
+    monkeypatch.setattr(state_machine, 'max_turn', 100)
+    car.stop()
+    yield
+    car.stop()
+
+
+def test_stale_seq_rejected_per_client():
+    mailbox = CommandMailbox()
+    assert mailbox.submit(10, 0, 'a', 5)
+    assert not mailbox.submit(20, 0, 'a', 5)
+    assert not mailbox.submit(20, 0, 'a', 4)
+    assert mailbox.submit(30, 0, 'b', 1) # Other client, own sequence
+    assert mailbox.submit(40, 0, 'a', 6)
+    assert mailbox.stale == 2
+
+
+def test_commands_without_seq_always_accepted():
+    mailbox = CommandMailbox()
+    assert mailbox.submit(10, 0, 'a', 5)
+    assert mailbox.submit(0, 0)
+    assert mailbox.submit(0, 0)
+
+
+def test_client_map_evicts_least_recently_active():
+    mailbox = CommandMailbox(max_clients=2)
+    mailbox.submit(0, 0, 'a', 10)
+    mailbox.submit(0, 0, 'b', 10)
+    mailbox.submit(0, 0, 'a', 11) # 'a' is now the most recent
+    mailbox.submit(0, 0, 'c', 10) # Evicts 'b'
+    assert list(mailbox.last_seq) == ['a', 'c']
+    assert mailbox.submit(0, 0, 'b', 1) # Forgotten, so accepted again
+    assert not mailbox.submit(0, 0, 'c', 10)
+
+
+def test_latest_command_replaces_pending_one():
+    mailbox = CommandMailbox()
+    for speed in (10, 20, 30):
+        mailbox.submit(speed, 0.5)
+    command = mailbox.mailbox.get_latest(timeout=0)
+    assert (command.speed, command.angle) == (30, 0.5)
+    assert mailbox.mailbox.get_latest(timeout=0) is None
+    assert mailbox.stats()['superseded'] == 2
+
+
+@pytest.mark.parametrize('speed, angle', [
+    (math.nan, 0), (math.inf, 0), (-math.inf, 0), (0, math.nan), (101, 0), (0, 1.5), ('10', 0), (None, 0),
+])
+def test_invalid_values_rejected(speed, angle):
+    mailbox = CommandMailbox()
+    assert not valid_command(speed, angle)
+    with pytest.raises(ValueError):
+        mailbox.submit(speed, angle, 'a', 1)
+    assert len(mailbox.mailbox) == 0
+    assert 'a' not in mailbox.last_seq # An invalid command does not consume the seq
+
+
+def test_apply_drives_car_with_limits(manual, monkeypatch):
+    monkeypatch.setattr(state_machine, 'max_speed', 50)
+    mailbox = CommandMailbox()
+    mailbox.submit(40, -0.5)
+    mailbox._apply(mailbox.mailbox.get_latest(timeout=0))
+    assert car.current_speed == 20
+    assert car.current_steering == -0.5
+    assert mailbox.applied == 1
+
+
+def test_command_dropped_after_mode_change(manual):
+    mailbox = CommandMailbox()
+    mailbox.submit(50, 0)
+    command = mailbox.mailbox.get_latest(timeout=0)
+    state_machine.current_mode = CarMode.AUTONOMOUS
+    mailbox._apply(command)
+    assert car.current_speed == 0
+    assert mailbox.applied == 0
+
+
+def test_mode_switch_under_lock_wins_over_pending_apply(manual):
+    mailbox = CommandMailbox()
+    mailbox.submit(50, 0)
+    command = mailbox.mailbox.get_latest(timeout=0)
+
+    # What /api/mode does: switch, then reset + stop under the actuation lock
+    with mailbox.actuation_lock:
+        thread = threading.Thread(target=mailbox._apply, args=(command,))
+        thread.start()
+        thread.join(0.05)
+        assert thread.is_alive() # Blocked on the lock, not yet checked the mode
+        state_machine.current_mode = CarMode.AUTONOMOUS
+        mailbox.reset()
+        car.stop()
+    thread.join()
+    assert car.current_speed == 0
@@ -0,0 +1,62 @@
+import time
+import threading
+import pytest
+from app import app
+from car_controller import car
+from command_mailbox import command_mailbox
+from state_machine import state_machine, CarMode
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.MANUAL)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    'null', '[1, 2]', '"x"', '{"speed": "x"}', '{"speed": NaN}', '{"speed": Infinity}', '{"angle": -Infinity}',
+    '{"speed": 150}', '{"angle": 2}', '{"speed": true}', '{"speed": 10, "seq": "7"}', '{"speed": 10, "seq": 1.5}',
+    '{"speed": 10, "seq": -1}', 'not json',
+])
+def test_invalid_control_rejected(client, body):
+    command_mailbox.reset()
+    response = client.post('/api/control', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+    assert len(command_mailbox.mailbox) == 0
+
+
+def test_valid_control_accepted_then_stale(client):
+    client_id = 'test-api'
+    response = client.post('/api/control', json={'speed': 10, 'angle': 0.2, 'client': client_id, 'seq': 1})
+    assert response.get_json() == {'status': 'success', 'seq': 1}
+    response = client.post('/api/control', json={'speed': 10, 'angle': 0.2, 'client': client_id, 'seq': 1})
+    assert response.get_json() == {'status': 'stale', 'seq': 1}
+
+
+def test_control_refused_outside_manual(client, monkeypatch):
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.AUTONOMOUS)
+    assert client.post('/api/control', json={'speed': 10}).status_code == 403
+
+
+def test_stop_discards_queued_command(client):
+    # The mailbox thread is not started in tests, so the command stays in the slot
+    command_mailbox.reset()
+    command_mailbox.submit(60, 0.5, 'stop-test', 1)
+    assert len(command_mailbox.mailbox) == 1
+    assert client.post('/api/stop').status_code == 200
+    assert len(command_mailbox.mailbox) == 0
+    assert car.current_speed == 0
+
+
+def test_stop_waits_for_actuation_in_progress(client):
+    # A command being actuated holds the lock; the stop is applied after it, never before
+    order = []
+    command_mailbox.actuation_lock.acquire()
+    thread = threading.Thread(target=lambda: order.append(client.post('/api/stop').status_code))
+    thread.start()
+    time.sleep(0.05)
+    order.append('actuated')
+    command_mailbox.actuation_lock.release()
+    thread.join(5)
+    assert order == ['actuated', 200]
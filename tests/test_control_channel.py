@@ -0,0 +1,104 @@
+import math
+import pytest
+import control_channel
+from control_channel import (handle_frame, encode_command, decode_ack, COMMAND,
+                             ACCEPTED, STALE, NOT_MANUAL, BAD_FRAME)
+from command_mailbox import CommandMailbox
+from state_machine import state_machine, CarMode
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    mailbox = CommandMailbox() # Not started: submitted commands stay in the slot
+    monkeypatch.setattr(control_channel, 'command_mailbox', mailbox)
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.MANUAL)
+    return mailbox
+
+
+def test_accepted_frame_echoes_seq_and_time(mailbox):
+    seq, sent_ms, status = decode_ack(handle_frame(encode_command(7, 25.0, -0.5, 1234.5), 'c'))
+    assert (seq, sent_ms, status) == (7, 1234.5, ACCEPTED)
+    command = mailbox.mailbox.get_latest(timeout=0)
+    assert (command.speed, command.angle, command.client_id, command.seq) == (25.0, -0.5, 'c', 7)
+
+
+@pytest.mark.parametrize('data', [b'', b'\x01\x02', encode_command(1, 0, 0, 0)[:-1],
+                                  encode_command(1, 0, 0, 0) + b'\x00', 'text frame'])
+def test_wrong_size_frames_rejected(mailbox, data):
+    assert decode_ack(handle_frame(data, 'c'))[2] == BAD_FRAME
+    assert len(mailbox.mailbox) == 0
+
+
+@pytest.mark.parametrize('speed, angle, sent_ms', [
+    (math.inf, 0, 0), (math.nan, 0, 0), (-math.inf, 0, 0), (0, math.nan, 0), (0, math.inf, 0),
+    (100.5, 0, 0), (0, -1.01, 0), (10, 0, math.nan),
+])
+def test_non_finite_or_out_of_range_frames_rejected(mailbox, speed, angle, sent_ms):
+    frame = COMMAND.pack(3, speed, angle, sent_ms, 0.0)
+    assert decode_ack(handle_frame(frame, 'c'))[2] == BAD_FRAME
+    assert len(mailbox.mailbox) == 0
+    assert 'c' not in mailbox.last_seq
+
+
+def test_stale_frame(mailbox):
+    assert decode_ack(handle_frame(encode_command(5, 10, 0, 0), 'c'))[2] == ACCEPTED
+    assert decode_ack(handle_frame(encode_command(5, 20, 0, 0), 'c'))[2] == STALE
+    assert decode_ack(handle_frame(encode_command(4, 20, 0, 0), 'c'))[2] == STALE
+    assert mailbox.mailbox.get_latest(timeout=0).speed == 10
+
+
+def test_frame_outside_manual_not_submitted(mailbox, monkeypatch):
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.AUTONOMOUS)
+    assert decode_ack(handle_frame(encode_command(1, 10, 0, 0), 'c'))[2] == NOT_MANUAL
+    assert len(mailbox.mailbox) == 0
+
+
+def test_non_finite_rtt_ignored(mailbox):
+    frame = COMMAND.pack(1, 10, 0, 5.0, math.nan)
+    assert decode_ack(handle_frame(frame, 'c'))[2] == ACCEPTED
+
+
+class FakeSocket:
+    """
+    Sends the given frames, then reports the connection closed.
+    """
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.acks = []
+
+    def receive(self):
+        if not self.frames:
+            raise ConnectionError("closed")
+        return self.frames.pop(0)
+
+    def send(self, data):
+        self.acks.append(decode_ack(data))
+
+
+def serve(ws, client_id):
+    with pytest.raises(ConnectionError):
+        control_channel.serve(ws, client_id)
+
+
+def test_watching_client_disconnect_does_not_stop_driver(mailbox):
+    serve(FakeSocket([encode_command(1, 40, 0.2, 0)]), 'driver')
+    # The driver's connection is still open; a dashboard that only watched goes away
+    mailbox.submit(50, 0.1, 'driver', 2)
+    serve(FakeSocket([]), 'watcher')
+    command = mailbox.mailbox.get_latest(timeout=0)
+    assert (command.speed, command.client_id, command.seq) == (50, 'driver', 2)
+
+
+def test_driving_client_disconnect_stops_car(mailbox):
+    serve(FakeSocket([encode_command(1, 40, 0.2, 0), encode_command(2, 50, 0.2, 0)]), 'driver')
+    command = mailbox.mailbox.get_latest(timeout=0)
+    assert (command.speed, command.angle, command.client_id, command.seq) == (0, 0, 'driver', 2)
+    # The dashboard carries on over HTTP with its next seq
+    assert mailbox.submit(30, 0, 'driver', 3)
+
+
+def test_overridden_client_disconnect_does_not_stop(mailbox):
+    mailbox.submit(40, 0, 'a', 1)
+    mailbox.submit(20, 0, 'b', 1) # b took over
+    serve(FakeSocket([]), 'a')
+    assert mailbox.mailbox.get_latest(timeout=0).client_id == 'b'
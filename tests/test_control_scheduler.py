@@ -0,0 +1,114 @@
+import time
+import types
+import threading
+import pytest
+import control_scheduler as scheduler_module
+from control_scheduler import ControlScheduler, ControlTask
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def run_at(scheduler, task, clock, late=0.0):
+    """
+    Runs one tick the way _run does: at the task's deadline (plus `late`).
+    """
+    clock.now = task.deadline + late
+    scheduler._run_task(task)
+
+
+def test_on_time_ticks_follow_the_grid(clock):
+    def step():
+        clock.now += 0.01
+
+    scheduler = ControlScheduler()
+    task = ControlTask('t', 10.0, step)
+    start = task.deadline
+    for _ in range(5):
+        run_at(scheduler, task, clock)
+    assert task.deadline == pytest.approx(start + 0.5)
+    assert (task.ticks, task.overruns, task.missed) == (5, 0, 0)
+
+
+def test_overrun_skips_missed_deadlines(clock):
+    durations = iter([0.01, 0.35, 0.01])
+
+    def step():
+        clock.now += next(durations)
+
+    scheduler = ControlScheduler()
+    task = ControlTask('t', 10.0, step)
+    start = task.deadline
+    run_at(scheduler, task, clock) # Ends at +0.01
+    run_at(scheduler, task, clock) # Starts at +0.1, ends at +0.45: +0.2, +0.3 and +0.4 are gone
+    assert (task.overruns, task.missed) == (1, 3)
+    # Next deadline is the first grid point after the overrun, not a burst of catch-up ticks
+    assert task.deadline == pytest.approx(start + 0.5)
+    assert task.deadline > clock.now
+    run_at(scheduler, task, clock)
+    assert (task.ticks, task.overruns, task.missed) == (3, 1, 3)
+    assert task.deadline == pytest.approx(start + 0.6)
+
+
+def test_jitter_and_duration_percentiles(clock):
+    lates = [0.001] * 98 + [0.010, 0.020]
+
+    def step():
+        clock.now += 0.002
+
+    scheduler = ControlScheduler()
+    task = ControlTask('t', 10.0, step)
+    for late in lates:
+        run_at(scheduler, task, clock, late)
+    stats = task.stats()
+    assert stats['ticks'] == 100
+    assert stats['jitter_ms']['p50'] == pytest.approx(1.0, abs=1e-6)
+    assert stats['jitter_ms']['max'] == pytest.approx(20.0, abs=1e-6)
+    assert stats['duration_ms']['p50'] == pytest.approx(2.0, abs=1e-6)
+
+
+def test_failing_callback_counted(clock):
+    def step():
+        raise RuntimeError("boom")
+
+    scheduler = ControlScheduler()
+    task = ControlTask('t', 10.0, step)
+    run_at(scheduler, task, clock)
+    assert task.errors == 1 and task.active
+
+
+def test_task_returning_false_is_removed():
+    scheduler = ControlScheduler()
+    done = threading.Event()
+    calls = []
+
+    def step():
+        calls.append(1)
+        if len(calls) == 3:
+            done.set()
+            return False
+
+    task = scheduler.add_task('short', 200.0, step)
+    assert done.wait(5)
+    # Removed on the scheduler's next pass; its stats stay available
+    for _ in range(100):
+        if task not in scheduler.tasks:
+            break
+        time.sleep(0.01)
+    assert task not in scheduler.tasks
+    assert not task.active
+    assert len(calls) == 3
+    stats = scheduler.stats()['short']
+    assert stats['ticks'] == 3 and stats['active'] is False
@@ -0,0 +1,71 @@
+import math
+import numpy as np
+import pytest
+from gps_reader import GPSFix
+from estimator import PositionEstimator
+
+ORIGIN = (12.9716, 77.5946)
+
+
+def make_fix(east=0.0, north=0.0, heading=0.0, speed=0.0, seq=1, recv_time=0.0, estimator=None):
+    lat = ORIGIN[0] + north / estimator.m_per_deg_lat if estimator else ORIGIN[0]
+    lng = ORIGIN[1] + east / estimator.m_per_deg_lng if estimator else ORIGIN[1]
+    return GPSFix(lat, lng, heading, speed, None, recv_time, seq)
+
+
+@pytest.fixture
+def estimator():
+    estimator = PositionEstimator()
+    estimator._initialize(make_fix(), 0.0)
+    return estimator
+
+
+@pytest.mark.parametrize('heading, direction', [(0.0, (0, 1)), (90.0, (1, 0)), (225.0, (-0.5 ** 0.5, -0.5 ** 0.5))])
+def test_straight_prediction_advances_at_commanded_speed(estimator, heading, direction):
+    speed_cmd = 50
+    v = speed_cmd / 100.0 * estimator.model.max_speed_mps
+    estimator.x = np.array([0.0, 0.0, math.radians(heading), v]) # Already at the commanded speed
+    for _ in range(20):
+        estimator.predict(speed_cmd, 0.0, 0.1)
+    assert estimator.x[0] == pytest.approx(2.0 * v * direction[0], abs=1e-9)
+    assert estimator.x[1] == pytest.approx(2.0 * v * direction[1], abs=1e-9)
+    assert estimator.x[2] == pytest.approx(math.radians(heading))
+    assert estimator.x[3] == pytest.approx(v)
+
+
+def test_prediction_grows_uncertainty(estimator):
+    before = estimator.P[0, 0]
+    estimator.predict(50, 0.0, 1.0)
+    assert estimator.P[0, 0] > before
+
+
+def test_step_publishes_moving_estimate(estimator):
+    estimator.reset()
+    estimator.step(0.0, make_fix(heading=0.0, speed=0.0, recv_time=0.0), 50, 0.0)
+    first = estimator.get_estimate()
+    estimate = estimator.step(5.0, make_fix(recv_time=0.0), 50, 0.0) # Same fix: prediction only
+    assert estimate.time == 5.0
+    assert estimate.lat > first.lat # Driving North
+    assert estimate.lng == pytest.approx(first.lng)
+
+
+@pytest.mark.parametrize('position_var', [1.0, 6.25, 100.0])
+def test_update_pulls_toward_fix_by_covariance(estimator, position_var):
+    estimator.x = np.zeros(4)
+    estimator.P = np.diag([position_var, position_var, 0.1, 0.1])
+    estimator.update(make_fix(east=10.0, estimator=estimator))
+    # Scalar Kalman gain on an independent axis: P / (P + R)
+    gain = position_var / (position_var + estimator.gps_position_std ** 2)
+    assert estimator.x[0] == pytest.approx(10.0 * gain, rel=1e-6)
+    assert estimator.x[1] == pytest.approx(0.0, abs=1e-9)
+    assert estimator.P[0, 0] == pytest.approx(position_var * (1 - gain), rel=1e-6)
+
+
+def test_uncertain_state_follows_fix_more(estimator):
+    pulls = []
+    for position_var in (1.0, 100.0):
+        estimator.x = np.zeros(4)
+        estimator.P = np.diag([position_var, position_var, 0.1, 0.1])
+        estimator.update(make_fix(east=10.0, estimator=estimator))
+        pulls.append(estimator.x[0])
+    assert 0 < pulls[0] < pulls[1] < 10.0
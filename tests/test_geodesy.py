@@ -0,0 +1,105 @@
+import math
+import numpy as np
+import pytest
+import geodesy
+
+N = 500
+
+
+@pytest.fixture
+def points():
+    """
+    Random point pairs around the globe, plus pairs across the antimeridian,
+    near the poles and identical pairs (zero-length segments).
+    """
+    rng = np.random.default_rng(3)
+    lat1 = rng.uniform(-89, 89, N)
+    lng1 = rng.uniform(-180, 180, N)
+    lat2 = rng.uniform(-89, 89, N)
+    lng2 = rng.uniform(-180, 180, N)
+    # Short hops (a few meters to a few km), like route segments
+    lat3 = lat1 + rng.normal(0, 0.01, N)
+    lng3 = lng1 + rng.normal(0, 0.01, N)
+    special = np.array([
+        (12.9716, 179.9999, 12.9720, -179.9999), # Across the antimeridian, eastbound
+        (-33.0, -179.95, -33.01, 179.95), # Across the antimeridian, westbound
+        (89.9, 10.0, 89.9, -170.0), # Over the pole
+        (12.9716, 77.5946, 12.9716, 77.5946), # Zero length
+        (0.0, 180.0, 0.0, -180.0), # Same point, two longitudes
+    ])
+    return (np.concatenate([lat1, lat1, special[:, 0]]), np.concatenate([lng1, lng1, special[:, 1]]),
+            np.concatenate([lat2, lat3, special[:, 2]]), np.concatenate([lng2, lng3, special[:, 3]]))
+
+
+def scalar(func, *arrays):
+    return np.array([func(*args) for args in zip(*(a.tolist() for a in arrays))])
+
+
+def angle_diff(a, b):
+    return (np.asarray(a) - np.asarray(b) + 180) % 360 - 180
+
+
+def test_haversine_matches_scalar(points):
+    expected = scalar(geodesy.haversine_distance, *points)
+    assert geodesy.haversine_distances(*points) == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+
+def test_haversine_across_antimeridian():
+    # 0.0002 degrees of longitude at 12.97 N, not most of the way around the Earth
+    d = geodesy.haversine_distances(np.array([12.9716]), np.array([179.9999]), np.array([12.9716]), np.array([-179.9999]))
+    assert d[0] == pytest.approx(0.0002 * math.pi / 180 * geodesy.EARTH_RADIUS * math.cos(math.radians(12.9716)),
+                                 rel=1e-6)
+
+
+def test_bearing_matches_scalar(points):
+    expected = scalar(geodesy.calculate_bearing, *points)
+    bearings = geodesy.calculate_bearings(*points)
+    assert np.all((bearings >= 0) & (bearings < 360))
+    assert np.abs(angle_diff(bearings, expected)).max() < 1e-9
+
+
+def test_bearing_across_antimeridian():
+    east = geodesy.calculate_bearings(np.array([0.0]), np.array([179.99]), np.array([0.0]), np.array([-179.99]))
+    west = geodesy.calculate_bearings(np.array([0.0]), np.array([-179.99]), np.array([0.0]), np.array([179.99]))
+    assert east[0] == pytest.approx(90.0)
+    assert west[0] == pytest.approx(270.0)
+
+
+def test_cross_track_matches_scalar(points):
+    start_lat, start_lng, end_lat, end_lng = points
+    rng = np.random.default_rng(4)
+    curr_lat = start_lat + rng.normal(0, 0.01, len(start_lat))
+    curr_lng = start_lng + rng.normal(0, 0.01, len(start_lng))
+    args = (start_lat, start_lng, end_lat, end_lng, curr_lat, curr_lng)
+    expected = scalar(geodesy.get_cross_track_error, *args)
+    assert geodesy.cross_track_errors(*args) == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+
+def test_cross_track_side_and_zero_length_segment():
+    # 100 m North-bound segment; the car 2 m East is on the right
+    start, end = (12.9716, 77.5946), (12.9725, 77.5946)
+    east = (12.9720, 77.5946 + 2 / (geodesy.EARTH_RADIUS * math.radians(1) * math.cos(math.radians(12.972))))
+    xte = geodesy.cross_track_errors(np.array([start[0]]), np.array([start[1]]), np.array([end[0]]),
+                                     np.array([end[1]]), east[0], east[1])
+    assert xte[0] == pytest.approx(2.0, abs=0.01)
+
+    # Zero-length segment: same (defined) result as the scalar version
+    args = (start[0], start[1], start[0], start[1], east[0], east[1])
+    assert geodesy.cross_track_errors(*args) == pytest.approx(geodesy.get_cross_track_error(*args))
+    assert math.isfinite(geodesy.get_cross_track_error(*args))
+
+
+def test_polyline_helpers_match_scalar():
+    rng = np.random.default_rng(5)
+    lats = 12.97 + np.cumsum(rng.normal(0, 1e-4, 50))
+    lngs = 77.59 + np.cumsum(rng.normal(0, 1e-4, 50))
+    lats[10] = lats[9] # One zero-length segment
+    lngs[10] = lngs[9]
+    a = (lats[:-1], lngs[:-1], lats[1:], lngs[1:])
+
+    assert geodesy.polyline_segment_lengths(lats, lngs) == pytest.approx(
+        scalar(geodesy.haversine_distance, *a), rel=1e-9, abs=1e-9)
+    assert np.abs(angle_diff(geodesy.polyline_bearings(lats, lngs), scalar(geodesy.calculate_bearing, *a))).max() < 1e-9
+    here = (12.9705, 77.5912)
+    expected = [geodesy.get_cross_track_error(*segment, *here) for segment in zip(*(v.tolist() for v in a))]
+    assert geodesy.polyline_cross_track_errors(lats, lngs, *here) == pytest.approx(expected, rel=1e-9, abs=1e-6)
@@ -0,0 +1,145 @@
+import types
+import pytest
+import gps_config
+from gps_config import (ubx_message, ubx_set_message_rate, ubx_set_rate, ubx_set_baudrate,
+                        mtk_set_sentences, mtk_set_rate, mtk_set_baudrate, nmea_command, negotiate)
+
+
+def test_ubx_poll_checksum():
+    # UBX-MON-VER poll
+    assert ubx_message(0x0A, 0x04) == bytes.fromhex('b5620a0400000e34')
+
+
+def test_ubx_cfg_msg():
+    assert ubx_set_message_rate('GSV', 0) == bytes.fromhex('b56206010300f00300fd15')
+    assert ubx_set_message_rate('GGA', 1) == bytes.fromhex('b56206010300f00001fb10')
+
+
+def test_ubx_cfg_rate():
+    # 100 ms measurement period, 1 navigation cycle, GPS time
+    assert ubx_set_rate(10) == bytes.fromhex('b5620608' '0600' '6400' '0100' '0100' '7a12')
+
+
+def test_ubx_cfg_prt():
+    # UART1, 8N1, 115200 baud, UBX + NMEA + RTCM in, UBX + NMEA out
+    assert ubx_set_baudrate(115200) == bytes.fromhex(
+        'b5620600' '1400' '01' '00' '0000' 'd0080000' '00c20100' '0700' '0300' '0000' '0000' 'c07e')
+
+
+def test_pmtk_commands():
+    assert mtk_set_sentences(['GGA', 'RMC']) == b'$PMTK314,0,1,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0*28\r\n'
+    assert mtk_set_rate(10) == b'$PMTK220,100*2F\r\n'
+    assert mtk_set_baudrate(115200) == b'$PMTK251,115200*1F\r\n'
+
+
+GGA = nmea_command('GPGGA,123519,1258.2960,N,07735.6760,E,1,08,0.9,920.0,M,-86.0,M,,')
+RMC = nmea_command('GPRMC,123519,A,1258.2960,N,07735.6760,E,000.0,000.0,010126,,')
+
+
+class FakeMtk:
+    """
+    MediaTek receiver on a fake port, in a fake clock: every read takes 10 ms.
+    """
+    def __init__(self, baudrate=9600, follows_baud=True, acks_rate=True):
+        self.baudrate = baudrate
+        self.follows_baud = follows_baud
+        self.acks_rate = acks_rate
+        self.now = 0.0
+        self.commands = []
+
+    def handle(self, data):
+        body = data.decode('ascii').strip()[1:].split('*')[0]
+        command, *args = body.split(',')
+        self.commands.append(command)
+        if command == 'PMTK605':
+            return nmea_command('PMTK705,AXN_2.10_3339_2012072601,5223,PA6H,1.0')
+        if command == 'PMTK251' and self.follows_baud:
+            self.baudrate = int(args[0])
+        if command == 'PMTK220' and not self.acks_rate:
+            return b''
+        return nmea_command(f"PMTK001,{command[4:]},3")
+
+    def Serial(self, port, baudrate, timeout=None):
+        return FakePort(self, baudrate)
+
+    @property
+    def time(self):
+        return types.SimpleNamespace(monotonic=lambda: self.now, sleep=self.sleep)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakePort:
+    def __init__(self, receiver, baudrate):
+        self.receiver = receiver
+        self.baudrate = baudrate
+        self.pending = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def linked(self):
+        return self.baudrate == self.receiver.baudrate
+
+    @property
+    def in_waiting(self):
+        return len(self.pending)
+
+    def read(self, n):
+        self.receiver.now += 0.01
+        if not self.linked:
+            return b'\xfe\x00' # Noise at the wrong baud rate
+        if not self.pending:
+            self.pending = GGA + RMC
+        data, self.pending = self.pending[:n], self.pending[n:]
+        return data
+
+    def write(self, data):
+        if self.linked and data.startswith(b'$'):
+            self.pending += self.receiver.handle(data)
+
+    def reset_input_buffer(self):
+        self.pending = b''
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def profile():
+    return dict(gps_config.DEFAULT_PROFILE, probe_baudrates=[9600, 115200])
+
+
+def run(monkeypatch, receiver, profile):
+    monkeypatch.setattr(gps_config, 'serial', receiver)
+    monkeypatch.setattr(gps_config, 'time', receiver.time)
+    return negotiate('/dev/fake', profile)
+
+
+def test_mtk_switched(monkeypatch, profile):
+    receiver = FakeMtk()
+    assert run(monkeypatch, receiver, profile) == (115200, None)
+    assert receiver.commands == ['PMTK605', 'PMTK314', 'PMTK251', 'PMTK220']
+
+
+def test_mtk_rate_without_ack_is_degraded(monkeypatch, profile):
+    baudrate, problem = run(monkeypatch, FakeMtk(acks_rate=False), profile)
+    assert baudrate == 115200
+    assert problem == "no ACK for the update rate"
+
+
+def test_silent_receiver_falls_back_to_old_baud(monkeypatch, profile):
+    baudrate, problem = run(monkeypatch, FakeMtk(follows_baud=False), profile)
+    assert baudrate == 9600
+    assert problem == "receiver silent at 115200 baud"
+
+
+def test_no_receiver(monkeypatch, profile):
+    baudrate, problem = run(monkeypatch, FakeMtk(baudrate=4800), profile)
+    assert baudrate is None
+    assert problem == "no NMEA on /dev/fake"
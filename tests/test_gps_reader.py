@@ -0,0 +1,86 @@
+import time
+import threading
+import pytest
+from gps_config import nmea_command
+from gps_reader import GPSReader
+
+LAT = '1258.2960,N'
+LNG = '07735.6760,E'
+
+
+def gga(fix_time, lat=LAT):
+    return nmea_command(f"GPGGA,{fix_time},{lat},{LNG},1,08,0.9,920.0,M,-86.0,M,,")
+
+
+def rmc(fix_time, knots, course, lat=LAT):
+    return nmea_command(f"GPRMC,{fix_time},A,{lat},{LNG},{knots},{course},010126,,")
+
+
+@pytest.fixture
+def reader():
+    return GPSReader(profile_file=None)
+
+
+def test_gga_and_rmc_of_one_epoch_merge(reader):
+    reader.process_line(gga('120000.00'))
+    first = reader.get_fix()
+    assert first.seq == 1
+    assert (first.heading, first.speed) == (0.0, 0.0)
+
+    reader.process_line(rmc('120000.00', '10.0', '45.0'))
+    fix = reader.get_fix()
+    assert fix.seq == 1
+    assert (fix.lat, fix.lng, fix.recv_time) == (first.lat, first.lng, first.recv_time)
+    assert fix.heading == 45.0
+    assert fix.speed == pytest.approx(18.52)
+
+
+def test_next_epoch_is_a_new_fix_keeping_motion(reader):
+    reader.process_line(rmc('120000.00', '10.0', '45.0'))
+    reader.process_line(gga('120001.00', lat='1258.3000,N')) # GGA has no heading / speed
+    fix = reader.get_fix()
+    assert fix.seq == 2
+    assert fix.heading == 45.0
+    assert fix.speed == pytest.approx(18.52)
+
+
+def test_heading_held_while_stopped(reader):
+    reader.process_line(rmc('120000.00', '10.0', '45.0'))
+    reader.process_line(rmc('120001.00', '0.0', '270.0')) # Course is noise at standstill
+    fix = reader.get_fix()
+    assert fix.seq == 2
+    assert fix.heading == 45.0
+    assert fix.speed == 0.0
+
+
+def test_same_time_different_position_is_a_new_fix(reader):
+    reader.process_line(gga('120000.00'))
+    reader.process_line(gga('120000.00', lat='1258.3000,N'))
+    assert reader.get_fix().seq == 2
+
+
+def test_wait_for_fix_times_out(reader):
+    reader.process_line(gga('120000.00'))
+    start = time.monotonic()
+    assert reader.wait_for_fix(1, timeout=0.05) is None
+    assert time.monotonic() - start >= 0.04
+
+
+def test_wait_for_fix_returns_at_once_when_seq_moved(reader):
+    reader.process_line(gga('120000.00'))
+    reader.process_line(gga('120001.00', lat='1258.3000,N'))
+    start = time.monotonic()
+    fix = reader.wait_for_fix(0, timeout=5)
+    assert fix.seq == 2
+    assert time.monotonic() - start < 0.5
+
+
+def test_wait_for_fix_wakes_on_new_fix(reader):
+    reader.process_line(gga('120000.00'))
+    timer = threading.Timer(0.05, reader.process_line, (gga('120001.00', lat='1258.3000,N'),))
+    timer.start()
+    try:
+        fix = reader.wait_for_fix(1, timeout=5)
+        assert fix is not None and fix.seq == 2
+    finally:
+        timer.join()
@@ -0,0 +1,13 @@
+from app import app
+from subsystems import subsystems
+
+
+def test_import_starts_no_subsystem():
+    assert subsystems.start_time is None
+    assert all(s.status == 'pending' for s in subsystems.subsystems.values())
+
+
+def test_health_reports_starting_before_start():
+    response = app.test_client().get('/api/health')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'starting'
@@ -0,0 +1,115 @@
+import sys
+import json
+import math
+import types
+import pytest
+from map_matcher import RoadIndex, MapMatcher, read_geojson_roads
+
+ORIGIN = (12.9716, 77.5946)
+M_PER_DEG_LAT = math.pi * 6371000 / 180.0
+M_PER_DEG_LNG = M_PER_DEG_LAT * math.cos(math.radians(ORIGIN[0]))
+
+
+def point(east, north):
+    """
+    (lat, lng) `east` / `north` meters from ORIGIN, in the index's own projection.
+    """
+    return ORIGIN[0] + north / M_PER_DEG_LAT, ORIGIN[1] + east / M_PER_DEG_LNG
+
+
+def offsets(lat, lng):
+    return (lng - ORIGIN[1]) * M_PER_DEG_LNG, (lat - ORIGIN[0]) * M_PER_DEG_LAT
+
+
+@pytest.fixture
+def index():
+    # One 200 m East-West road through ORIGIN: four 50 m cells long
+    index = RoadIndex(cell_size=50.0)
+    index.add_polyline([point(0, 0), point(200, 0)])
+    return index
+
+
+def test_projects_onto_middle_of_segment(index):
+    lat, lng, distance, segment = index.nearest(*point(80, 7))
+    assert offsets(lat, lng) == pytest.approx((80, 0), abs=1e-6)
+    assert distance == pytest.approx(7)
+    assert segment == 0
+
+
+@pytest.mark.parametrize('east, snapped_east', [(-5, 0), (210, 200)])
+def test_clamps_to_endpoints(index, east, snapped_east):
+    lat, lng, distance, _ = index.nearest(*point(east, 3))
+    assert offsets(lat, lng) == pytest.approx((snapped_east, 0), abs=1e-6)
+    assert distance == pytest.approx(math.hypot(east - snapped_east, 3))
+
+
+def test_max_distance_cutoff(index):
+    assert index.nearest(*point(100, 20), max_distance=25.0) is not None
+    assert index.nearest(*point(100, 30), max_distance=25.0) is None
+    assert RoadIndex().nearest(*ORIGIN) is None
+
+
+def test_long_segment_found_from_neighbouring_cell(index):
+    # The road only touches cells with cy == 0; the query is in cy == -1, under cell cx == 2
+    assert (2, -1) not in index.grid and (2, 0) in index.grid
+    lat, lng, distance, _ = index.nearest(*point(120, -10))
+    assert offsets(lat, lng) == pytest.approx((120, 0), abs=1e-6)
+    assert distance == pytest.approx(10)
+
+
+def test_nearest_of_several_segments(index):
+    index.add_polyline([point(100, 40), point(100, 100)]) # Side road, 40 m North
+    assert index.nearest(*point(100, 25))[3] == 1
+    assert index.nearest(*point(100, 15))[3] == 0
+
+
+def test_geojson_filtered_by_highway_type(tmp_path):
+    def feature(highway, coords, kind='LineString'):
+        return {'type': 'Feature', 'properties': {'highway': highway} if highway else {},
+                'geometry': {'type': kind, 'coordinates': coords}}
+
+    path = tmp_path / 'roads.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        feature('residential', [[77.0, 12.0], [77.1, 12.1]]),
+        feature('motorway', [[[77.0, 12.0], [77.1, 12.0]], [[77.2, 12.0], [77.3, 12.0]]], 'MultiLineString'),
+        feature('railway', [[77.0, 12.0], [77.1, 12.1]]), # Not a drivable highway type
+        feature(None, [[78.0, 13.0], [78.1, 13.1]]), # No highway tag: kept
+        {'type': 'Feature', 'properties': {'highway': 'primary'}, 'geometry': {'type': 'Point', 'coordinates': [77, 12]}},
+    ]}))
+    roads = list(read_geojson_roads(str(path)))
+    assert [props.get('highway') for _, props in roads] == ['residential', 'motorway', 'motorway', None]
+    # GeoJSON [lng, lat] becomes (lat, lng)
+    assert roads[0][0] == [(12.0, 77.0), (12.1, 77.1)]
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'code': 'Ok', 'waypoints': [{'location': [77.5, 12.5]}]}
+
+    def get(url, timeout=None):
+        calls.append(url)
+        return Response()
+
+    module = types.SimpleNamespace(get=get, RequestException=OSError)
+    monkeypatch.setitem(sys.modules, 'requests', module)
+    return calls
+
+
+def test_osrm_only_with_fallback_enabled(index, fake_requests):
+    matcher = MapMatcher(road_file=None, use_osrm_fallback=False)
+    matcher.road_index = index
+    assert matcher.match_to_road(*point(100, 5)) == pytest.approx(point(100, 0))
+    assert matcher.match_to_road(*point(100, 500)) is None
+    assert fake_requests == []
+
+    matcher.use_osrm_fallback = True
+    assert matcher.match_to_road(*point(100, 5)) == pytest.approx(point(100, 0)) # Local match first
+    assert fake_requests == []
+    assert matcher.match_to_road(*point(100, 500)) == (12.5, 77.5)
+    assert len(fake_requests) == 1
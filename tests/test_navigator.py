@@ -0,0 +1,76 @@
+import time
+import pytest
+from gps_reader import gps_reader, GPSFix
+from navigator import navigator
+from estimator import estimator, Estimate
+from car_controller import car
+from state_machine import state_machine, CarMode
+
+
+@pytest.fixture
+def nav(monkeypatch):
+    fix = GPSFix(12.9716, 77.5946, 0.0, 5.0, 1.0, time.monotonic(), 1)
+    monkeypatch.setattr(gps_reader, 'get_fix', lambda: fix)
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.AUTONOMOUS)
+    navigator.set_route([{'lat': 12.9816, 'lng': 77.5946}, {'lat': 12.9916, 'lng': 77.5946}])
+    navigator.is_navigating = True
+    navigator.last_visited_wp = None
+    navigator.last_seq = -1
+    navigator.last_fix_time = time.monotonic()
+    navigator.fix_lost = False
+    navigator.fix_timeout = 0.05
+    yield navigator
+    navigator.is_navigating = False
+    navigator.fix_timeout = 3.0
+    car.stop()
+
+
+@pytest.mark.parametrize('use_estimator', [False, True])
+def test_car_stays_stopped_after_fix_timeout(nav, monkeypatch, use_estimator):
+    monkeypatch.setattr(nav, 'use_estimator', use_estimator)
+    assert nav._tick()
+    assert car.current_speed > 0
+
+    time.sleep(0.06)
+    speeds = []
+    for _ in range(10):
+        assert nav._tick()
+        speeds.append(car.current_speed)
+        time.sleep(0.02)
+    assert speeds == [0] * 10
+
+
+def test_new_fix_resumes_driving(nav, monkeypatch):
+    nav._tick()
+    time.sleep(0.06)
+    nav._tick()
+    assert nav.fix_lost and car.current_speed == 0
+
+    fix = GPSFix(12.9717, 77.5946, 0.0, 5.0, 2.0, time.monotonic(), 2)
+    monkeypatch.setattr(gps_reader, 'get_fix', lambda: fix)
+    nav._tick()
+    assert not nav.fix_lost
+    assert car.current_speed > 0
+
+
+def test_fix_without_position_latches_stop(nav, monkeypatch):
+    nav._tick()
+    fix = GPSFix(0.0, 0.0, 0.0, 0.0, 2.0, time.monotonic(), 2)
+    monkeypatch.setattr(gps_reader, 'get_fix', lambda: fix)
+    for _ in range(3):
+        nav._tick()
+        assert car.current_speed == 0
+
+
+def estimate_at(lat, lng, age):
+    return Estimate(lat, lng, 0.0, 5.0, time.monotonic() - age, 1, 1.0)
+
+
+@pytest.mark.parametrize('age, reached', [(0.0, True), (1.0, False)])
+def test_stale_estimate_falls_back_to_fix(nav, monkeypatch, age, reached):
+    # The estimate puts the car on the first waypoint, the raw fix is 1.1 km short of it
+    waypoint = nav.waypoints[0]
+    monkeypatch.setattr(nav, 'use_estimator', True)
+    monkeypatch.setattr(estimator, 'get_estimate', lambda: estimate_at(waypoint['lat'], waypoint['lng'], age))
+    assert nav._tick()
+    assert (nav.current_waypoint_index == 1) == reached
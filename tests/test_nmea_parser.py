@@ -0,0 +1,75 @@
+import pytest
+import nmea_parser
+from simulator import nmea_checksum, format_gga, format_rmc
+
+GGA = b'$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47\r\n'
+
+
+def test_checksum():
+    assert nmea_parser.checksum_ok(GGA.rstrip())
+    assert not nmea_parser.checksum_ok(GGA.rstrip().replace(b'*47', b'*46'))
+    assert not nmea_parser.checksum_ok(GGA.rstrip().replace(b'*47', b'*ZZ'))
+    # No checksum at all is accepted
+    assert nmea_parser.checksum_ok(b'$GPVTG,054.7,T,034.4,M,005.5,N,010.2,K')
+
+
+def test_bad_checksum_dropped():
+    corrupted = GGA.replace(b'4807.038', b'4807.039') # One flipped digit
+    assert nmea_parser.parse(corrupted) is None
+
+
+def test_gga():
+    kind, fix_time, lat, lng, quality, sats, hdop = nmea_parser.parse(GGA)
+    assert kind == 'GGA'
+    assert fix_time == pytest.approx(12 * 3600 + 35 * 60 + 19)
+    assert lat == pytest.approx(48 + 7.038 / 60)
+    assert lng == pytest.approx(11 + 31.0 / 60)
+    assert (quality, sats, hdop) == (1, 8, 0.9)
+
+
+def test_southern_western_hemispheres_and_other_talkers():
+    line = format_gga(3600.5, -33.8688, -151.2093).replace(b'$GPGGA', b'$GNGGA')
+    line = nmea_checksum(line[1:line.rfind(b'*')].decode())
+    _, fix_time, lat, lng, *_ = nmea_parser.parse(line)
+    assert fix_time == pytest.approx(3600.5)
+    assert lat == pytest.approx(-33.8688, abs=1e-6)
+    assert lng == pytest.approx(-151.2093, abs=1e-6)
+
+
+def test_rmc_and_void_fix():
+    _, _, lat, lng, valid, speed, course = nmea_parser.parse(format_rmc(0, 12.9716, 77.5946, 3.5, 270.0))
+    assert (lat, lng) == pytest.approx((12.9716, 77.5946), abs=1e-6)
+    assert (valid, speed, course) == (True, 3.5, 270.0)
+    void = nmea_parser.parse(nmea_checksum('GPRMC,,V,,,,,,,,,,N'))
+    assert void == ('RMC', None, None, None, False, None, None)
+
+
+@pytest.mark.parametrize('body, expected', [
+    ('GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A', ('VTG', 54.7, 5.5)),
+    ('GPVTG,054.7,034.4,005.5,010.2', ('VTG', 54.7, 5.5)), # Old receivers without unit fields
+    ('GPVTG,,T,,M,0.0,N,0.0,K,N', ('VTG', None, 0.0)),
+])
+def test_vtg(body, expected):
+    assert nmea_parser.parse(nmea_checksum(body)) == expected
+
+
+@pytest.mark.parametrize('body', [
+    'GPGGA,12x519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,', # Time
+    'GPGGA,123519,48O7.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,', # Latitude
+    'GPGGA,123519,4807.038,N,01131.000,E,one,08,0.9,545.4,M,46.9,M,,', # Quality
+    'GPGGA,123519,4807.038,N', # Truncated
+    'GPRMC,123519,A,4807.038,N,01131.000,E,fast,084.4,230394,003.1,W',
+    'GPRMC,123519,A',
+    'GPVTG,x,T,034.4,M,005.5,N,010.2,K',
+])
+def test_malformed_fields_raise(body):
+    with pytest.raises(ValueError):
+        nmea_parser.parse(nmea_checksum(body))
+
+
+@pytest.mark.parametrize('line', [
+    b'', b'$GP', b'GPGGA,123519,4807.038,N*00', b'$GPGSV,3,1,11,03,03,111,00*74\r\n',
+    b'$GPGSA,A,3,04,05,,09,12,,,24,,,,,2.5,1.3,2.1*39\r\n',
+])
+def test_other_sentences_ignored(line):
+    assert nmea_parser.parse(line) is None
@@ -0,0 +1,95 @@
+import time
+import threading
+import pytest
+import gps_reader as gps_reader_module
+from gps_config import nmea_command
+from gps_reader import GPSReader
+from pipeline import LatestQueue
+
+
+def test_full_queue_drops_oldest():
+    queue = LatestQueue(3)
+    for i in range(5):
+        queue.put(i)
+    assert queue.dropped == 2
+    assert [queue.get(timeout=0) for _ in range(3)] == [2, 3, 4]
+    assert queue.get(timeout=0) is None
+
+
+def test_get_latest_discards_older():
+    queue = LatestQueue(4)
+    for i in range(3):
+        queue.put(i)
+    assert queue.get_latest(timeout=0) == 2
+    assert queue.dropped == 2
+    assert len(queue) == 0
+
+
+def test_get_times_out():
+    start = time.monotonic()
+    assert LatestQueue(1).get(timeout=0.05) is None
+    assert time.monotonic() - start >= 0.04
+
+
+@pytest.mark.parametrize('method', ['get', 'get_latest'])
+def test_close_wakes_blocked_get(method):
+    queue = LatestQueue(1)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(getattr(queue, method)(timeout=5)))
+    thread.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    queue.close()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert result == [None]
+    assert time.monotonic() - start < 1
+
+
+def gga(fix_time, lat_min):
+    return nmea_command(f"GPGGA,{fix_time},12{lat_min:07.4f},N,07735.6760,E,1,08,0.9,920.0,M,-86.0,M,,")
+
+
+def test_late_map_match_discarded(monkeypatch):
+    reader = GPSReader(profile_file=None)
+    started = [threading.Event(), threading.Event()]
+    release = [threading.Event(), threading.Event()]
+    matched = []
+
+    def match_to_road(lat, lng):
+        i = len(matched)
+        matched.append(lat)
+        started[i].set()
+        release[i].wait(5)
+        return lat + 1.0, lng + 1.0
+
+    monkeypatch.setattr(gps_reader_module.map_matcher, 'match_to_road', match_to_road)
+    reader.running = True
+    thread = threading.Thread(target=reader._match_loop)
+    thread.start()
+    try:
+        reader.process_line(gga('120000.00', 58.2960))
+        assert started[0].wait(5)
+        reader.process_line(gga('120001.00', 58.3000)) # Published while the first match runs
+        second = reader.get_fix()
+        assert second.seq == 2
+
+        # The first match finishes after fix 2 was published: thrown away
+        release[0].set()
+        assert started[1].wait(5)
+        assert reader.get_fix().snapped_lat is None
+
+        # The match of the current fix is attached
+        release[1].set()
+        deadline = time.monotonic() + 5
+        while reader.get_fix().snapped_lat is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        fix = reader.get_fix()
+        assert fix.seq == 2
+        assert (fix.snapped_lat, fix.snapped_lng) == pytest.approx((second.lat + 1.0, second.lng + 1.0))
+    finally:
+        release[0].set()
+        release[1].set()
+        reader.running = False
+        reader.match_queue.close()
+        thread.join(5)
@@ -0,0 +1,109 @@
+import math
+import pytest
+import geodesy
+from app import app
+from navigator import navigator
+from route import prepare_waypoints, resampled_count
+from state_machine import state_machine, CarMode
+
+ORIGIN = (12.9716, 77.5946)
+M_PER_DEG_LAT = 111195.0
+
+
+def north(meters, east=0.0):
+    """
+    Waypoint `meters` North (and `east` meters East) of ORIGIN.
+    """
+    return {'lat': ORIGIN[0] + meters / M_PER_DEG_LAT,
+            'lng': ORIGIN[1] + east / (M_PER_DEG_LAT * math.cos(math.radians(ORIGIN[0])))}
+
+
+def test_straight_line_collapses_to_endpoints():
+    waypoints = [north(i) for i in range(0, 101, 5)]
+    assert prepare_waypoints(waypoints, tolerance=1.0) == [waypoints[0], waypoints[-1]]
+
+
+def test_repeated_points_dropped():
+    a, b = north(0), north(50, 50)
+    assert prepare_waypoints([a, a, b, b, b], tolerance=0) == [a, b]
+
+
+def test_corner_kept_and_small_wiggle_dropped():
+    wiggle = north(25, 0.3) # 0.3 m off the line
+    corner = north(50)
+    end = north(50, 50)
+    out = prepare_waypoints([north(0), wiggle, corner, end], tolerance=1.0)
+    assert out == [north(0), corner, end]
+    # tolerance 0 keeps every point
+    assert len(prepare_waypoints([north(0), wiggle, corner, end], tolerance=0)) == 4
+
+
+def test_resample_limits_spacing_and_keeps_corners():
+    corner, end = north(50), north(50, 30)
+    out = prepare_waypoints([north(0), corner, end], tolerance=0, spacing=10.0)
+    assert corner in out and out[0] == north(0) and out[-1] == end
+    gaps = [geodesy.haversine_distance(a['lat'], a['lng'], b['lat'], b['lng']) for a, b in zip(out, out[1:])]
+    assert max(gaps) <= 10.0 + 1e-6
+    assert len(out) == 5 + 3 + 1
+
+
+def test_short_routes_pass_through():
+    assert prepare_waypoints([]) == []
+    assert prepare_waypoints([{'lat': '12.5', 'lng': 77}]) == [{'lat': 12.5, 'lng': 77.0}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(state_machine, 'current_mode', CarMode.AUTONOMOUS)
+    routes = []
+    monkeypatch.setattr(navigator, 'set_route', routes.append)
+    monkeypatch.setattr(navigator, 'start_navigation', lambda: None)
+    test_client = app.test_client()
+    test_client.routes = routes
+    return test_client
+
+
+@pytest.mark.parametrize('body', [
+    'null', 'not json', '[1, 2]', '{"waypoints": "x"}', '{"waypoints": [1]}',
+    '{"waypoints": [{"lat": "x", "lng": 77}]}', '{"waypoints": [{"lat": 95, "lng": 77}]}',
+    '{"waypoints": [{"lat": NaN, "lng": 77}]}', '{"waypoints": [{"lat": 12}]}', '{"lat": 12, "lng": Infinity}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "tolerance": "x"}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "tolerance": -1}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "tolerance": NaN}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "spacing": 1e-9}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "spacing": 1e9}',
+    '{"waypoints": [{"lat": 12, "lng": 77}], "spacing": true}',
+])
+def test_invalid_navigate_rejected(client, body):
+    response = client.post('/api/navigate', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+    assert client.routes == []
+
+
+def test_navigate_reports_prepared_points(client):
+    waypoints = [north(i) for i in range(0, 101, 5)]
+    response = client.post('/api/navigate', json={'waypoints': waypoints, 'spacing': 50})
+    assert response.status_code == 200
+    assert response.get_json()['points_in'] == 21
+    assert response.get_json()['points_out'] == 3
+    assert len(client.routes) == 1
+
+
+@pytest.mark.parametrize('body', [
+    {'waypoints': [{'lat': 0, 'lng': 0}, {'lat': 0, 'lng': 90}], 'spacing': 0.5},
+    {'waypoints': [north(0), north(10000)], 'spacing': 0.5},
+])
+def test_long_route_with_small_spacing_rejected(client, body):
+    response = client.post('/api/navigate', json=body)
+    assert response.status_code == 400
+    assert 'waypoints' in response.get_json()['message']
+    assert client.routes == []
+
+
+def test_resampled_count_bounds_output():
+    waypoints = [north(0), north(50), north(50, 30)]
+    lats = [wp['lat'] for wp in waypoints]
+    lngs = [wp['lng'] for wp in waypoints]
+    assert resampled_count(lats, lngs, 10.0) == len(prepare_waypoints(waypoints, tolerance=0, spacing=10.0))
+    assert resampled_count(lats, lngs, 0) == 3
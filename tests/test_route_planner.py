@@ -0,0 +1,127 @@
+import math
+import pytest
+from app import app
+from route_planner import RoadGraph, RoutePlanner, route_planner
+
+ORIGIN = (12.9716, 77.5946)
+STEP = 100.0 # meters between grid junctions
+M_PER_DEG_LAT = 111195.0
+M_PER_DEG_LNG = M_PER_DEG_LAT * math.cos(math.radians(ORIGIN[0]))
+
+
+def grid_point(row, col):
+    """
+    Junction `row` blocks North and `col` blocks East of ORIGIN.
+    """
+    return (ORIGIN[0] + row * STEP / M_PER_DEG_LAT, ORIGIN[1] + col * STEP / M_PER_DEG_LNG)
+
+
+def street(points, oneway=False):
+    return [grid_point(*p) for p in points], ({'oneway': 'yes'} if oneway else {})
+
+
+@pytest.fixture
+def planner():
+    """
+    4 x 4 grid of two-way streets with a mid-block vertex on every street,
+    except that row 0 is one way eastbound. An island street far to the
+    North has no connection to the grid.
+    """
+    polylines = []
+    for r in range(4):
+        polylines.append(street([(r, c / 2) for c in range(7)], oneway=(r == 0)))
+    for c in range(4):
+        polylines.append(street([(r / 2, c) for r in range(7)]))
+    polylines.append(street([(10, 0), (10, 1)]))
+
+    planner = RoutePlanner(road_file=None)
+    planner.graph = RoadGraph()
+    planner.graph.build(polylines, num_landmarks=4)
+    return planner
+
+
+def plan(planner, a, b):
+    return planner.plan(*grid_point(*a), *grid_point(*b))
+
+
+def test_straight_route_keeps_street_geometry(planner):
+    route = plan(planner, (1, 0), (1, 3))
+    assert route['distance'] == pytest.approx(3 * STEP, rel=1e-3)
+    # Junctions plus the mid-block vertices of each compressed edge
+    assert len(route['waypoints']) == 7
+    assert (route['waypoints'][0]['lat'], route['waypoints'][0]['lng']) == pytest.approx(grid_point(1, 0))
+    assert (route['waypoints'][-1]['lat'], route['waypoints'][-1]['lng']) == pytest.approx(grid_point(1, 3))
+
+
+def test_oneway_street_followed_with_traffic(planner):
+    route = plan(planner, (0, 0), (0, 3))
+    assert route['distance'] == pytest.approx(3 * STEP, rel=1e-3)
+
+
+def test_oneway_street_avoided_against_traffic(planner):
+    # Westbound along row 0 is not allowed: up to row 1, across, back down
+    route = plan(planner, (0, 3), (0, 0))
+    assert route['distance'] == pytest.approx(5 * STEP, rel=1e-3)
+    assert max(wp['lat'] for wp in route['waypoints']) == pytest.approx(grid_point(1, 0)[0])
+
+
+def test_every_junction_pair_matches_reference(planner):
+    graph = planner.graph
+    junctions = len(graph.junctions)
+    for source in range(junctions):
+        for target in range(junctions):
+            # shortest_path takes road vertex ids
+            result = graph.shortest_path(int(graph.junctions[source]), int(graph.junctions[target]))
+            reference = _reference_distance(graph, source, target)
+            if reference == math.inf:
+                assert result is None
+            else:
+                assert result[0] == pytest.approx(reference, rel=1e-9)
+
+
+def _reference_distance(graph, source, target):
+    """
+    Bellman-Ford distance between search nodes, independent of the planner's A*.
+    """
+    dist = [math.inf] * len(graph.junctions)
+    dist[source] = 0.0
+    for _ in range(len(dist)):
+        for u, v, w in zip(graph.edge_src, graph.edge_dst, graph.edge_len):
+            if dist[u] + w < dist[v]:
+                dist[v] = dist[u] + w
+    return dist[target]
+
+
+def test_unreachable_goal(planner):
+    assert plan(planner, (1, 1), (10, 1)) is None
+
+
+def test_goal_off_the_road_network(planner):
+    assert plan(planner, (1, 1), (20, 20)) is None
+
+
+@pytest.fixture
+def client(planner, monkeypatch):
+    monkeypatch.setattr(route_planner, 'graph', planner.graph)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    'null', 'not json', '[1]', '{"start": {"lat": 12, "lng": 77}}', '{"start": 5, "end": {"lat": 12, "lng": 77}}',
+    '{"start": {"lat": 12, "lng": 77}, "end": {"lat": "x", "lng": 77}}',
+    '{"start": {"lat": 12, "lng": 77}, "end": {"lat": 12}}',
+    '{"start": {"lat": NaN, "lng": 77}, "end": {"lat": 12, "lng": 77}}',
+    '{"start": {"lat": 12, "lng": 200}, "end": {"lat": 12, "lng": 77}}',
+])
+def test_invalid_route_request_rejected(client, body):
+    response = client.post('/api/route', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_route_request(client):
+    start, end = grid_point(0, 3), grid_point(0, 0)
+    response = client.post('/api/route', json={'start': {'lat': start[0], 'lng': start[1]},
+                                               'end': {'lat': end[0], 'lng': end[1]}})
+    assert response.status_code == 200
+    assert response.get_json()['distance'] == pytest.approx(5 * STEP, rel=1e-3)
@@ -0,0 +1,27 @@
+import types
+import pytest
+import app
+import serve
+from subsystems import subsystems
+
+
+@pytest.fixture
+def announced(monkeypatch):
+    ports = []
+    monkeypatch.setattr(subsystems, 'start', lambda: None)
+    monkeypatch.setattr(app, 'announce_address', ports.append)
+    return ports
+
+
+def worker(bind):
+    return types.SimpleNamespace(cfg=types.SimpleNamespace(bind=[bind]))
+
+
+def test_post_worker_init_announces_tcp_port(announced):
+    serve.post_worker_init(worker('0.0.0.0:5000'))
+    assert announced == [5000]
+
+
+def test_post_worker_init_skips_unix_socket(announced):
+    serve.post_worker_init(worker('unix:/run/jager.sock'))
+    assert announced == []
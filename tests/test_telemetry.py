@@ -0,0 +1,24 @@
+import pytest
+from app import app
+from telemetry import telemetry, NAV
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('query', ['n=-5', 'n=x', 'n=1.5', 'kind=nope'])
+def test_invalid_query_rejected(client, query):
+    response = client.get(f'/api/telemetry?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_n_limits_and_caps(client):
+    for i in range(telemetry.size + 10):
+        telemetry.record(NAV, i, 0.0, 0.0, 0.0)
+    records = client.get('/api/telemetry?n=3&kind=nav').get_json()
+    assert [r['waypoint'] for r in records] == [telemetry.size + 7, telemetry.size + 8, telemetry.size + 9]
+    assert client.get('/api/telemetry?n=0').get_json() == []
+    assert len(client.get('/api/telemetry?n=1000000').get_json()) == telemetry.size
@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+import pytest
+import app as app_module
+from tile_server import TileCache, TileServer
+
+TILE = b'\x89PNG' + b'\0' * 96 # 100 bytes
+
+
+def test_hit_does_not_touch_the_file(tmp_path):
+    cache = TileCache(str(tmp_path), max_bytes=10_000)
+    cache.put('12/1/1', TILE)
+    path = cache._path('12/1/1')
+    os.utime(path, (1_000_000, 1_000_000))
+    assert cache.get('12/1/1') == TILE
+    assert os.stat(path).st_mtime == 1_000_000
+
+
+def test_eviction_follows_in_memory_recency(tmp_path):
+    cache = TileCache(str(tmp_path), max_bytes=300)
+    for key in ('12/1/1', '12/1/2', '12/1/3'):
+        cache.put(key, TILE)
+    cache.get('12/1/1') # Now most recently used
+    cache.put('12/1/4', TILE)
+    assert cache.get('12/1/2') is None
+    assert not os.path.exists(cache._path('12/1/2'))
+    assert cache.get('12/1/1') == TILE
+    assert cache.stats()['bytes'] == 300
+
+
+def test_scan_rebuilds_order_from_mtimes(tmp_path):
+    cache = TileCache(str(tmp_path), max_bytes=10_000)
+    for i, key in enumerate(('12/1/3', '12/1/1', '12/1/2')):
+        cache.put(key, TILE)
+        os.utime(cache._path(key), (1_000_000 + i, 1_000_000 + i))
+
+    restarted = TileCache(str(tmp_path), max_bytes=10_000)
+    restarted.scan()
+    assert list(restarted.entries) == ['12/1/3', '12/1/1', '12/1/2']
+    assert restarted.total_bytes == 300
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    server = TileServer(cache_dir=str(tmp_path), mbtiles=None, use_upstream=False)
+    monkeypatch.setattr(app_module, 'tile_server', server)
+    return server
+
+
+@pytest.fixture
+def client(server):
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    'null', 'not json', '[1]', '{"lat": 12, "lng": 77, "min_zoom": "abc"}',
+    '{"lat": 12, "lng": 77, "max_zoom": 12.5}', '{"lat": 12, "lng": 77, "min_zoom": -1}',
+    '{"lat": 12, "lng": 77, "max_zoom": 21}', '{"lat": 12, "lng": 77, "min_zoom": 15, "max_zoom": 14}',
+    '{"lat": 12, "lng": 77, "min_zoom": true}', '{"lat": 12, "lng": 77, "style": "satellite"}',
+    '{"lat": "12", "lng": 77}', '{"lat": 12}', '{"lat": 95, "lng": 77}', '{"lat": 12, "lng": NaN}',
+    '{"lat": 12, "lng": 77, "radius": "far"}', '{"lat": 12, "lng": 77, "radius": -1}',
+    '{"bounds": [1, 2, 3, 4]}', '{"bounds": {"south": 12, "west": 77, "north": 13}}',
+    '{"bounds": {"south": "x", "west": 77, "north": 13, "east": 78}}',
+    '{"bounds": {"south": 13, "west": 77, "north": 12, "east": 78}}',
+    # Too many tiles
+    '{"lat": 12, "lng": 77, "radius": 50000, "max_zoom": 20}',
+])
+def test_invalid_prefetch_rejected(client, server, body):
+    response = client.post('/api/tiles/prefetch', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+    assert server.prefetch_thread is None
+
+
+def test_prefetch_around_point(client, server):
+    response = client.post('/api/tiles/prefetch', json={'lat': 12.97, 'lng': 77.59, 'radius': 100,
+                                                        'min_zoom': 12, 'max_zoom': 13})
+    assert response.status_code == 200
+    count = response.get_json()['tiles']
+    server.prefetch_thread.join()
+    # Upstream disabled and nothing cached: every tile is counted as failed
+    assert server.stats()['prefetch'] == {'running': False, 'total': count, 'done': count,
+                                         'fetched': 0, 'failed': count}
+
+
+def test_only_one_prefetch_starts(server, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(server, 'get_tile', lambda *args: release.wait())
+    barrier = threading.Barrier(8)
+    results = []
+
+    def start():
+        barrier.wait()
+        results.append(server.prefetch('light', 12.9, 77.5, 12.91, 77.51, 14, 14))
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    release.set()
+    server.prefetch_thread.join()
+    assert sum(result is not None for result in results) == 1
+
+
+def test_prefetch_does_not_hold_off_the_backoff(server, monkeypatch):
+    server.use_upstream = True
+    calls = []
+
+    def offline(style, z, x, y):
+        calls.append((z, x, y))
+        server.offline_until = time.monotonic() + server.offline_backoff
+        return None
+
+    # Stands in for a connection error on the first upstream request
+    monkeypatch.setattr(server, '_from_upstream',
+                        lambda *args: offline(*args) if time.monotonic() >= server.offline_until else None)
+    server.offline_until = time.monotonic() + 60
+    count = server.prefetch('light', 12.9, 77.5, 12.92, 77.52, 14, 15)
+    server.prefetch_thread.join()
+    assert count > 1
+    # The prefetch retried once, then respected the backoff again
+    assert len(calls) == 1
+    assert server.offline_until > time.monotonic()
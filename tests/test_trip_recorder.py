@@ -0,0 +1,81 @@
+import threading
+import numpy as np
+import trip_recorder
+from gps_reader import GPSFix
+from trip_recorder import TripRecorder, load_trip, FIX, SPEED, MODE, MODES
+
+
+def fix(seq):
+    return GPSFix._make([0] * len(GPSFix._fields))._replace(seq=seq, lat=12.0 + seq * 1e-5, lng=77.0)
+
+
+def test_rollover_keeps_every_record(tmp_path):
+    recorder = TripRecorder(str(tmp_path), segment_records=10)
+    recorder.start()
+    for seq in range(1, 36):
+        recorder.record_fix(fix(seq))
+    recorder.stop()
+
+    # Four full or partly full segments; the prepared spare is removed on stop
+    paths = sorted(tmp_path.iterdir())
+    assert [p.name[-7:] for p in paths] == ['000.bin', '001.bin', '002.bin', '003.bin']
+    trip = np.concatenate([load_trip(str(p)) for p in paths])
+    assert list(trip['seq']) == list(range(1, 36))
+    assert np.all(trip['kind'] == FIX)
+
+
+def test_mode_before_start_is_recorded(tmp_path):
+    recorder = TripRecorder(str(tmp_path))
+    recorder.record_mode('AUTONOMOUS')
+    recorder.start()
+    recorder.record_speed(40)
+    recorder.stop()
+    trip = load_trip(recorder.path)
+    assert list(trip['kind']) == [SPEED]
+    assert trip['mode'][0] == MODES['AUTONOMOUS']
+
+
+def test_rows_match_their_mode(tmp_path):
+    recorder = TripRecorder(str(tmp_path), segment_records=100000)
+    recorder.start()
+    done = threading.Event()
+
+    def switch_modes():
+        for i in range(2000):
+            recorder.record_mode('AUTONOMOUS' if i % 2 else 'MANUAL')
+        done.set()
+
+    thread = threading.Thread(target=switch_modes)
+    thread.start()
+    while not done.is_set():
+        recorder.record_speed(10)
+    thread.join()
+    recorder.stop()
+
+    # The mode only ever changes on a mode row
+    trip = load_trip(recorder.path)
+    modes = trip['mode']
+    is_mode = trip['kind'] == MODE
+    assert np.all(modes[:-1][~is_mode[1:]] == modes[1:][~is_mode[1:]])
+    assert np.count_nonzero(is_mode) == 2000
+
+
+def test_failed_segment_open_stops_recording(tmp_path, monkeypatch):
+    def segment(path, capacity):
+        if not path.endswith('_000.bin'):
+            raise OSError(28, "No space left on device")
+        return real_segment(path, capacity)
+
+    real_segment = trip_recorder._Segment
+    monkeypatch.setattr(trip_recorder, '_Segment', segment)
+    recorder = TripRecorder(str(tmp_path), segment_records=5)
+    recorder.start()
+    for seq in range(1, 11):
+        recorder.record_fix(fix(seq)) # Must not raise into the GPS / motor threads
+        recorder.record_speed(seq)
+    assert recorder.records is None
+    recorder.stop()
+
+    # The first, full segment stays readable
+    trip = load_trip(str(tmp_path / f"{recorder.trip_name}_000.bin"))
+    assert len(trip) == 5
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Map Tile Server
+Serves the dashboard's map tiles from the car, so every dashboard shares one
+set of tiles and the map keeps working without internet.
+
+Tiles come from a size-bounded LRU disk cache (tiles/<style>/<z>/<x>/<y>.png).
+Misses are filled from an MBTiles file (maps/tiles.mbtiles) if present, else
+from the upstream CartoDB servers when online. Offline, only cached tiles are
+served.
+
+Usage:
+    python tile_server.py prefetch 12.9716 77.5946 --radius 2000 --zoom 12-17
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, 'tiles')
+DEFAULT_MBTILES = os.path.join(BASE_DIR, 'maps', 'tiles.mbtiles')
+
+STYLES = {
+    'light': 'https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',
+    'dark': 'https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png',
+}
+SUBDOMAINS = 'abcd'
+MAX_ZOOM = 20
+
+
+def tile_etag(data):
+    return hashlib.md5(data).hexdigest()
+
+def lat_lng_to_tile(lat, lng, z):
+    """
+    Slippy map tile (x, y) containing the point at zoom z.
+    """
+    n = 2 ** z
+    lat = max(-85.0511, min(85.0511, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tiles_in_bounds(south, west, north, east, z):
+    x1, y1 = lat_lng_to_tile(north, west, z)
+    x2, y2 = lat_lng_to_tile(south, east, z)
+    for x in range(x1, x2 + 1):
+        for y in range(y1, y2 + 1):
+            yield x, y
+
+
+class TileCache:
+    """
+    LRU cache of tile files on disk, bounded to max_bytes.
+    Recency is tracked in memory only; a hit never writes to the SD card.
+    After a restart the order is rebuilt from file mtimes, i.e. when each
+    tile was last downloaded.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # key -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self):
+        """
+        Picks up the tiles already on disk (oldest first). Run once at startup.
+        """
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if not name.endswith('.png'):
+                    continue
+                st = os.stat(path)
+                key = os.path.relpath(path, self.directory)[:-4].replace(os.sep, '/')
+                found.append((st.st_mtime, key, st.st_size))
+        with self.lock:
+            # Newest first, each in front of the rest: tiles put since startup stay most recent
+            for _, key, size in sorted(found, reverse=True):
+                if key in self.entries:
+                    continue
+                self.entries[key] = size
+                self.entries.move_to_end(key, last=False)
+                self.total_bytes += size
+        if found:
+            print(f"[TileCache] {len(found)} cached tiles, {self.total_bytes / 1e6:.1f} MB")
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def _path(self, key):
+        return os.path.join(self.directory, *key.split('/')) + '.png'
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            # Removed behind our back
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path) # Readers never see a half-written tile
+
+        evict = []
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                evict.append(old_key)
+        for old_key in evict:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                'tiles': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class TileServer:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024,
+                 mbtiles=DEFAULT_MBTILES, use_upstream=True):
+        self.cache = TileCache(cache_dir, max_bytes)
+        self.use_upstream = use_upstream
+        self.session = None # requests.Session, created on the first upstream fetch
+        self.offline_until = 0 # Skip upstream for a while after a connection error
+        self.offline_backoff = 30.0 # seconds
+        self.sub_index = 0
+
+        self.mbtiles_file = mbtiles
+        self.mbtiles = None
+        self.mbtiles_lock = threading.Lock()
+
+        self.prefetch_lock = threading.Lock() # Guards starting a prefetch and its status
+        self.prefetch_thread = None
+        self.prefetch_status = {'running': False, 'total': 0, 'done': 0, 'fetched': 0, 'failed': 0}
+
+    def load(self):
+        """
+        Scans the disk cache and opens the MBTiles file. Tiles can be served
+        (as misses) before this finishes. Returns None, or why tiles are degraded.
+        """
+        self.cache.scan()
+        if self.mbtiles_file and os.path.exists(self.mbtiles_file):
+            import sqlite3
+            self.mbtiles = sqlite3.connect(self.mbtiles_file, check_same_thread=False)
+            print(f"[TileServer] Using MBTiles {self.mbtiles_file}")
+        elif not self.use_upstream:
+            return "no MBTiles and upstream disabled, cached tiles only"
+        return None
+
+    def get_tile(self, style, z, x, y):
+        """
+        Returns the PNG bytes of a tile, or None if it is not available
+        (unknown style, out of range, or a cache miss while offline).
+        """
+        if style not in STYLES or not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return None
+        key = f"{style}/{z}/{x}/{y}"
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        data = self._from_mbtiles(z, x, y)
+        if data is None:
+            data = self._from_upstream(style, z, x, y)
+        if data is not None:
+            self.cache.put(key, data)
+        return data
+
+    def _from_mbtiles(self, z, x, y):
+        if self.mbtiles is None:
+            return None
+        # MBTiles rows are TMS (y counted from the south)
+        with self.mbtiles_lock:
+            row = self.mbtiles.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, (2 ** z - 1) - y)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def _from_upstream(self, style, z, x, y):
+        if not self.use_upstream or time.monotonic() < self.offline_until:
+            return None
+        self.sub_index = (self.sub_index + 1) % len(SUBDOMAINS)
+        url = STYLES[style].format(s=SUBDOMAINS[self.sub_index], z=z, x=x, y=y)
+        import requests
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers['User-Agent'] = 'JagerCar-TileCache/1.0'
+        try:
+            response = self.session.get(url, timeout=5)
+        except requests.RequestException:
+            self.offline_until = time.monotonic() + self.offline_backoff
+            return None
+        if response.status_code == 200 and response.content:
+            return response.content
+        return None
+
+    # --- Prefetch ---
+
+    def prefetch(self, style, south, west, north, east, min_zoom, max_zoom, max_tiles=5000):
+        """
+        Fills the cache for an area in a background thread, e.g. before
+        heading out of WiFi range. Returns the number of tiles queued.
+        """
+        if self.prefetch_status['running']:
+            return None # Cheap early out; checked again under the lock below
+        tiles = []
+        for z in range(min_zoom, max_zoom + 1):
+            for x, y in tiles_in_bounds(south, west, north, east, z):
+                tiles.append((z, x, y))
+                if len(tiles) > max_tiles:
+                    raise ValueError(f"Area needs more than {max_tiles} tiles, lower max_zoom")
+
+        with self.prefetch_lock:
+            if self.prefetch_status['running']:
+                return None
+            self.prefetch_status = {'running': True, 'total': len(tiles), 'done': 0, 'fetched': 0, 'failed': 0}
+            # A prefetch is an explicit request to go online: retry upstream once now. If that
+            # fails the backoff applies again, to the prefetch and to dashboard requests alike.
+            self.offline_until = 0
+            self.prefetch_thread = threading.Thread(target=self._prefetch_loop, args=(style, tiles), daemon=True)
+            self.prefetch_thread.start()
+        return len(tiles)
+
+    def prefetch_around(self, style, lat, lng, radius, min_zoom, max_zoom, max_tiles=5000):
+        dlat = radius / 111320.0
+        dlng = dlat / max(0.01, math.cos(math.radians(lat)))
+        return self.prefetch(style, lat - dlat, lng - dlng, lat + dlat, lng + dlng, min_zoom, max_zoom, max_tiles)
+
+    def _prefetch_loop(self, style, tiles):
+        status = self.prefetch_status
+        for z, x, y in tiles:
+            if f"{style}/{z}/{x}/{y}" not in self.cache:
+                fetched = self.get_tile(style, z, x, y) is not None
+                with self.prefetch_lock:
+                    status['fetched' if fetched else 'failed'] += 1
+            with self.prefetch_lock:
+                status['done'] += 1
+        with self.prefetch_lock:
+            status['running'] = False
+        print(f"[TileServer] Prefetch done: {status['fetched']} fetched, {status['failed']} failed")
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self.prefetch_lock:
+            stats['prefetch'] = dict(self.prefetch_status)
+        stats['mbtiles'] = self.mbtiles is not None
+        stats['online'] = time.monotonic() >= self.offline_until
+        return stats
+
+# Global instance
+tile_server = TileServer()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fill the tile cache for an area")
+    parser.add_argument('command', choices=['prefetch', 'stats'])
+    parser.add_argument('lat', type=float, nargs='?')
+    parser.add_argument('lng', type=float, nargs='?')
+    parser.add_argument('--radius', type=float, default=1000.0, help="meters")
+    parser.add_argument('--zoom', default='12-17', help="min-max zoom")
+    parser.add_argument('--style', default='light', choices=sorted(STYLES))
+    args = parser.parse_args()
+
+    tile_server.load()
+    if args.command == 'prefetch':
+        min_zoom, max_zoom = (int(v) for v in args.zoom.split('-'))
+        count = tile_server.prefetch_around(args.style, args.lat, args.lng, args.radius, min_zoom, max_zoom)
+        print(f"Prefetching {count} tiles...")
+        tile_server.prefetch_thread.join()
+    print(tile_server.stats())
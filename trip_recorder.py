@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Trip Recorder
+Append-only log of what the car did on a run: every GPS fix, motor and
+steering command and mode change, as fixed-size records in a preallocated,
+memory-mapped segment file.
+
+Writing a record is one NumPy row assignment into the mapping (no syscalls,
+no formatting). Reading gives the whole trip back as a zero-copy NumPy
+structured array:
+
+    trip = load_trip('trips/trip_20260101-120000_000.bin')
+    fixes = trip[trip['kind'] == FIX]
+
+Usage:
+    python trip_recorder.py trips/trip_20260101-120000_000.bin
+"""
+
+import os
+import mmap
+import time
+import struct
+import threading
+import numpy as np
+
+DEFAULT_TRIP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trips')
+
+# Record kinds
+FIX = 1
+SPEED = 2
+STEERING = 3
+MODE = 4
+
+MODES = {'MANUAL': 1, 'AUTONOMOUS': 2}
+
+# Every record carries the full current state, so any row is self-contained
+TRIP_DTYPE = np.dtype([
+    ('t', 'f8'), # time.monotonic()
+    ('kind', 'u1'),
+    ('mode', 'u1'),
+    ('seq', 'u4'), # GPSFix.seq of the latest fix
+    ('lat', 'f8'),
+    ('lng', 'f8'),
+    ('heading', 'f4'),
+    ('speed', 'f4'), # GPS speed km/h
+    ('cmd_speed', 'f4'), # -100..100
+    ('cmd_steering', 'f4'), # -1.0..1.0
+])
+
+# Header: magic, version, record size, capacity, count (count is updated in place)
+HEADER = struct.Struct('<8sIIQQ')
+HEADER_SIZE = 64
+MAGIC = b'JAGRTRIP'
+VERSION = 1
+
+
+class _Segment:
+    """
+    One preallocated, memory-mapped segment file.
+    """
+    def __init__(self, path, capacity):
+        self.path = path
+        size = HEADER_SIZE + capacity * TRIP_DTYPE.itemsize
+        self.file = open(path, 'w+b')
+        self.file.truncate(size) # Sparse preallocation, pages are only written when used
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        self.mm[:HEADER.size] = HEADER.pack(MAGIC, VERSION, TRIP_DTYPE.itemsize, capacity, 0)
+        self.count_view = np.ndarray(1, dtype='<u8', buffer=self.mm, offset=HEADER.size - 8)
+        self.records = np.ndarray(capacity, dtype=TRIP_DTYPE, buffer=self.mm, offset=HEADER_SIZE)
+
+    def close(self, remove=False):
+        self.records = None
+        self.count_view = None
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+        if remove:
+            os.remove(self.path)
+
+
+class TripRecorder:
+    def __init__(self, directory=DEFAULT_TRIP_DIR, segment_records=200000):
+        self.directory = directory
+        self.segment_records = segment_records # ~9 MB per segment, ~1.5h at 30 records/s
+        self.lock = threading.Lock()
+        self.current = None # _Segment being written
+        self.path = None
+        self.records = None # Structured view over the mapping; None = not recording
+        self.count_view = None
+        self.count = 0
+        self.segment = 0
+        self.trip_name = None
+        # The next segment is opened (and the previous one closed) by a background
+        # thread, so a rollover on the hot path is just a swap
+        self.spare = None
+        self.spare_thread = None
+        # Current full state row as a plain list (cheaper to update than a NumPy record)
+        self.state = [0.0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+    def start(self, directory=None):
+        if self.records is not None:
+            return
+        if directory:
+            self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.trip_name = time.strftime('trip_%Y%m%d-%H%M%S')
+        self.segment = 0
+        with self.lock:
+            self._use(_Segment(self._segment_path(0), self.segment_records))
+            self._prepare_spare(None)
+        print(f"[TripRecorder] Recording to {self.path}")
+
+    def stop(self):
+        with self.lock:
+            if self.records is None:
+                return
+            self.records = None
+            self.count_view = None
+            self.spare_thread.join()
+            self.current.close()
+            self.current = None
+            if self.spare is not None:
+                self.spare.close(remove=True) # Never written to
+                self.spare = None
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{self.trip_name}_{segment:03d}.bin")
+
+    def _use(self, segment):
+        self.current = segment
+        self.path = segment.path
+        self.records = segment.records
+        self.count_view = segment.count_view
+        self.count = 0
+
+    def _prepare_spare(self, old):
+        self.spare_thread = threading.Thread(target=self._spare_worker, args=(old, self.segment + 1), daemon=True)
+        self.spare_thread.start()
+
+    def _spare_worker(self, old, segment):
+        if old is not None:
+            old.close()
+        try:
+            self.spare = _Segment(self._segment_path(segment), self.segment_records)
+        except OSError as e:
+            # _roll_over retries on the hot path
+            print(f"[TripRecorder] Could not open the next segment: {e}")
+
+    def _roll_over(self):
+        """
+        Switches to the next segment. Caller holds the lock.
+        """
+        self.spare_thread.join() # Normally finished long ago
+        segment = self.spare
+        self.spare = None
+        old = self.current
+        if segment is None:
+            try:
+                segment = _Segment(self._segment_path(self.segment + 1), self.segment_records)
+            except OSError as e:
+                # Disk full / card removed: stop recording, never the caller (motor command, GPS parse)
+                print(f"[TripRecorder] Could not open the next segment, recording stopped: {e}")
+                self.records = None
+                self.count_view = None
+                self.current = None
+                threading.Thread(target=self._close_quietly, args=(old,), daemon=True).start()
+                return
+        self.segment += 1
+        self._use(segment)
+        self._prepare_spare(old)
+
+    @staticmethod
+    def _close_quietly(segment):
+        try:
+            segment.close()
+        except OSError as e:
+            print(f"[TripRecorder] Could not close {segment.path}: {e}")
+
+    def _append(self, kind):
+        """
+        Writes the current state row as a record of `kind`. Caller holds the lock.
+        """
+        if self.count >= self.segment_records:
+            self._roll_over()
+            if self.records is None:
+                return
+        state = self.state
+        state[0] = time.monotonic()
+        state[1] = kind
+        self.records[self.count] = tuple(state)
+        self.count += 1
+        self.count_view[0] = self.count
+
+    def record_fix(self, fix):
+        if self.records is None:
+            return
+        with self.lock:
+            self.state[3:8] = (fix.seq, fix.lat, fix.lng, fix.heading, fix.speed)
+            if self.records is not None:
+                self._append(FIX)
+
+    def record_speed(self, speed):
+        if self.records is None:
+            return
+        with self.lock:
+            self.state[8] = speed
+            if self.records is not None:
+                self._append(SPEED)
+
+    def record_steering(self, steering):
+        if self.records is None:
+            return
+        with self.lock:
+            self.state[9] = steering
+            if self.records is not None:
+                self._append(STEERING)
+
+    def record_mode(self, mode):
+        """
+        mode: CarMode value string ('MANUAL' / 'AUTONOMOUS')
+        """
+        # Also set while not recording: start() picks it up (mode changes are rare)
+        with self.lock:
+            self.state[2] = MODES.get(mode, 0)
+            if self.records is not None:
+                self._append(MODE)
+
+
+def load_trip(path):
+    """
+    Maps one segment file read-only and returns its records as a NumPy
+    structured array (zero-copy view of the file).
+    """
+    with open(path, 'rb') as f:
+        magic, version, record_size, capacity, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or record_size != TRIP_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} trip file")
+    if count == 0:
+        return np.zeros(0, dtype=TRIP_DTYPE)
+    return np.memmap(path, dtype=TRIP_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+# Global instance
+trip_recorder = TripRecorder()
+
+
+if __name__ == '__main__':
+    import sys
+
+    for path in sys.argv[1:]:
+        trip = load_trip(path)
+        fixes = trip[trip['kind'] == FIX]
+        print(f"{path}: {len(trip)} records, {len(fixes)} fixes, "
+              f"{(trip['t'][-1] - trip['t'][0]) if len(trip) else 0:.1f}s")
+        for kind, name in ((FIX, 'fix'), (SPEED, 'speed'), (STEERING, 'steering'), (MODE, 'mode')):
+            print(f"  {name}: {int(np.count_nonzero(trip['kind'] == kind))}")
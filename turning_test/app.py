@@ -1,6 +1,7 @@
 
 from flask import Flask, render_template, request, jsonify
-from turn_manager import turn_manager
+from control_scheduler import control_scheduler
+from .turn_manager import turn_manager
 
 app = Flask(__name__)
 
@@ -28,7 +29,9 @@ def status():
     return jsonify({
         "current_heading": turn_manager.current_heading,
         "target_heading": turn_manager.target_heading,
-        "is_turning": turn_manager.turning
+        "is_turning": turn_manager.turning,
+        # Jitter percentiles and overruns of the turn's control task
+        "scheduler": control_scheduler.stats().get('turn_manager', {})
     })
 
 if __name__ == '__main__':
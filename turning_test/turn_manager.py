@@ -1,14 +1,16 @@
 
-import time
-import threading
-from car_driver import driver
+from control_scheduler import control_scheduler
+from .car_driver import driver
 
 class TurnManager:
     def __init__(self):
         self.current_heading = 0 # 0=N, 90=E, 180=S, 270=W
         self.target_heading = 0
         self.turning = False
-        self.thread = None
+        self.task = None # ControlTask running _control_step
+        self.control_rate_hz = 10.0
+        self.ticks = 0
+        self.log_every = 10 # Print the heading every this many ticks (once a second)
         
         # Tuning
         # How many degrees per second the car turns at a given speed/steer
@@ -33,69 +35,68 @@ class TurnManager:
     def start_turn(self):
         if self.turning: return
         self.turning = True
-        self.thread = threading.Thread(target=self._control_loop)
-        self.thread.daemon = True
-        self.thread.start()
-
-    def _control_loop(self):
         print("Starting Turn Sequence...")
+        self.task = control_scheduler.add_task('turn_manager', self.control_rate_hz, self._control_step)
+
+    def _control_step(self):
+        """
+        One control period, run by the control scheduler. Returns False when done.
+        """
+        # Calculate Error
+        # Shortest turn logic
+        # Apply offset to current heading logic if needed, or target.
+        # Here: We want Target to be offset. E.g. NORTH is 0, but if offset is 5, correct North is 5.
+        # Error = (Target + Offset) - Current
+        effective_target = self.target_heading + self.heading_offset
         
-        while self.turning:
-            # Calculate Error
-            # Shortest turn logic
-            # Apply offset to current heading logic if needed, or target.
-            # Here: We want Target to be offset. E.g. NORTH is 0, but if offset is 5, correct North is 5.
-            # Error = (Target + Offset) - Current
-            effective_target = self.target_heading + self.heading_offset
-            
-            error = effective_target - self.current_heading
-            
-            # Normalize to -180 to 180
-            if error > 180: error -= 360
-            elif error < -180: error += 360
-            
+        error = effective_target - self.current_heading
+        
+        # Normalize to -180 to 180
+        if error > 180: error -= 360
+        elif error < -180: error += 360
+        
+        if self.ticks % self.log_every == 0:
             print(f"Heading: {self.current_heading:.1f} | Target: {self.target_heading} | Error: {error:.1f}")
+        self.ticks += 1
 
-            if abs(error) < 5:
-                print("Aligned!")
-                driver.set_move(0)
-                driver.set_steering(0)
-                self.turning = False
-                break
+        if abs(error) < 5:
+            print("Aligned!")
+            driver.set_move(0)
+            driver.set_steering(0)
+            self.turning = False
+            print("Turn Complete.")
+            return False
 
-            # Steer
-            # Turn little by little (Smoothly ramp steer)
-            # Use max steer for efficiency but we could ramp it if needed
-            steer_target = 0.0
-            if error > 0:
-                steer_target = 1.0 # Right
-            else:
-                steer_target = -1.0 # Left
-                
-            # For simplicity in this test, just set steering safe max
-            driver.set_steering(steer_target)
-            
-            # Move
-            driver.set_move(self.motor_speed)
-            
-            # Simulate Heading Update (Dead Reckoning)
-            # In real life, read compass here.
-            # We assume we update every 0.1s
-            step_time = 0.1
+        # Steer
+        # Turn little by little (Smoothly ramp steer)
+        # Use max steer for efficiency but we could ramp it if needed
+        steer_target = 0.0
+        if error > 0:
+            steer_target = 1.0 # Right
+        else:
+            steer_target = -1.0 # Left
             
-            # Direction of turn
-            turn_dir = 1 if error > 0 else -1
-            
-            change = self.turn_rate_deg_per_sec * step_time * turn_dir
-            
-            # Don't overshoot
-            if abs(change) > abs(error):
-                change = error
+        # For simplicity in this test, just set steering safe max
+        driver.set_steering(steer_target)
+        
+        # Move
+        driver.set_move(self.motor_speed)
+        
+        # Simulate Heading Update (Dead Reckoning)
+        # In real life, read compass here.
+        # The scheduler calls us exactly once per period
+        step_time = 1.0 / self.control_rate_hz
+        
+        # Direction of turn
+        turn_dir = 1 if error > 0 else -1
+        
+        change = self.turn_rate_deg_per_sec * step_time * turn_dir
+        
+        # Don't overshoot
+        if abs(change) > abs(error):
+            change = error
 
-            self.current_heading = (self.current_heading + change) % 360
-            
-            time.sleep(step_time)
-            
-        print("Turn Complete.")
+        self.current_heading = (self.current_heading + change) % 360
+        return True
 
 turn_manager = TurnManager()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Vehicle Model
+Kinematic bicycle model of the car, shared by the position estimator (its
+parameters drive the EKF prediction) and the offline simulator (which steps it).
+"""
+
+import math
+
+
+class BicycleModel:
+    """
+    Kinematic bicycle model in a local flat frame (x = East, y = North, meters).
+    heading is degrees clockwise from North, like a compass / GPS course.
+    """
+    def __init__(self, wheelbase=0.26, max_steer_deg=30.0, max_speed_mps=3.0, speed_tau=0.3):
+        self.wheelbase = wheelbase # meters
+        self.max_steer = math.radians(max_steer_deg) # Wheel angle at steering = +-1.0
+        self.max_speed_mps = max_speed_mps # Ground speed at 100% duty
+        self.speed_tau = speed_tau # Motor response time constant (s)
+
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = 0.0
+        self.v = 0.0
+
+    def step(self, speed_cmd, steering_cmd, dt):
+        """
+        speed_cmd: -100..100 (% duty), steering_cmd: -1.0 (Left) .. 1.0 (Right)
+        """
+        target_v = max(-100, min(100, speed_cmd)) / 100.0 * self.max_speed_mps
+        self.v += (target_v - self.v) * min(1.0, dt / self.speed_tau)
+
+        steer = max(-1.0, min(1.0, steering_cmd)) * self.max_steer
+        yaw_rate = self.v / self.wheelbase * math.tan(steer) # rad/s, positive = clockwise
+        h = math.radians(self.heading)
+        self.x += self.v * math.sin(h) * dt
+        self.y += self.v * math.cos(h) * dt
+        self.heading = (self.heading + math.degrees(yaw_rate * dt)) % 360
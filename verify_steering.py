@@ -1,6 +1,7 @@
 import time
 try:
     from car_controller import car
+    car.init_hardware()
 except ImportError:
     print("Could not import car_controller. Make sure you are in the project directory.")
     exit(1)